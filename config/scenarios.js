@@ -65,6 +65,36 @@ const scenarioCatalog = {
   },
 };
 
+// Optional open workload: ARRIVAL_RATE is iterations/sec at the scenario's peak
+// VU count. The same knob drives same_pull_scripts/common/pacing.py in Locust.
+const arrivalRate = Number(ENV.ARRIVAL_RATE || 0);
+
+function toArrivalRate(scenario) {
+  if (!(arrivalRate > 0)) return scenario;
+
+  if (scenario.executor === "constant-vus") {
+    return {
+      executor: "constant-arrival-rate",
+      rate: arrivalRate,
+      timeUnit: "1s",
+      duration: scenario.duration,
+      preAllocatedVUs: scenario.vus,
+    };
+  }
+
+  const peak = Math.max(1, ...scenario.stages.map((stage) => stage.target));
+  return {
+    executor: "ramping-arrival-rate",
+    startRate: 0,
+    timeUnit: "1s",
+    preAllocatedVUs: peak,
+    stages: scenario.stages.map((stage) => ({
+      duration: stage.duration,
+      target: Math.round((arrivalRate * stage.target) / peak),
+    })),
+  };
+}
+
 const selectedScenario = scenarioCatalog[testType];
 
 if (!selectedScenario) {
@@ -78,7 +108,7 @@ export const selectedTestType = testType;
 export const options = {
   scenarios: {
     recruitment_management: {
-      ...selectedScenario,
+      ...toArrivalRate(selectedScenario),
       gracefulStop: ENV.GRACEFUL_STOP || "30s",
       exec: "recruitmentScenario",
     },
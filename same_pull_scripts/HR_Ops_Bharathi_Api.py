@@ -1,8 +1,12 @@
-from locust import HttpUser, task, between
+from locust import task
 from locust.exception import StopUser
 import logging
-import random
-import time
+
+from common.pacing import user_wait_time
+from common.retry import retry_policy
+from common.session_pool import LoginFailed, SessionPoolMixin, pool
+from common.feeder import data_pool
+from common.users import BaseHttpUser
 
 # Configure logging
 logging.basicConfig(
@@ -16,42 +20,35 @@ USER_POOL = [
     {"usr": "emp1@erp.in", "pwd": "Agnikul_1"},
     {"usr": "emp23@erp.in", "pwd": "Agnikul_1"},
 ]
+user_pool = data_pool("bharathi.USER_POOL", USER_POOL)
 
-class ERPUser(HttpUser):
-    wait_time = between(1, 3)
+class ERPUser(SessionPoolMixin, BaseHttpUser):
+    wait_time = user_wait_time(1, 3)
 
     def on_start(self):
-        # Pick a random user from pool
-        payload = random.choice(USER_POOL)
+        # Next account from this worker's slice of the pool; the session pool logs
+        # each account in once per process and shares its cookies after that.
+        payload = user_pool.next(self)
         success = False
 
-        for i in range(3):  # retry login up to 3 times
-            with self.client.post(
-                "/api/method/login",
-                json=payload,
-                name="POST /login",
-                catch_response=True
-            ) as response:
-                if response.status_code == 200:
-                    response.success()
-                    logging.info(f"Login successful for user: {payload['usr']}")
-                    success = True
+        for attempt in range(retry_policy.max_attempts):
+            if attempt == 0:
+                retry_policy.start()
+            try:
+                pool.acquire(self, payload)
+                logging.info(f"Session ready for user: {payload['usr']}")
+                success = True
+                break
+            except LoginFailed as e:
+                logging.error(f"Login attempt {attempt+1} failed for {payload['usr']}: {e.status_code} - {e.text}")
+                # Only transient errors (e.g. "Deadlock") are retried, with backoff
+                # and within the shared retry budget.
+                if not retry_policy.should_retry(attempt, e.status_code, e.text):
                     break
-                else:
-                    # Handle deadlock specifically
-                    if "Deadlock" in response.text:
-                        logging.warning(f"Deadlock detected for {payload['usr']}, retrying...")
-                        time.sleep(2)  # wait before retrying
-                        continue
-
-                    # Generic failure handling
-                    msg = f"Login attempt {i+1} failed for {payload['usr']}: {response.status_code} - {response.text}"
-                    response.failure(msg)
-                    logging.error(msg)
-                    time.sleep(random.uniform(0.5, 1.5))  # small backoff
+                retry_policy.backoff(attempt)
 
         if not success:
-            raise StopUser(f"Login failed after 3 retries for user: {payload['usr']}")
+            raise StopUser(f"Login failed for user: {payload['usr']}")
 
     @task
     def get_employees(self):
@@ -78,18 +75,7 @@ class ERPUser(HttpUser):
         )
 
     def _make_get_request(self, url, params, name):
-        """Helper method to handle GET requests with retries"""
-        for attempt in range(3):
-            try:
-                with self.client.get(url, params=params, name=name, catch_response=True) as response:
-                    if response.status_code == 200:
-                        response.success()
-                        return
-                    else:
-                        msg = f"{name} failed: {response.status_code} - {response.text}"
-                        response.failure(msg)
-                        logging.error(msg)
-            except Exception as e:
-                logging.error(f"{name} attempt {attempt+1} exception: {str(e)}")
-
-            time.sleep(random.uniform(0.5, 1.5))
+        """Helper method to handle GET requests with the shared retry policy"""
+        response = retry_policy.request(self.client, "GET", url, name=name, params=params)
+        if not 200 <= response.status_code < 300:
+            logging.error(f"{name} failed: {response.status_code} - {response.text}")
@@ -1,16 +1,40 @@
-from locust import HttpUser, task, between
-import random
+from locust import task
 
-# --- Users ---
-HR_FL_USERS = [{"usr": "emp23@erp.in", "pwd": "Agnikul_1"}]
+from common.pacing import user_wait_time
+from common.params import param_space
+from common.session_pool import SessionPoolMixin
+from common.feeder import data_pool
+from common.teardown import created, run_tag
+from common.users import BaseHttpUser
 
-class HRUser(HttpUser):
-    wait_time = between(1, 3)
+# --- Users ---
+HR_FL_USERS = data_pool("hr_fl.HR_FL_USERS", [{"usr": "emp23@erp.in", "pwd": "Agnikul_1"}])
+
+# --- Parameter spaces (page depth, limit, search term, date window) ---
+GET_DATA = "/api/method/core.factory.api.get_data"
+DEPARTMENTS = param_space("hr_fl.list_depts", "/api/method/hr_operations.v2.addon.list_depts",
+                          default="query=&page=1", limits=None)
+ATTENDANCE = param_space("hr_fl.attendance_stats", "/api/method/hr_operations.v2.timeline.attendance_stats",
+                         default="from_date=2025-09-01&to_date=2025-09-30&page=1&limit=20&query=", window=True)
+ONBOARDING_ASSIGNMENTS = param_space("hr_fl.ls_assignments.onboarding", f"{GET_DATA}?key=ls_assignments&assignment_type=Onboarding")
+DEBOARDING_ASSIGNMENTS = param_space("hr_fl.ls_assignments.deboarding", f"{GET_DATA}?key=ls_assignments&assignment_type=Deboarding")
+EMPLOYEES = param_space("hr_fl.ls_employees", f"{GET_DATA}?key=ls_employees")
+ONBOARDING_REPORTS = param_space("hr_fl.ls_reports.onboarding", f"{GET_DATA}?key=ls_reports&assignment_type=Onboarding")
+DEBOARDING_REPORTS = param_space("hr_fl.ls_reports.deboarding", f"{GET_DATA}?key=ls_reports&assignment_type=Deboarding")
+NOTEBOOK = param_space("hr_fl.nb_stats", "/api/method/hr_operations.v2.addon.nb_stats")
+NOTEBOOK_LOGS = param_space("hr_fl.nb_stats.logs", "/api/method/hr_operations.v2.addon.nb_stats?logs=log")
+
+class HRUser(SessionPoolMixin, BaseHttpUser):
+    wait_time = user_wait_time(1, 3)
     host = "http://14.99.126.171"
 
     def on_start(self):
-        creds = random.choice(HR_FL_USERS)
-        self.client.post("/api/method/login", json=creds, name="emp23 - Login")
+        creds = HR_FL_USERS.next(self)
+        self.login_from_pool(creds)
+
+    def get_params(self, space):
+        url, name = space.draw()
+        return self.client.get(url, name=name)
 
     @task(1)
     def get_logged_user(self):
@@ -30,22 +54,22 @@ class HRUser(HttpUser):
 
     @task(1)
     def department_directory(self):
-        self.client.get("/api/method/hr_operations.v2.addon.list_depts?query=&page=1")
+        self.get_params(DEPARTMENTS)
 
     @task(1)
     def attendance(self):
-        self.client.get("/api/method/hr_operations.v2.timeline.attendance_stats?from_date=2025-09-01&to_date=2025-09-30&page=1&limit=20&query=")
+        self.get_params(ATTENDANCE)
 
     @task(1)
     def assignments_list(self):
-        self.client.get("/api/method/core.factory.api.get_data?key=ls_assignments&page=1&limit=20&query=&assignment_type=Onboarding")
-        self.client.get("/api/method/core.factory.api.get_data?key=ls_assignments&page=1&limit=20&query=&assignment_type=Deboarding")
+        self.get_params(ONBOARDING_ASSIGNMENTS)
+        self.get_params(DEBOARDING_ASSIGNMENTS)
 
     @task(1)
     def assignments_post(self):
         payload = {
             "key": "assignments",
-            "full_name": "Shanmugavel",
+            "full_name": run_tag("Shanmugavel"),
             "designation": "Senior Associate",
             "assigned_to": "emp37@erp.in",
             "assignment_type": "Onboarding",
@@ -53,7 +77,9 @@ class HRUser(HttpUser):
             "due_date": "2025-09-24",
             "status": "In-progress"
         }
-        self.client.post("/api/method/core.factory.api.post_data", json=payload)
+        resp = self.client.post("/api/method/core.factory.api.post_data", json=payload, headers=self.session_headers)
+        if resp.status_code == 200:
+            created("assignment", resp)
         
 
     @task(1)
@@ -66,15 +92,15 @@ class HRUser(HttpUser):
 
     @task(1)
     def employee_list(self):
-        self.client.get("/api/method/core.factory.api.get_data?key=ls_employees&page=1&limit=20&query=")
+        self.get_params(EMPLOYEES)
 
     @task(1)
     def reports_onboarding(self):
-        self.client.get("/api/method/core.factory.api.get_data?key=ls_reports&page=1&limit=20&query=&assignment_type=Onboarding")
+        self.get_params(ONBOARDING_REPORTS)
 
     @task(1)
     def reports_deboarding(self):
-        self.client.get("/api/method/core.factory.api.get_data?key=ls_reports&page=1&limit=20&query=&assignment_type=Deboarding")
+        self.get_params(DEBOARDING_REPORTS)
 
     @task(1)
     def holiday_calendar(self):
@@ -82,8 +108,8 @@ class HRUser(HttpUser):
 
     @task(1)
     def notebook(self):
-        self.client.get("/api/method/hr_operations.v2.addon.nb_stats?page=1&limit=20&query=")
+        self.get_params(NOTEBOOK)
 
     @task(1)
     def notebook_logs(self):
-        self.client.get("/api/method/hr_operations.v2.addon.nb_stats?logs=log&page=1&limit=20&query=")
+        self.get_params(NOTEBOOK_LOGS)
@@ -1,10 +1,16 @@
-from locust import HttpUser, task, between
-import random
+from locust import task
+
+from common.naming import tags
+from common.pacing import user_wait_time
+from common.params import param_space
+from common.session_pool import SessionPoolMixin
+from common.feeder import data_pool
+from common.users import BaseHttpUser
 
 # --- Users per role ---
-FL_USERS = [{"usr": "emp23@erp.in", "pwd": "Agnikul_1"}]
-SA_USERS = [{"usr": "emp1@erp.in", "pwd": "Agnikul_1"}]
-FU_USERS = [{"usr": "emp73@erp.in", "pwd": "Agnikul_1"}]
+FL_USERS = data_pool("assignments.FL_USERS", [{"usr": "emp23@erp.in", "pwd": "Agnikul_1"}])
+SA_USERS = data_pool("assignments.SA_USERS", [{"usr": "emp1@erp.in", "pwd": "Agnikul_1"}])
+FU_USERS = data_pool("assignments.FU_USERS", [{"usr": "emp73@erp.in", "pwd": "Agnikul_1"}])
 
 # --- Map email to role ---
 USER_ROLE_MAP: dict[str, str] = {
@@ -13,16 +19,26 @@ USER_ROLE_MAP: dict[str, str] = {
     "emp73@erp.in": " (FU) "
 }
 
-class BaseUser(HttpUser):
+# --- Parameter spaces (page depth, limit) ---
+ASSIGNMENTS_URL = "/api/method/core.factory.api.get_data?key=ls_assignments"
+ONBOARDING_ASSIGNMENTS = param_space("assignments.onboarding", ASSIGNMENTS_URL, default="page=1&limit=20",
+                                     search=False, label="Onboarding Assignments")
+DEBOARDING_ASSIGNMENTS = param_space("assignments.deboarding", ASSIGNMENTS_URL, default="page=1&limit=20",
+                                     search=False, label="Deboarding Assignments")
+
+
+class BaseUser(SessionPoolMixin, BaseHttpUser):
     abstract = True
-    wait_time = between(1, 3)
+    wait_time = user_wait_time(1, 3)
     host = "http://14.99.126.171"
+    user_id = None
+    user_role = ""
 
     def on_start(self):
-        creds = random.choice(self.user_pool)
+        creds = self.user_pool.next(self)
 
-        # Login
-        self.client.post("/api/method/login", json=creds, name=f"{creds['usr']} - Login")
+        # Login (shared per process through the session pool)
+        self.login_from_pool(creds)
 
         # Get logged-in user ID
         with self.client.get("/api/method/frappe.auth.get_logged_user", catch_response=True) as resp:
@@ -35,6 +51,10 @@ class BaseUser(HttpUser):
                 self.user_role = USER_ROLE_MAP.get(creds['usr'], "Unknown")
                 resp.failure("Failed to fetch user_id")
 
+    def context(self):
+        # User and role are tags on each request, not part of the stats name.
+        return {**super().context(), **tags(user=self.user_id, role=self.user_role.strip(" ()"))}
+
 
 # --- Functional Lead ---
 class FLUser(BaseUser):
@@ -42,17 +62,13 @@ class FLUser(BaseUser):
 
     @task
     def onboarding_assignments(self):
-        self.client.get(
-            "/api/method/core.factory.api.get_data?key=ls_assignments&page=1&limit=20",
-            name=f"{self.user_id} {self.user_role} - Onboarding Assignments"
-        )
+        url, name = ONBOARDING_ASSIGNMENTS.draw()
+        self.client.get(url, name=name)
 
     @task
     def deboarding_assignments(self):
-        self.client.get(
-            "/api/method/core.factory.api.get_data?key=ls_assignments&page=1&limit=20",
-            name=f"{self.user_id} {self.user_role} - Deboarding Assignments"
-        )
+        url, name = DEBOARDING_ASSIGNMENTS.draw()
+        self.client.get(url, name=name)
 
 
 # --- Super Admin ---
@@ -61,17 +77,13 @@ class SAUser(BaseUser):
 
     @task
     def onboarding_assignments(self):
-        self.client.get(
-            "/api/method/core.factory.api.get_data?key=ls_assignments&page=1&limit=20",
-            name=f"{self.user_id} {self.user_role} - Onboarding Assignments"
-        )
+        url, name = ONBOARDING_ASSIGNMENTS.draw()
+        self.client.get(url, name=name)
 
     @task
     def deboarding_assignments(self):
-        self.client.get(
-            "/api/method/core.factory.api.get_data?key=ls_assignments&page=1&limit=20",
-            name=f"{self.user_id} {self.user_role} - Deboarding Assignments"
-        )
+        url, name = DEBOARDING_ASSIGNMENTS.draw()
+        self.client.get(url, name=name)
 
 
 # --- Functional User ---
@@ -80,14 +92,10 @@ class FUUser(BaseUser):
 
     @task
     def onboarding_assignments(self):
-        self.client.get(
-            "/api/method/core.factory.api.get_data?key=ls_assignments&page=1&limit=20",
-            name=f"{self.user_id} {self.user_role} - Onboarding Assignments"
-        )
+        url, name = ONBOARDING_ASSIGNMENTS.draw()
+        self.client.get(url, name=name)
 
     @task
     def deboarding_assignments(self):
-        self.client.get(
-            "/api/method/core.factory.api.get_data?key=ls_assignments&page=1&limit=20",
-            name=f"{self.user_id} {self.user_role} - Deboarding Assignments"
-        )
+        url, name = DEBOARDING_ASSIGNMENTS.draw()
+        self.client.get(url, name=name)
@@ -0,0 +1,162 @@
+"""Requests/sec per CPU core for the requests and fast Locust clients.
+
+Starts a minimal keep-alive stub server in its own process, then runs the
+same GET/POST mix once per LOCUST_CLIENT mode in a fresh Locust process and
+reports how many requests each mode pushes per second of generator CPU.
+
+    python benchmarks/client_modes.py --users 50 --duration 15
+
+Results are printed and written to results/client-modes-benchmark.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), "results")
+MODES = ("requests", "fast")
+
+STUB_BODY = json.dumps({"message": {"data": [{"name": f"REC-{i}"} for i in range(20)]}}).encode()
+STUB_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+    b"Set-Cookie: sid=benchmark; Path=/\r\n"
+    + f"Content-Length: {len(STUB_BODY)}\r\n\r\n".encode()
+    + STUB_BODY
+)
+
+
+# ---------------- STUB SERVER ---------------- #
+async def _handle(reader, writer):
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line[:15].lower() == b"content-length:":
+                    length = int(line[15:])
+            if length:
+                await reader.readexactly(length)
+            writer.write(STUB_RESPONSE)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def run_stub(port):
+    async def main():
+        server = await asyncio.start_server(_handle, "127.0.0.1", port, backlog=1024)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+# ---------------- LOCUST RUN (one mode per process) ---------------- #
+def run_mode(port, users, duration):
+    sys.path.insert(0, SCRIPTS_DIR)
+    import gevent
+    from locust import constant, task
+    from locust.env import Environment
+
+    from common.users import CLIENT_MODE, BaseHttpUser
+
+    class BenchUser(BaseHttpUser):
+        host = f"http://127.0.0.1:{port}"
+        wait_time = constant(0)
+
+        @task(3)
+        def get_with_params(self):
+            with self.client.get(
+                "/api/method/core.factory.api.get_data",
+                params={"key": "ls_employees", "page": 1, "limit": 20, "query": ""},
+                name="get_data",
+                timeout=10,
+                catch_response=True,
+            ) as resp:
+                if resp.status_code == 200 and "message" in resp.json():
+                    resp.success()
+                else:
+                    resp.failure(f"HTTP {resp.status_code}")
+
+        @task(1)
+        def post_json(self):
+            self.client.post("/api/method/core.factory.api.post_data", json={"key": "assignments"}, name="post_data")
+
+    env = Environment(user_classes=[BenchUser])
+    runner = env.create_local_runner()
+    runner.start(users, spawn_rate=users)
+    gevent.sleep(2)  # let every user connect before measuring
+
+    env.stats.reset_all()
+    cpu_start = sum(os.times()[:2])
+    wall_start = time.perf_counter()
+    gevent.sleep(duration)
+    cpu = sum(os.times()[:2]) - cpu_start
+    wall = time.perf_counter() - wall_start
+    total = env.stats.total
+    requests, failures = total.num_requests, total.num_failures
+    runner.quit()
+
+    print(json.dumps({
+        "mode": CLIENT_MODE,
+        "users": users,
+        "requests": requests,
+        "failures": failures,
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "rps": round(requests / wall, 1),
+        "rps_per_core": round(requests / cpu, 1) if cpu else None,
+        "cpu_us_per_request": round(cpu * 1e6 / requests, 1) if requests else None,
+    }))
+
+
+# ---------------- DRIVER ---------------- #
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=15.0, help="measured seconds per mode")
+    parser.add_argument("--port", type=int, default=18089)
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "client-modes-benchmark.json"))
+    parser.add_argument("--stub", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stub:
+        return run_stub(args.port)
+    if args.mode:
+        return run_mode(args.port, args.users, args.duration)
+
+    stub = subprocess.Popen([sys.executable, __file__, "--stub", "--port", str(args.port)])
+    results = []
+    try:
+        time.sleep(1)
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--port", str(args.port),
+                 "--users", str(args.users), "--duration", str(args.duration)],
+                env={**os.environ, "LOCUST_CLIENT": mode},
+                capture_output=True, text=True, check=True,
+            )
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    print(f"{'mode':<10}{'users':>7}{'rps':>10}{'rps/core':>11}{'cpu us/req':>12}{'failures':>10}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['users']:>7}{r['rps']:>10}{r['rps_per_core']:>11}{r['cpu_us_per_request']:>12}{r['failures']:>10}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"generatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "results": results}, f, indent=2)
+        f.write("\n")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
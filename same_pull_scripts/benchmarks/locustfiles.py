@@ -0,0 +1,215 @@
+"""Generator self-benchmark: max RPS, CPU per request and RSS per user for every locustfile.
+
+Starts the local Frappe stub (stub/frappe_stub.py, no latency, no errors),
+then runs each locustfile in its own Locust process with NO_THINK_TIME=true
+at increasing user counts. Each step records:
+
+- rps: requests/sec over the measured window
+- cpu_us_per_request: generator CPU (user + system) per request
+- cpu_utilisation: generator CPU seconds per wall second (1.0 = one core busy)
+- rss_kb_per_user: resident memory growth since the previous step, divided
+  by the users it added (the first step counts from after the locustfile
+  was imported and init fired)
+
+    python benchmarks/locustfiles.py --users 10,50,100 --duration 10
+    python benchmarks/locustfiles.py --update-baseline        # accept current numbers
+    python benchmarks/locustfiles.py --max-regression 15      # CI gate
+
+Results go to results/generator-benchmark.json. When a baseline exists, the
+run fails (exit code 1) if any script's max RPS drops, or its CPU per request
+at that step rises, by more than --max-regression percent. The stub shares
+the machine's CPUs, so compare numbers from the same host only.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), "results")
+STUB = os.path.join(SCRIPTS_DIR, "stub", "frappe_stub.py")
+SKIP = {"scenario_shape.py", "capacity_shape.py"}  # shapes only, no users
+
+
+def discover_locustfiles():
+    return sorted(
+        name for name in os.listdir(SCRIPTS_DIR)
+        if name.endswith(".py") and name not in SKIP and not name.startswith("_")
+    )
+
+
+def rss_kb():
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+# ---------------- LOCUST RUN (one locustfile per process) ---------------- #
+def run_locustfile(locustfile, port, steps, warmup, duration):
+    import gevent
+    from locust import events
+    from locust.env import Environment
+    from locust.util.load_locustfile import load_locustfile
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    user_classes, _ = load_locustfile(os.path.join(SCRIPTS_DIR, locustfile))
+    env = Environment(user_classes=list(user_classes.values()), host=f"http://127.0.0.1:{port}", events=events)
+    runner = env.create_local_runner()
+    env.events.init.fire(environment=env, runner=runner, web_ui=None)
+    rss_before, users_before = rss_kb(), 0  # module imports and init listeners are not per-user memory
+
+    results = []
+    for users in steps:
+        runner.start(users, spawn_rate=users)
+        gevent.sleep(warmup)  # spawn, log in and reach a steady state
+        env.stats.reset_all()
+        cpu_start = sum(os.times()[:2])
+        wall_start = time.perf_counter()
+        gevent.sleep(duration)
+        cpu = sum(os.times()[:2]) - cpu_start
+        wall = time.perf_counter() - wall_start
+        total = env.stats.total
+        requests, failures = total.num_requests, total.num_failures
+        rss = rss_kb()
+        results.append({
+            "users": users,
+            "requests": requests,
+            "failures": failures,
+            "rps": round(requests / wall, 1),
+            "cpu_utilisation": round(cpu / wall, 3),
+            "cpu_us_per_request": round(cpu * 1e6 / requests, 1) if requests else None,
+            "rss_kb_per_user": round((rss - rss_before) / (users - users_before), 1) if users > users_before else None,
+        })
+        rss_before, users_before = rss, users
+    runner.quit()
+    env.events.quitting.fire(environment=env, reverse=True)
+    print(json.dumps(results))
+
+
+# ---------------- REGRESSION GATE ---------------- #
+def summarize(steps):
+    """The step with the highest RPS, which is what the gate compares."""
+    best = max(steps, key=lambda step: step["rps"])
+    return {"max_rps": best["rps"], "at_users": best["users"], "cpu_us_per_request": best["cpu_us_per_request"]}
+
+
+def compare(current, baseline, max_regression):
+    """Return a list of regression messages (empty when within tolerance)."""
+    problems = []
+    limit = max_regression / 100
+    for script, result in current.items():
+        before = baseline.get(script)
+        if not before or not before.get("summary") or not result.get("summary"):  # skip {"error": ...} records
+            continue
+        now, then = result["summary"], before["summary"]
+        if then["max_rps"] and now["max_rps"] < then["max_rps"] * (1 - limit):
+            problems.append(f"{script}: max RPS {then['max_rps']} -> {now['max_rps']:.1f}")
+        if then["cpu_us_per_request"] and now["cpu_us_per_request"] and \
+                now["cpu_us_per_request"] > then["cpu_us_per_request"] * (1 + limit):
+            problems.append(
+                f"{script}: CPU/request {then['cpu_us_per_request']} us -> {now['cpu_us_per_request']:.1f} us"
+            )
+    return problems
+
+
+# ---------------- DRIVER ---------------- #
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scripts", help="comma-separated locustfiles (default: all in same_pull_scripts)")
+    parser.add_argument("--users", default="10,50,100,200", help="comma-separated user counts per step")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds before each measured window")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per step")
+    parser.add_argument("--port", type=int, default=18090)
+    parser.add_argument("--stub-workers", type=int, default=1)
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "generator-benchmark.json"))
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "generator-benchmark.baseline.json"))
+    parser.add_argument("--max-regression", type=float, default=10.0, help="allowed regression in percent")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    steps = [int(users) for users in args.users.split(",") if users.strip()]
+    if args.child:
+        return run_locustfile(args.child, args.port, steps, args.warmup, args.duration)
+
+    scripts = args.scripts.split(",") if args.scripts else discover_locustfiles()
+    stub = subprocess.Popen(
+        [sys.executable, STUB, "--port", str(args.port), "--workers", str(args.stub_workers),
+         "--no-latency", "--no-errors"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    results = {}
+    try:
+        time.sleep(1)
+        with tempfile.TemporaryDirectory() as workdir:  # every file the scripts write lands here, not in results/
+            child_env = {
+                **os.environ, "NO_THINK_TIME": "true", "HDR_OUTPUT": os.path.join(workdir, "hdr.json"),
+                "SLA_ABORT_AFTER": "0", "SLA_JUNIT_OUTPUT": os.path.join(workdir, "junit.xml"),
+                "REQUEST_PHASES_OUTPUT": os.path.join(workdir, "request-phases.csv"),
+                "RAW_SAMPLES_DIR": os.path.join(workdir, "samples"),
+                "SCALING_SAMPLES_OUTPUT": os.path.join(workdir, "scaling-samples.csv"),
+                "SCALING_REPORT_OUTPUT": os.path.join(workdir, "scaling-report.md"),
+                "CAPACITY_OUTPUT_PREFIX": os.path.join(workdir, "capacity"),
+                "MIXED_APPS_OUTPUT": os.path.join(workdir, "app-stats.csv"),
+                "TEARDOWN": "false", "TEARDOWN_DIR": os.path.join(workdir, "teardown"),
+            }
+            for script in scripts:
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", script, "--port", str(args.port),
+                     "--users", args.users, "--warmup", str(args.warmup), "--duration", str(args.duration)],
+                    env=child_env, cwd=workdir, capture_output=True, text=True,
+                )
+                if out.returncode != 0:
+                    print(f"{script}: benchmark failed\n{out.stderr[-2000:]}", file=sys.stderr)
+                    results[script] = {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "failed"}
+                    continue
+                steps_result = json.loads(out.stdout.strip().splitlines()[-1])
+                results[script] = {"steps": steps_result, "summary": summarize(steps_result)}
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    print(f"{'script':<28}{'users':>7}{'rps':>10}{'cpu us/req':>12}{'cpu util':>10}{'rss kb/user':>13}{'failures':>10}")
+    for script, result in results.items():
+        for step in result.get("steps", []):
+            print(f"{script:<28}{step['users']:>7}{step['rps']:>10}{str(step['cpu_us_per_request']):>12}"
+                  f"{step['cpu_utilisation']:>10}{step['rss_kb_per_user']:>13}{step['failures']:>10}")
+
+    document = {"generatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "results": results}
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+    print(f"Wrote {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    problems = compare(results, baseline, args.max_regression)
+    failed = [script for script, result in results.items() if "error" in result]
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    for script in failed:
+        print(f"FAILED {script}")
+    if problems or failed:
+        return 1
+    print(f"No regression above {args.max_regression:g}% against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""Load shape that searches for the highest user count that meets the SLA.
+
+Combine it with any script in this folder:
+
+    CAPACITY_MAX_USERS=800 locust -f test_payroll.py,capacity_shape.py --headless
+
+See common/capacity.py for the search and its settings.
+"""
+from common.capacity import CapacitySearchShape  # noqa: F401
@@ -0,0 +1,5 @@
+"""Shared helpers for the Locust scripts in same_pull_scripts.
+
+Locust puts the locustfile's directory on sys.path, so scripts import these
+modules as ``from common.<module> import ...``.
+"""
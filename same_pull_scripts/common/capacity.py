@@ -0,0 +1,220 @@
+"""Closed-loop capacity search: the highest user count that still meets the SLA.
+
+The ``capacity`` TEST_TYPE steps through fixed user counts and leaves the
+knee to whoever reads the graphs. ``CapacitySearchShape`` finds it itself.
+Each level is a step-and-hold:
+
+1. ramp to the level at CAPACITY_SPAWN_RATE users/sec;
+2. let it settle for CAPACITY_SETTLE (queues drain, caches warm up);
+3. measure for CAPACITY_HOLD from the runner's live stats: requests/sec,
+   p50/p95/p99 and the failure rate of just this window;
+4. pass when p95 < SLA_HTTP_REQ_DURATION_P95_MS and the failure rate <
+   SLA_ERROR_RATE (common/sla.py, the k6 thresholds).
+
+The search starts at CAPACITY_START_USERS and adds CAPACITY_STEP_USERS per
+passing level until a level fails or CAPACITY_MAX_USERS passes. Then it
+bisects between the last passing and the first failing level until they are
+at most CAPACITY_RESOLUTION users apart, and stops the run.
+
+At the end it prints the knee (highest passing level), the throughput there
+and the throughput ceiling (highest requests/sec of any level), and writes
+the curve to results/capacity-<time>-curve.csv plus a summary to
+results/capacity-<time>-report.md (CAPACITY_OUTPUT_PREFIX replaces
+results/capacity-<time>). The exit code is 1 only when even the first
+level fails.
+
+The search overloads the system on purpose, so it turns off the SLA
+evaluator's early abort and its exit code. The evaluator still writes its
+JUnit report for the whole run, which fails by design once a level is past
+the knee.
+"""
+import csv
+import os
+import time
+
+from locust import LoadTestShape
+from locust.stats import calculate_response_time_percentile
+
+from common import sla
+from common.shapes import parse_duration
+
+# ---------------- CONFIG ---------------- #
+START_USERS = int(os.getenv("CAPACITY_START_USERS", "50"))
+STEP_USERS = int(os.getenv("CAPACITY_STEP_USERS", "50"))
+MAX_USERS = int(os.getenv("CAPACITY_MAX_USERS", "1000"))
+RESOLUTION = int(os.getenv("CAPACITY_RESOLUTION", "10"))  # users between the knee and the first failing level
+SPAWN_RATE = float(os.getenv("CAPACITY_SPAWN_RATE", "10"))  # users/sec
+SETTLE = parse_duration(os.getenv("CAPACITY_SETTLE", "30s"))
+HOLD = parse_duration(os.getenv("CAPACITY_HOLD", "2m"))
+MIN_REQUESTS = int(os.getenv("CAPACITY_MIN_REQUESTS", "100"))  # per hold; fewer = hold is extended
+P95_MS = sla.HTTP_REQ_DURATION_P95_MS
+ERROR_RATE = sla.ERROR_RATE
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+OUTPUT_PREFIX = os.getenv("CAPACITY_OUTPUT_PREFIX") or os.path.join(
+    REPO_ROOT, "results", time.strftime("capacity-%Y%m%dT%H%M%S")
+)
+CURVE_COLUMNS = ("users", "requests", "rps", "p50_ms", "p95_ms", "p99_ms", "failure_rate", "passed")
+
+
+class Level:
+    """Measurements of one hold."""
+
+    __slots__ = ("users", "requests", "rps", "p50", "p95", "p99", "failure_rate", "passed")
+
+    def __init__(self, users, before, after, seconds):
+        self.users = users
+        self.requests = after.num_requests - before.num_requests
+        failures = after.num_failures - before.num_failures
+        response_times = {
+            bucket: count - before.response_times.get(bucket, 0)
+            for bucket, count in after.response_times.items()
+            if count > before.response_times.get(bucket, 0)
+        }
+        total = sum(response_times.values())
+        self.rps = self.requests / seconds if seconds else 0.0
+        self.p50, self.p95, self.p99 = (
+            calculate_response_time_percentile(response_times, total, percent) if total else 0
+            for percent in (0.5, 0.95, 0.99)
+        )
+        self.failure_rate = failures / self.requests if self.requests else 0.0
+        self.passed = self.requests > 0 and self.p95 < P95_MS and self.failure_rate < ERROR_RATE
+
+    def row(self):
+        return [self.users, self.requests, round(self.rps, 2), self.p50, self.p95, self.p99,
+                round(self.failure_rate, 5), self.passed]
+
+    def describe(self):
+        return (f"{self.users} users: {self.rps:.1f} req/s, p95 {self.p95} ms, "
+                f"failures {self.failure_rate:.2%} -> {'pass' if self.passed else 'FAIL'}")
+
+
+class _Snapshot:
+    """Copy of the cumulative counters of a stats entry."""
+
+    __slots__ = ("num_requests", "num_failures", "response_times")
+
+    def __init__(self, entry):
+        self.num_requests = entry.num_requests
+        self.num_failures = entry.num_failures
+        self.response_times = dict(entry.response_times)
+
+
+class CapacitySearchShape(LoadTestShape):
+    """Step-and-hold search for the knee; see the module docstring.
+
+    Activate it next to any script with ``locust -f <script>.py,capacity_shape.py``.
+    """
+
+    def __init__(self):
+        super().__init__()
+        if sla.ENABLED:
+            sla.evaluator.abort_after = 0
+            sla.evaluator.sets_exit_code = False
+        self.levels = []  # measured Levels, in search order
+        self.passing = None  # highest passing user count
+        self.failing = None  # lowest failing user count
+        self.target = START_USERS
+        self.phase = "ramp"
+        self.phase_started = 0.0
+        self.snapshot = None
+        self.done = False
+
+    def tick(self):
+        if self.done:
+            return None
+        now = self.get_run_time()
+        if self.phase == "ramp":
+            # Distributed user counts arrive with the heartbeats; give up waiting after a generous margin.
+            ramp_time = abs(self.target - self.get_current_user_count()) / SPAWN_RATE
+            if self.get_current_user_count() == self.target or now - self.phase_started > ramp_time + 30:
+                self._enter("settle", now)
+        elif self.phase == "settle" and now - self.phase_started >= SETTLE:
+            self.snapshot = _Snapshot(self.runner.stats.total)
+            self._enter("hold", now)
+        elif self.phase == "hold" and now - self.phase_started >= HOLD:
+            total = self.runner.stats.total
+            if total.num_requests - self.snapshot.num_requests < MIN_REQUESTS and now - self.phase_started < 3 * HOLD:
+                return self.target, SPAWN_RATE
+            self._finish_level(Level(self.target, self.snapshot, _Snapshot(total), now - self.phase_started), now)
+            if self.done:
+                return None
+        return self.target, SPAWN_RATE
+
+    def _enter(self, phase, now):
+        self.phase = phase
+        self.phase_started = now
+
+    def _finish_level(self, level, now):
+        self.levels.append(level)
+        print(f"[CAPACITY] {level.describe()}")
+        if level.passed:
+            self.passing = max(self.passing or 0, level.users)
+        else:
+            self.failing = min(self.failing or level.users, level.users)
+
+        if self.failing is None:
+            if self.target >= MAX_USERS:
+                self._stop()
+                return
+            self.target = min(MAX_USERS, self.target + STEP_USERS)
+        else:
+            low = self.passing or 0
+            if self.failing - low <= RESOLUTION:
+                self._stop()
+                return
+            self.target = (low + self.failing) // 2 or 1
+            if self.target == low:
+                self._stop()
+                return
+        self._enter("ramp", now)
+
+    def _stop(self):
+        self.done = True
+        write_results(self.levels, self.passing, self.failing)
+        if self.passing is None and self.runner is not None:
+            self.runner.environment.process_exit_code = 1
+
+
+def write_results(levels, passing, failing, prefix=OUTPUT_PREFIX):
+    """Print the knee and write the curve CSV and the Markdown summary."""
+    curve = sorted(levels, key=lambda level: level.users)
+    knee = next((level for level in reversed(curve) if level.users == passing and level.passed), None)
+    ceiling = max(curve, key=lambda level: level.rps, default=None)
+    if knee is None:
+        summary = f"No level met the SLA; the lowest one ({curve[0].users} users) already failed."
+    elif failing is None:
+        summary = (f"All levels up to CAPACITY_MAX_USERS passed; the knee is above {knee.users} users "
+                   f"({knee.rps:.1f} req/s at p95 {knee.p95} ms).")
+    else:
+        summary = (f"Knee: {knee.users} users ({knee.rps:.1f} req/s at p95 {knee.p95} ms); "
+                   f"{failing} users fail the SLA.")
+    if ceiling is not None:
+        summary += f" Throughput ceiling: {ceiling.rps:.1f} req/s at {ceiling.users} users."
+    print(f"[CAPACITY] {summary}")
+
+    os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+    curve_path = f"{prefix}-curve.csv"
+    with open(curve_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CURVE_COLUMNS)
+        writer.writerows(level.row() for level in curve)
+
+    lines = [
+        "# Capacity search",
+        "",
+        f"Generated {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())}. "
+        f"SLA: p95 < {P95_MS:g} ms and failure rate < {ERROR_RATE:g}. "
+        f"Each level settled for {SETTLE:g}s and was measured for {HOLD:g}s.",
+        "",
+        summary,
+        "",
+        "| Users | Requests | req/s | p50 ms | p95 ms | p99 ms | Failures | SLA |",
+        "|---:|---:|---:|---:|---:|---:|---:|---|",
+    ]
+    for level in curve:
+        lines.append(f"| {level.users} | {level.requests} | {level.rps:.1f} | {level.p50} | {level.p95} "
+                     f"| {level.p99} | {level.failure_rate:.2%} | {'ok' if level.passed else 'FAIL'} |")
+    report_path = f"{prefix}-report.md"
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"[CAPACITY] Curve written to {curve_path}, report to {report_path}")
@@ -0,0 +1,221 @@
+"""Compile the generated k6 endpoint catalog into a Locust user class.
+
+Reads the same inputs as src/workflows/recruitment.js:
+
+- data/generated/recruitment.endpoints.json (endpoint catalog)
+- data/test-data/recruitment.params.csv (weighted parameter rows)
+- data/test-data/workflow.mix.csv (workflow weights and think times)
+
+Every URL, query string, JSON body and validation rule is built once at import
+time, so a task only picks a prebuilt request and sends it.
+"""
+import csv
+import json
+import os
+import random
+from itertools import accumulate
+from urllib.parse import parse_qsl, quote, urlencode
+
+from common.pacing import think, user_wait_time
+from common.session_pool import SessionPoolMixin
+from common.users import BaseHttpUser
+
+# ---------------- CONFIG ---------------- #
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CATALOG_FILE = os.getenv("CATALOG_FILE", os.path.join(REPO_ROOT, "data/generated/recruitment.endpoints.json"))
+PARAMS_FILE = os.getenv("CATALOG_PARAMS_FILE", os.path.join(REPO_ROOT, "data/test-data/recruitment.params.csv"))
+WORKFLOW_MIX_FILE = os.getenv("CATALOG_WORKFLOW_MIX_FILE", os.path.join(REPO_ROOT, "data/test-data/workflow.mix.csv"))
+INCLUDE_MUTATIONS = os.getenv("INCLUDE_MUTATIONS", "false").lower() == "true"
+
+# Step lists mirror the workflow handlers in src/workflows/recruitment.js.
+WORKFLOW_STEPS = {
+    "quick_access": [
+        "generic_getapi_get_users_role",
+        "quick_access_dashboardapi_get_fu_pending_count",
+        "quick_access_dashboardapi_get_pending_counts",
+    ],
+    "dashboard_review": [
+        "dashboard_dashboardapi_get_counts",
+        "dashboard_dashboardapi_get_joblist",
+        "dashboard_dashboardapi_candidate_analytic",
+        "dashboard_dashboardapi_application_conv_int",
+        "dashboard_dashboardapi_candidate_source_analytics",
+    ],
+    "job_post_search": [
+        "job_post_getapi_get_jp",
+        "job_post_getapi_get_jobstatus_counts",
+        "job_post_getapi_view_details",
+    ],
+    "assignment_review": [
+        "assignments_getapi_source_candidate",
+        "assignments_getapi_candidate_screening",
+        "assignments_getapi_interview",
+        "assignments_getapi_hired",
+        "assignments_getapi_get_candidate_card_counts",
+    ],
+    "candidate_deep_dive": [
+        "job_post_getapi_get_jp",
+        "recruitment_tracker_getapi_get_teams_summary",
+        "job_post_getapi_view_details",
+    ],
+    "portal_review": [
+        "recruitment_log_job_portal_getapi_referral_candidates",
+        "recruitment_log_inbound_getapi_inbound_candidates",
+    ],
+}
+
+JSON_HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+FRAPPE_EXCEPTION_KEYS = ("exc", "exception", "exc_type", "_server_messages")
+
+
+# ---------------- LOADING ---------------- #
+def load_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            {key.strip(): (value or "").strip() for key, value in row.items()}
+            for row in csv.DictReader(f)
+            if any((value or "").strip() for value in row.values())
+        ]
+
+
+def load_catalog(path=CATALOG_FILE):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["endpoints"]
+
+
+def _weight(row, key="weight"):
+    try:
+        weight = float(row.get(key) or 1)
+    except ValueError:
+        return 1.0
+    return weight if weight > 0 else 1.0
+
+
+# ---------------- COMPILING ---------------- #
+class CompiledEndpoint:
+    """One catalog endpoint with its prebuilt requests and validation rule."""
+
+    __slots__ = ("id", "method", "category", "requests", "cum_weights", "expected_status", "expected_key")
+
+    def __init__(self, endpoint, rows):
+        self.id = endpoint["id"]
+        self.method = endpoint["method"].upper()
+        self.category = endpoint.get("category", "")
+        self.expected_status = frozenset(endpoint.get("expectedStatus") or [200])
+        self.expected_key = endpoint.get("expectedBodyKey") or None
+
+        rows = rows or [{}]
+        self.requests = [self._build(endpoint, row) for row in rows]
+        self.cum_weights = list(accumulate(_weight(row) for row in rows))
+
+    def _build(self, endpoint, row):
+        # Same rules as queryFor/payloadFor in src/core/httpClient.js.
+        allowed = [arg.strip() for arg in endpoint.get("mandatoryArgs", []) + endpoint.get("optionalArgs", [])]
+        if self.method == "GET":
+            query = dict(parse_qsl(endpoint.get("defaultQueryString", ""), keep_blank_values=True))
+            for key in allowed:
+                if key and row.get(key):
+                    query[key] = row[key]
+            query_string = urlencode({k: v for k, v in query.items() if v != ""}, quote_via=quote)
+            url = f"{endpoint['path']}?{query_string}" if query_string else endpoint["path"]
+            return url, None
+
+        payload = {key: row[key] for key in allowed if key and row.get(key)}
+        return endpoint["path"], json.dumps(payload)
+
+    def pick(self):
+        if len(self.requests) == 1:
+            return self.requests[0]
+        return random.choices(self.requests, cum_weights=self.cum_weights)[0]
+
+    def validate(self, response):
+        """Return a failure reason, or None when the response is valid."""
+        # Mirrors validateFrappeResponse in src/core/validators.js.
+        if response.status_code not in self.expected_status:
+            return f"{self.id} unexpected status {response.status_code}"
+        if response.status_code == 204 or not self.expected_key:
+            return None
+        try:
+            body = response.json()
+        except Exception:
+            return f"{self.id} body is not valid JSON"
+        if not isinstance(body, dict) or self.expected_key not in body:
+            return f"{self.id} body has no '{self.expected_key}' key"
+        if any(body.get(key) for key in FRAPPE_EXCEPTION_KEYS) or body.get("_error_message"):
+            return f"{self.id} returned a Frappe exception"
+        return None
+
+
+def compile_endpoints(catalog, param_rows, include_mutations=INCLUDE_MUTATIONS):
+    rows_by_endpoint = {}
+    for row in param_rows:
+        rows_by_endpoint.setdefault(row["endpointId"], []).append(row)
+    return {
+        endpoint["id"]: CompiledEndpoint(endpoint, rows_by_endpoint.get(endpoint["id"]))
+        for endpoint in catalog
+        if include_mutations or endpoint["method"].upper() == "GET"
+    }
+
+
+class CatalogUserMixin:
+    """Request/validation helpers for users built by ``build_user_class``."""
+
+    endpoints = {}
+    credentials = None
+
+    def on_start(self):
+        if self.credentials:
+            self.login_from_pool(self.credentials)
+
+    def call_endpoint(self, endpoint):
+        url, body = endpoint.pick()
+        headers = {**JSON_HEADERS, **self.session_headers} if self.session_headers else JSON_HEADERS
+        with self.client.request(
+            endpoint.method, url, data=body, headers=headers, name=endpoint.id, catch_response=True
+        ) as resp:
+            reason = endpoint.validate(resp)
+            if reason:
+                resp.failure(reason)
+            else:
+                resp.success()
+
+
+def _make_workflow_task(name, steps, think_min, think_max):
+    def workflow(user):
+        for step in steps:
+            user.call_endpoint(step)
+            think(think_min, think_max)
+
+    workflow.__name__ = name
+    return workflow
+
+
+def build_user_class(name="RecruitmentUser", catalog_file=CATALOG_FILE, params_file=PARAMS_FILE,
+                     workflow_mix_file=WORKFLOW_MIX_FILE, include_mutations=INCLUDE_MUTATIONS, **attrs):
+    """Build a user class whose tasks are the weighted workflows in the mix file."""
+    endpoints = compile_endpoints(load_catalog(catalog_file), load_csv(params_file), include_mutations)
+
+    tasks = {}
+    for row in load_csv(workflow_mix_file):
+        workflow = row["workflow"]
+        if workflow not in WORKFLOW_STEPS:
+            raise ValueError(f'Workflow "{workflow}" is not implemented.')
+        missing = [step for step in WORKFLOW_STEPS[workflow] if step not in endpoints]
+        if missing:
+            raise ValueError(
+                f'Endpoint(s) {", ".join(missing)} for workflow "{workflow}" are not available. '
+                "Check generated catalog or INCLUDE_MUTATIONS."
+            )
+        steps = [endpoints[step] for step in WORKFLOW_STEPS[workflow]]
+        think_min = float(row.get("thinkTimeMinMs") or 0) / 1000
+        think_max = max(think_min, float(row.get("thinkTimeMaxMs") or 0) / 1000)
+        tasks[_make_workflow_task(workflow, steps, think_min, think_max)] = max(1, int(_weight(row)))
+
+    body = {
+        "abstract": False,
+        "tasks": tasks,
+        "wait_time": user_wait_time(1, 3),
+        "endpoints": endpoints,
+        **attrs,
+    }
+    return type(name, (CatalogUserMixin, SessionPoolMixin, BaseHttpUser), body)
@@ -0,0 +1,266 @@
+"""Columnar raw-sample format (Parquet) and offline analysis.
+
+One row per request, in typed columns:
+
+    timestamp_ns  int64       request start, nanoseconds since the epoch
+    endpoint      dictionary  "<METHOD> <name>", as in Locust's stats
+    status        int16       HTTP status, 0 when there was no response
+    latency_us    int64       response time in microseconds
+    bytes         int64       response length
+    user_class    dictionary  Locust user class
+    retries       int8        earlier attempts of the same call (common/retry.py)
+    failed        bool
+    error         dictionary  exception type of a failure, "" otherwise
+
+Files are written by common/samples.py, one row group per flushed buffer.
+The report below scans any number of them in record batches, so memory
+stays bounded by the batch size and the number of distinct endpoints, not
+by the run length. Percentiles come from the same HDR buckets as
+common/hdr.py (3 significant digits):
+
+    python -m common.columnar results/samples/*.parquet                 # percentiles per endpoint
+    python -m common.columnar results/samples/*.parquet --timeline 10   # 10 s throughput timeline
+    python -m common.columnar results/samples/*.parquet --errors        # failures by endpoint/status
+
+The report needs pyarrow and numpy; the sink needs pyarrow only.
+"""
+import argparse
+import time
+from array import array
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional; only needed when RAW_SAMPLES=true or for the report
+    pa = pq = None
+
+from common.hdr import DEFAULT_PERCENTILES, HdrHistogram, bucket_indexes, print_percentiles
+
+# ---------------- SCHEMA ---------------- #
+# (column, array typecode) in file order
+COLUMNS = (
+    ("timestamp_ns", "q"),
+    ("endpoint", "i"),
+    ("status", "h"),
+    ("latency_us", "q"),
+    ("bytes", "q"),
+    ("user_class", "i"),
+    ("retries", "b"),
+    ("failed", "b"),
+    ("error", "i"),
+)
+DICTIONARY_COLUMNS = ("endpoint", "user_class", "error")
+BATCH_ROWS = 1 << 20
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("Raw samples need pyarrow: pip install pyarrow")
+
+
+def _storage_type(typecode):
+    return {"q": pa.int64(), "i": pa.int32(), "h": pa.int16(), "b": pa.int8()}[typecode]
+
+
+def _arrow_type(name, typecode):
+    value_type = _storage_type(typecode)
+    if name in DICTIONARY_COLUMNS:
+        return pa.dictionary(value_type, pa.string())
+    if name == "failed":
+        return pa.bool_()
+    return value_type
+
+
+def schema():
+    require_pyarrow()
+    return pa.schema([pa.field(name, _arrow_type(name, typecode)) for name, typecode in COLUMNS])
+
+
+class SampleBuffer:
+    """Rows of samples in typed arrays, with append-only dictionaries for the string columns."""
+
+    __slots__ = ("columns", "dictionaries", "codes", "started")
+
+    def __init__(self, dictionaries=None, codes=None):
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS}
+        self.dictionaries = dictionaries if dictionaries is not None else {name: [] for name in DICTIONARY_COLUMNS}
+        self.codes = codes if codes is not None else {name: {} for name in DICTIONARY_COLUMNS}
+        self.started = time.time()
+
+    def __len__(self):
+        return len(self.columns["timestamp_ns"])
+
+    def code(self, column, value):
+        codes = self.codes[column]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.dictionaries[column])
+            self.dictionaries[column].append(value)
+        return code
+
+    def append(self, timestamp_ns, endpoint, status, latency_us, length, user_class, retries, failed, error):
+        columns = self.columns
+        columns["timestamp_ns"].append(timestamp_ns)
+        columns["endpoint"].append(self.code("endpoint", endpoint))
+        columns["status"].append(status)
+        columns["latency_us"].append(latency_us)
+        columns["bytes"].append(length)
+        columns["user_class"].append(self.code("user_class", user_class))
+        columns["retries"].append(min(retries, 127))
+        columns["failed"].append(1 if failed else 0)
+        columns["error"].append(self.code("error", error))
+
+    def next_buffer(self):
+        """An empty buffer that keeps the same dictionary codes."""
+        return SampleBuffer(self.dictionaries, self.codes)
+
+    def to_record_batch(self):
+        """Arrow record batch over the typed arrays (no per-value conversion)."""
+        rows = len(self)
+        arrays = []
+        for name, typecode in COLUMNS:
+            values = pa.Array.from_buffers(_storage_type(typecode), rows, [None, pa.py_buffer(self.columns[name])])
+            if name in DICTIONARY_COLUMNS:
+                values = pa.DictionaryArray.from_arrays(values, pa.array(self.dictionaries[name], pa.string()))
+            elif name == "failed":
+                values = values.cast(pa.bool_())
+            arrays.append(values)
+        return pa.RecordBatch.from_arrays(arrays, schema=schema())
+
+
+# ---------------- SCAN ---------------- #
+def iter_batches(paths, columns, batch_rows=BATCH_ROWS):
+    """Yield {column: numpy array} per record batch; dictionary columns come as (codes, values)."""
+    require_pyarrow()
+    import numpy as np
+
+    for path in paths:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=list(columns)):
+            out = {}
+            for name in columns:
+                column = batch.column(name)
+                if name in DICTIONARY_COLUMNS:
+                    if not pa.types.is_dictionary(column.type):
+                        column = column.dictionary_encode()
+                    out[name] = (column.indices.to_numpy(zero_copy_only=False).astype(np.int64),
+                                 column.dictionary.to_pylist())
+                else:
+                    out[name] = column.to_numpy(zero_copy_only=False)
+            yield out
+
+
+def add_grouped(histograms, groups, latency_us):
+    """Record ``latency_us`` into ``histograms[group]`` for each row's group key."""
+    import numpy as np
+
+    if not len(groups):
+        return
+    order = np.argsort(groups, kind="stable")
+    groups, latency_us = groups[order], latency_us[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    minimums = np.minimum.reduceat(latency_us, starts)
+    maximums = np.maximum.reduceat(latency_us, starts)
+    keys, counts = np.unique(
+        np.stack([groups, bucket_indexes(latency_us)], axis=1), axis=0, return_counts=True
+    )
+    for (group, index), count in zip(keys.tolist(), counts.tolist()):
+        histogram = histograms.get(group)
+        if histogram is None:
+            histogram = histograms[group] = HdrHistogram()
+        histogram.counts[index] = histogram.counts.get(index, 0) + count
+        histogram.total += count
+    for group, low, high in zip(groups[starts].tolist(), minimums.tolist(), maximums.tolist()):
+        histogram = histograms[group]
+        histogram.min = low if histogram.min is None else min(histogram.min, low)
+        histogram.max = max(histogram.max, high)
+
+
+def _global_codes(names, lookup):
+    """Map a batch dictionary to stable codes across batches and files."""
+    import numpy as np
+
+    return np.array([lookup.setdefault(name, len(lookup)) for name in names], dtype=np.int64)
+
+
+# ---------------- REPORTS ---------------- #
+def endpoint_histograms(paths):
+    endpoints = {}
+    histograms = {}
+    for batch in iter_batches(paths, ("endpoint", "latency_us")):
+        codes, names = batch["endpoint"]
+        add_grouped(histograms, _global_codes(names, endpoints)[codes], batch["latency_us"])
+    names = {code: name for name, code in endpoints.items()}
+    return {names[code]: histogram for code, histogram in histograms.items()}
+
+
+def timeline(paths, interval):
+    """{interval start (epoch s): (requests, failures, HdrHistogram)}."""
+    import numpy as np
+
+    interval_ns = int(interval * 1e9)
+    histograms = {}
+    failures = {}
+    for batch in iter_batches(paths, ("timestamp_ns", "latency_us", "failed")):
+        slots = batch["timestamp_ns"] // interval_ns
+        add_grouped(histograms, slots, batch["latency_us"])
+        failed_slots, counts = np.unique(slots[batch["failed"]], return_counts=True)
+        for slot, count in zip(failed_slots.tolist(), counts.tolist()):
+            failures[slot] = failures.get(slot, 0) + count
+    return {
+        slot * interval: (histogram.total, failures.get(slot, 0), histogram)
+        for slot, histogram in sorted(histograms.items())
+    }
+
+
+def error_breakdown(paths):
+    """{(endpoint, status, error): count} over failed requests."""
+    import numpy as np
+
+    breakdown = {}
+    for batch in iter_batches(paths, ("endpoint", "status", "error", "failed")):
+        failed = batch["failed"]
+        if not failed.any():
+            continue
+        endpoint_codes, endpoint_names = batch["endpoint"]
+        error_codes, error_names = batch["error"]
+        keys, counts = np.unique(
+            np.stack([endpoint_codes[failed], batch["status"][failed].astype(np.int64), error_codes[failed]], axis=1),
+            axis=0, return_counts=True,
+        )
+        for (endpoint, status, error), count in zip(keys.tolist(), counts.tolist()):
+            key = (endpoint_names[endpoint], status, error_names[error])
+            breakdown[key] = breakdown.get(key, 0) + count
+    return breakdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Percentiles, throughput timelines and errors from raw samples.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--percentiles", default=",".join(str(p) for p in DEFAULT_PERCENTILES))
+    parser.add_argument("--timeline", type=float, metavar="SECONDS", help="throughput timeline at this interval")
+    parser.add_argument("--errors", action="store_true", help="failures by endpoint, status and error")
+    args = parser.parse_args()
+    require_pyarrow()
+
+    if args.timeline:
+        print(f"{'interval start (UTC)':<22}{'requests':>10}{'rps':>10}{'failures':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for start, (requests, failures, hist) in timeline(args.files, args.timeline).items():
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(start))
+            print(f"{stamp:<22}{requests:>10}{requests / args.timeline:>10.1f}{failures:>10}"
+                  + "".join(f"{hist.percentile(p) / 1000:>10.1f}" for p in (50, 95, 99)))
+        return
+
+    if args.errors:
+        breakdown = error_breakdown(args.files)
+        width = max([len("endpoint")] + [len(endpoint) for endpoint, _, _ in breakdown])
+        print(f"{'endpoint':<{width}}{'status':>8}  {'error':<24}{'count':>10}")
+        for (endpoint, status, error), count in sorted(breakdown.items(), key=lambda item: -item[1]):
+            print(f"{endpoint:<{width}}{status:>8}  {error or '-':<24}{count:>10}")
+        return
+
+    percentiles = [float(p) for p in args.percentiles.split(",") if p.strip()]
+    print_percentiles(endpoint_histograms(args.files), percentiles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Process-wide CSV sink that keeps per-request logging off the gevent loop.
+
+Users push rows onto a bounded in-memory queue; a single background OS thread
+drains it, writes batches to disk and rotates the file when it grows too big.
+"""
+import _thread
+import csv
+import os
+import time
+from collections import deque
+
+from locust import events
+
+try:
+    from gevent.monkey import get_original
+except ImportError:  # plain Python (no gevent), e.g. offline tooling
+    get_original = None
+
+# ---------------- CONFIG ---------------- #
+QUEUE_SIZE = int(os.getenv("CSV_SINK_QUEUE_SIZE", "10000"))
+BATCH_SIZE = int(os.getenv("CSV_SINK_BATCH_SIZE", "500"))
+FLUSH_INTERVAL = float(os.getenv("CSV_SINK_FLUSH_INTERVAL", "1.0"))  # seconds
+MAX_BYTES = int(os.getenv("CSV_SINK_MAX_BYTES", str(50 * 1024 * 1024)))
+BACKUP_COUNT = int(os.getenv("CSV_SINK_BACKUPS", "5"))
+FULL_POLICY = os.getenv("CSV_SINK_POLICY", "drop").lower()  # drop | block
+
+# The writer must be a real OS thread even when Locust has monkey-patched
+# _thread/time, otherwise disk writes would still run on the gevent hub.
+if get_original is not None:
+    _start_thread = get_original("_thread", "start_new_thread")
+    _real_sleep = get_original("time", "sleep")
+else:
+    _start_thread = _thread.start_new_thread
+    _real_sleep = time.sleep
+
+_sinks = {}
+
+
+class CsvSink:
+    """Bounded queue + background writer for one CSV file."""
+
+    def __init__(self, path, header, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, max_bytes=MAX_BYTES,
+                 backup_count=BACKUP_COUNT, policy=FULL_POLICY):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Invalid CSV_SINK_POLICY={policy!r}. Must be 'drop' or 'block'.")
+
+        self.path = path
+        self.header = list(header)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.policy = policy
+
+        self.written = 0
+        self.dropped = 0
+
+        # deque append/popleft are atomic, so producers (greenlets) and the
+        # writer thread never need a lock on the hot path.
+        self._queue = deque()
+        self._closed = False
+        self._file = None
+        self._writer = None
+        self._open()
+
+        self._stopped = False
+        _start_thread(self._run, ())
+
+    # ---------------- PRODUCER SIDE ---------------- #
+    def write(self, row):
+        """Queue one row. Returns False if the row was dropped."""
+        if self._closed:
+            self.dropped += 1
+            return False
+
+        while len(self._queue) >= self.queue_size:
+            if self.policy == "drop":
+                self.dropped += 1
+                return False
+            # Under Locust this is gevent's sleep, so only this user waits.
+            time.sleep(0.005)
+
+        self._queue.append(row)
+        return True
+
+    def close(self):
+        """Stop accepting rows, drain the queue and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        deadline = time.time() + max(5.0, self.flush_interval * 5)
+        while not self._stopped and time.time() < deadline:
+            time.sleep(0.01)
+        self._drain()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    # ---------------- WRITER SIDE ---------------- #
+    def _open(self):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, mode="a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if new_file:
+            self._writer.writerow(self.header)
+            self._file.flush()
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{index}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def _drain(self, limit=None):
+        batch = []
+        while self._queue and (limit is None or len(batch) < limit):
+            batch.append(self._queue.popleft())
+        if not batch or self._file is None:
+            return 0
+
+        self._writer.writerows(batch)
+        self._file.flush()
+        self.written += len(batch)
+
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+        return len(batch)
+
+    def _run(self):
+        waited = 0.0
+        tick = min(0.05, self.flush_interval)
+        while not self._closed:
+            if len(self._queue) >= self.batch_size or (self._queue and waited >= self.flush_interval):
+                try:
+                    self._drain(self.batch_size)
+                except Exception as e:
+                    print(f"[CSV SINK ERROR] {self.path}: {e}")
+                waited = 0.0
+                continue
+            _real_sleep(tick)
+            waited += tick
+        self._stopped = True
+
+
+def get_sink(path, header):
+    """Return the per-process sink for ``path``, creating it on first use."""
+    sink = _sinks.get(path)
+    if sink is None:
+        sink = CsvSink(path, header)
+        _sinks[path] = sink
+    return sink
+
+
+@events.quitting.add_listener
+def _close_sinks(environment, **kwargs):
+    for sink in list(_sinks.values()):
+        sink.close()
+        if sink.dropped:
+            print(f"[CSV SINK] {sink.path}: wrote {sink.written} rows, dropped {sink.dropped} rows")
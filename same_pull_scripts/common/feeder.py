@@ -0,0 +1,152 @@
+"""Memory-mapped CSV feeders for large credential and entity files.
+
+``CsvFeeder`` maps the file read-only and builds a line-offset index once
+(4 bytes per row below 4 GB). A record is parsed from its line only when it
+is handed out, so millions of rows cost the index plus the OS page cache,
+which every Locust process on the host shares. Nothing is copied per user.
+
+Records are handed out in one of four orders (``FEEDER_ORDERS``):
+
+- ``unique``: each row at most once per run; then ``PoolExhausted``.
+- ``cyclic``: round-robin, starting over at the end.
+- ``random``: uniform random row.
+- ``sticky``: the first call for a user takes the next row round-robin;
+  later calls for the same user return the same row. Callers pass the
+  user (``pool.next(self)``); sticky without a user raises ``ValueError``.
+
+In master/worker mode worker ``i`` of ``n`` reads rows ``i, i+n, i+2n ...``
+(the shard from common/sharding.py), so workers never share a row. Only the
+index and count travel between processes, never the rows.
+
+Scripts keep their inline records as the default and switch to a file per
+pool through the environment:
+
+    user_pool = data_pool("bharathi.USER_POOL", USER_POOL)
+    # BHARATHI_USER_POOL_FILE=users.csv BHARATHI_USER_POOL_ORDER=random locust -f ...
+
+Rows are single lines: quoted fields must not contain line breaks.
+"""
+import csv
+import itertools
+import mmap
+import os
+import random
+import weakref
+from array import array
+
+from common.sharding import PoolExhausted, current_shard, sharded_pool
+
+# ---------------- CONFIG ---------------- #
+FEEDER_ORDERS = ("unique", "cyclic", "random", "sticky")
+
+_feeders = {}
+
+
+def env_prefix(name):
+    """Environment prefix of a pool: "payroll.PL_USERS" -> "PAYROLL_PL_USERS"."""
+    return name.upper().replace(".", "_").replace("-", "_")
+
+
+class CsvFeeder:
+    def __init__(self, name, path, order="cyclic"):
+        if order not in FEEDER_ORDERS:
+            raise ValueError(f'Invalid order {order!r} for feeder "{name}". Must be one of: {", ".join(FEEDER_ORDERS)}')
+        self.name = name
+        self.path = path
+        self.order = order
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header, self.offsets = self._index()
+        if not len(self.offsets):
+            raise ValueError(f'Feeder "{name}": {path} has no data rows')
+        self._counter = itertools.count()
+        self._sticky = weakref.WeakKeyDictionary()  # user -> shard position
+
+    def _index(self):
+        data = self._map
+        header_end = data.find(b"\n")
+        if header_end < 0:
+            header_end = len(data)
+        header = next(csv.reader([data[:header_end].decode("utf-8-sig").rstrip("\r")]))
+        header = [column.strip() for column in header]
+
+        # Start offset of every non-blank data line.
+        offsets = array("I" if len(data) < 2 ** 32 else "Q")
+        find = data.find
+        size = len(data)
+        position = header_end + 1
+        while position < size:
+            end = find(b"\n", position)
+            if end < 0:
+                end = size
+            if end > position and data[position:end].strip():
+                offsets.append(position)
+            position = end + 1
+        return header, offsets
+
+    def __len__(self):
+        """Rows in this worker's shard."""
+        index, count = current_shard()
+        total = len(self.offsets)
+        if total < count:
+            return 1
+        return (total - index + count - 1) // count
+
+    def row(self, number):
+        """Record at row ``number`` of the whole file (0-based)."""
+        start = self.offsets[number]
+        end = self._map.find(b"\n", start)
+        line = self._map[start:end if end >= 0 else len(self._map)].decode("utf-8").rstrip("\r")
+        values = next(csv.reader([line]))
+        return {column: value.strip() for column, value in zip(self.header, values)}
+
+    def get(self, position):
+        """Record at ``position`` of this worker's shard."""
+        index, count = current_shard()
+        total = len(self.offsets)
+        if total < count:
+            return self.row(index % total)
+        return self.row(index + position * count)
+
+    def next(self, user=None):
+        size = len(self)
+        if self.order == "random":
+            return self.get(random.randrange(size))
+        if self.order == "sticky":
+            if user is None:
+                raise ValueError(f'Feeder "{self.name}" is sticky: call next(user) with the user the row belongs to')
+            position = self._sticky.get(user)
+            if position is None:
+                position = self._sticky[user] = next(self._counter) % size
+            return self.get(position)
+        position = next(self._counter)
+        if position >= size:
+            if self.order == "unique":
+                raise PoolExhausted(f'Feeder "{self.name}" exhausted ({size} rows on this worker)')
+            position %= size
+        return self.get(position)
+
+
+def csv_feeder(name, path, order="cyclic"):
+    """Register (or return the already registered) feeder called ``name``."""
+    feeder = _feeders.get(name)
+    if feeder is None:
+        feeder = _feeders[name] = CsvFeeder(name, path, order)
+    elif (feeder.path, feeder.order) != (path, order):
+        raise ValueError(f'Feeder "{name}" is already registered with {feeder.path} ({feeder.order})')
+    return feeder
+
+
+def data_pool(name, records, order="cyclic"):
+    """``name``'s feeder when <NAME>_FILE is set, otherwise a sharded pool of the inline ``records``.
+
+    <NAME>_ORDER overrides ``order``. Inline pools support ``cyclic`` and ``unique`` only.
+    """
+    prefix = env_prefix(name)
+    order = os.getenv(f"{prefix}_ORDER", order)
+    path = os.getenv(f"{prefix}_FILE")
+    if path:
+        return csv_feeder(name, path, order)
+    if order not in ("cyclic", "unique"):
+        raise ValueError(f'Order {order!r} of pool "{name}" needs a file: set {prefix}_FILE')
+    return sharded_pool(name, records, unique=order == "unique")
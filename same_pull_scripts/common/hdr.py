@@ -0,0 +1,188 @@
+"""Pure-Python HDR histogram with a compact, mergeable encoding.
+
+Values (microseconds) are bucketed like HdrHistogram: every power-of-two
+range holds 2048 linear sub-buckets, which keeps 3 significant digits across
+the whole 1 us .. 1 h range. Counts are stored sparsely, so adding two
+histograms is lossless: merging per-worker or per-run histograms gives the
+same percentiles as recording every value into one histogram.
+
+``encode()`` writes the non-empty buckets as delta/count varints, compressed
+with zlib and base64-encoded: about one byte per non-empty bucket, however
+many requests were recorded.
+
+Merge any number of result files and print percentiles:
+
+    python -m common.hdr results/latency-histograms-*.json --percentiles 50,99,99.9
+"""
+import argparse
+import base64
+import json
+import math
+import zlib
+
+# ---------------- CONFIG ---------------- #
+SIGNIFICANT_FIGURES = 3
+HIGHEST_TRACKABLE_US = 3_600_000_000  # 1 hour
+DEFAULT_PERCENTILES = (50, 90, 95, 99, 99.9, 99.99)
+
+_SUB_BUCKET_HALF_MAGNITUDE = (2 * 10 ** SIGNIFICANT_FIGURES - 1).bit_length() - 1  # 10
+_SUB_BUCKET_HALF = 1 << _SUB_BUCKET_HALF_MAGNITUDE  # 1024
+_SUB_BUCKET_MASK = (_SUB_BUCKET_HALF << 1) - 1  # 2047
+
+
+def bucket_index(value):
+    """Counts index of ``value`` (integer microseconds, clamped to the trackable range)."""
+    value = min(max(0, value), HIGHEST_TRACKABLE_US)
+    bucket = (value | _SUB_BUCKET_MASK).bit_length() - (_SUB_BUCKET_HALF_MAGNITUDE + 1)
+    sub_bucket = value >> bucket
+    return ((bucket + 1) << _SUB_BUCKET_HALF_MAGNITUDE) + sub_bucket - _SUB_BUCKET_HALF
+
+
+def bucket_indexes(values_us):
+    """``bucket_index`` over a NumPy array of microsecond values."""
+    import numpy as np
+
+    values = np.clip(values_us.astype(np.int64), 0, HIGHEST_TRACKABLE_US)
+    # frexp's exponent is the bit length for integers below 2**53.
+    bucket = np.frexp((values | _SUB_BUCKET_MASK).astype(np.float64))[1] - (_SUB_BUCKET_HALF_MAGNITUDE + 1)
+    return ((bucket + 1) << _SUB_BUCKET_HALF_MAGNITUDE) + (values >> bucket) - _SUB_BUCKET_HALF
+
+
+def bucket_range(index):
+    """(lowest, highest) value that maps to counts ``index``."""
+    bucket = (index >> _SUB_BUCKET_HALF_MAGNITUDE) - 1
+    sub_bucket = (index & (_SUB_BUCKET_HALF - 1)) + _SUB_BUCKET_HALF
+    if bucket < 0:
+        sub_bucket -= _SUB_BUCKET_HALF
+        bucket = 0
+    lowest = sub_bucket << bucket
+    return lowest, lowest + (1 << bucket) - 1
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varints(data):
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield value
+            value = shift = 0
+
+
+class HdrHistogram:
+    __slots__ = ("counts", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, value_us, count=1):
+        value_us = int(value_us)
+        index = bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        if self.min is None or value_us < self.min:
+            self.min = value_us
+        if value_us > self.max:
+            self.max = value_us
+
+    def add(self, other):
+        """Merge ``other`` into this histogram (lossless)."""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, percent):
+        """Value at ``percent`` (0-100), as the highest value of its bucket like HdrHistogram."""
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(round(self.total * percent / 100, 9)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(bucket_range(index)[1], self.max)
+        return self.max
+
+    def encode(self):
+        out = bytearray()
+        _write_varint(out, self.min or 0)
+        _write_varint(out, self.max)
+        previous = 0
+        for index in sorted(self.counts):
+            _write_varint(out, index - previous)
+            _write_varint(out, self.counts[index])
+            previous = index
+        return base64.b64encode(zlib.compress(bytes(out), 9)).decode("ascii")
+
+    @classmethod
+    def decode(cls, text):
+        values = _read_varints(zlib.decompress(base64.b64decode(text)))
+        histogram = cls()
+        low, high = next(values), next(values)
+        index = 0
+        for delta in values:
+            index += delta
+            count = next(values)
+            histogram.counts[index] = count
+            histogram.total += count
+        if histogram.total:
+            histogram.min, histogram.max = low, high
+        return histogram
+
+
+# ---------------- REPORT (merge result files) ---------------- #
+def load_endpoints(paths, worker=None):
+    """Merge the ``endpoints`` (or one worker's) histograms of every file in ``paths``."""
+    merged = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            document = json.load(f)
+        encoded = document["workers"].get(worker, {}) if worker else document["endpoints"]
+        for name, text in encoded.items():
+            merged.setdefault(name, HdrHistogram()).add(HdrHistogram.decode(text))
+    return merged
+
+
+def print_percentiles(merged, percentiles):
+    """Print count, min, percentiles and max (ms) of each {name: HdrHistogram}."""
+    headers = ["count", "min"] + [f"p{p:g}" for p in percentiles] + ["max"]
+    width = max([len("endpoint")] + [len(name) for name in merged])
+    print(f"{'endpoint':<{width}}" + "".join(f"{h:>11}" for h in headers))
+    for name in sorted(merged):
+        hist = merged[name]
+        cells = [hist.total, (hist.min or 0) / 1000] + [hist.percentile(p) / 1000 for p in percentiles] + [hist.max / 1000]
+        print(f"{name:<{width}}" + f"{cells[0]:>11}" + "".join(f"{c:>11.3f}" for c in cells[1:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge HDR latency histograms and print percentiles (ms).")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--percentiles", default=",".join(str(p) for p in DEFAULT_PERCENTILES))
+    parser.add_argument("--endpoint", action="append", help="only these endpoint names (repeatable)")
+    parser.add_argument("--worker", help="only this worker's histograms")
+    args = parser.parse_args()
+
+    percentiles = [float(p) for p in args.percentiles.split(",") if p.strip()]
+    merged = load_endpoints(args.files, args.worker)
+    if args.endpoint:
+        merged = {name: hist for name, hist in merged.items() if name in args.endpoint}
+    print_percentiles(merged, percentiles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Microsecond HDR latency capture per endpoint and per worker.
+
+Locust's own stats round response times into coarse buckets, which makes
+p99/p99.9 unreliable around the SLA thresholds. This request listener also
+records every response time into an HDR histogram (common/hdr.py) keyed by
+"<METHOD> <name>":
+
+- Workers send their histograms to the master with each stats report and
+  start over, so each report carries only the new samples. The master adds
+  them up per worker and per endpoint; the merge is lossless.
+- At the end of the run the master (or a standalone process) writes
+  results/latency-histograms-<time>.json (or HDR_OUTPUT). Percentiles over
+  any set of these files come from ``python -m common.hdr <files...>``.
+
+Capture is opt-in: set HDR_HISTOGRAMS=true to record and write the file.
+"""
+import json
+import os
+import time
+
+from locust import events
+from locust.runners import MasterRunner, WorkerRunner
+
+from common.hdr import SIGNIFICANT_FIGURES, HdrHistogram
+
+# ---------------- CONFIG ---------------- #
+ENABLED = os.getenv("HDR_HISTOGRAMS", "false").lower() == "true"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+OUTPUT = os.getenv("HDR_OUTPUT") or os.path.join(
+    REPO_ROOT, "results", time.strftime("latency-histograms-%Y%m%dT%H%M%S.json")
+)
+REPORT_KEY = "hdr_histograms"
+LOCAL_WORKER = "local"
+
+_pending = {}  # endpoint -> HdrHistogram recorded since the last report (workers) / whole run (local)
+_workers = {}  # worker id -> {endpoint: HdrHistogram}, merged on the master
+
+
+def record(request_type, name, response_time, **kwargs):
+    key = f"{request_type} {name}"
+    histogram = _pending.get(key)
+    if histogram is None:
+        histogram = _pending[key] = HdrHistogram()
+    histogram.record(response_time * 1000)
+
+
+def _report_to_master(client_id, data, **kwargs):
+    global _pending
+    sent, _pending = _pending, {}
+    data[REPORT_KEY] = {key: histogram.encode() for key, histogram in sent.items()}
+
+
+def _worker_report(client_id, data, **kwargs):
+    merged = _workers.setdefault(client_id, {})
+    for key, text in data.get(REPORT_KEY, {}).items():
+        merged.setdefault(key, HdrHistogram()).add(HdrHistogram.decode(text))
+
+
+def write_histograms(path=OUTPUT):
+    endpoints = {}
+    for histograms in _workers.values():
+        for key, histogram in histograms.items():
+            endpoints.setdefault(key, HdrHistogram()).add(histogram)
+    if not endpoints:
+        return None
+
+    document = {
+        "generatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "unit": "us",
+        "significantFigures": SIGNIFICANT_FIGURES,
+        "endpoints": {key: histogram.encode() for key, histogram in sorted(endpoints.items())},
+        "workers": {
+            worker: {key: histogram.encode() for key, histogram in sorted(histograms.items())}
+            for worker, histograms in _workers.items()
+        },
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+    return path
+
+
+@events.init.add_listener
+def _setup(environment, **kwargs):
+    if not ENABLED:
+        return
+    runner = environment.runner
+    if isinstance(runner, MasterRunner):
+        environment.events.worker_report.add_listener(_worker_report)
+        return
+    environment.events.request.add_listener(record)
+    if isinstance(runner, WorkerRunner):
+        environment.events.report_to_master.add_listener(_report_to_master)
+    else:
+        _workers[LOCAL_WORKER] = _pending
+
+
+@events.quitting.add_listener
+def _write_on_quit(environment, **kwargs):
+    if ENABLED and not isinstance(environment.runner, WorkerRunner):
+        path = write_histograms()
+        if path:
+            print(f"[HDR] Latency histograms written to {path}")
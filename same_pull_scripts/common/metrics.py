@@ -0,0 +1,149 @@
+"""Prometheus /metrics exporter for load-generating Locust processes.
+
+With PROMETHEUS_EXPORTER=true every local or worker process (not the
+master, which sees no requests) aggregates its own request events and serves
+them in the Prometheus text format on http://<host>:<port>/metrics, so
+generator-side latency can be lined up with node-exporter/cAdvisor data in
+Grafana (observability/).
+
+- Series are keyed by method, request name and status class (2xx, 4xx,
+  5xx, error ...). Request names are already templated and capped by
+  common/naming.py, so the label set stays bounded.
+- Latency goes into fixed buckets (METRICS_BUCKETS_MS). Recording a request
+  is a dict lookup, a bisect and a few integer additions; the exposition
+  text is only built when Prometheus scrapes.
+- Several workers on one host each take the first free port from
+  METRICS_PORT upwards (METRICS_PORT_RANGE ports); prometheus.yml scrapes
+  that range.
+
+Exported series:
+
+    locust_request_duration_seconds_bucket/_sum/_count{method,name,status}
+    locust_request_failures_total{method,name}
+    locust_response_bytes_total{method,name}
+    locust_users
+"""
+import os
+from bisect import bisect_left
+
+from locust import events
+from locust.runners import MasterRunner
+
+# ---------------- CONFIG ---------------- #
+ENABLED = os.getenv("PROMETHEUS_EXPORTER", "false").lower() == "true"
+PORT = int(os.getenv("METRICS_PORT", "9646"))
+PORT_RANGE = int(os.getenv("METRICS_PORT_RANGE", "8"))
+BUCKETS_MS = tuple(
+    float(bound) for bound in os.getenv(
+        "METRICS_BUCKETS_MS", "5,10,25,50,100,250,500,1000,2500,5000,10000,30000"
+    ).split(",") if bound.strip()
+)
+STATUS_CLASSES = ("error", "1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestSeries:
+    __slots__ = ("labels", "buckets", "sum_ms", "count")
+
+    def __init__(self, labels):
+        self.labels = labels  # pre-rendered 'method="GET",name="..."' part
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)  # last one is +Inf
+        self.sum_ms = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """Per-process request aggregates, rendered on scrape."""
+
+    def __init__(self, buckets_ms=BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.series = {}  # (method, name, status class) -> RequestSeries
+        self.failures = {}  # (method, name) -> count
+        self.bytes = {}  # (method, name) -> count
+        self.runner = None
+
+    def record(self, request_type, name, response_time, response_length, response=None, exception=None, **kwargs):
+        status = getattr(response, "status_code", 0) or 0
+        key = (request_type, name, STATUS_CLASSES[status // 100] if 100 <= status < 600 else "error")
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = RequestSeries(
+                f'method="{_escape(request_type)}",name="{_escape(name)}",status="{key[2]}"'
+            )
+        series.buckets[bisect_left(self.buckets_ms, response_time)] += 1
+        series.sum_ms += response_time
+        series.count += 1
+        endpoint = key[:2]
+        if exception is not None:
+            self.failures[endpoint] = self.failures.get(endpoint, 0) + 1
+        if response_length:
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + response_length
+
+    def render(self):
+        lines = [
+            "# HELP locust_request_duration_seconds Request response time as seen by the load generator.",
+            "# TYPE locust_request_duration_seconds histogram",
+        ]
+        bounds = [f"{bound / 1000:g}" for bound in self.buckets_ms] + ["+Inf"]
+        for series in list(self.series.values()):
+            cumulative = 0
+            for bound, count in zip(bounds, series.buckets):
+                cumulative += count
+                lines.append(f'locust_request_duration_seconds_bucket{{{series.labels},le="{bound}"}} {cumulative}')
+            lines.append(f"locust_request_duration_seconds_sum{{{series.labels}}} {series.sum_ms / 1000:.6f}")
+            lines.append(f"locust_request_duration_seconds_count{{{series.labels}}} {series.count}")
+
+        for metric, help_text, values in (
+            ("locust_request_failures_total", "Requests reported as failures.", self.failures),
+            ("locust_response_bytes_total", "Response bytes received.", self.bytes),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (method, name), value in list(values.items()):
+                lines.append(f'{metric}{{method="{_escape(method)}",name="{_escape(name)}"}} {value}')
+
+        lines.append("# HELP locust_users Running users in this process.")
+        lines.append("# TYPE locust_users gauge")
+        lines.append(f"locust_users {self.runner.user_count if self.runner else 0}")
+        return "\n".join(lines) + "\n"
+
+    def wsgi_app(self, environ, start_response):
+        if environ.get("PATH_INFO") != "/metrics":
+            start_response("404 Not Found", [("Content-Type", "text/plain")])
+            return [b"not found\n"]
+        body = self.render().encode("utf-8")
+        start_response("200 OK", [
+            ("Content-Type", "text/plain; version=0.0.4; charset=utf-8"),
+            ("Content-Length", str(len(body))),
+        ])
+        return [body]
+
+
+registry = MetricsRegistry()
+
+
+def serve(port=PORT, port_range=PORT_RANGE):
+    """Serve ``registry`` on the first free port in [port, port + port_range); returns the server."""
+    from gevent.pywsgi import WSGIServer
+
+    for candidate in range(port, port + max(1, port_range)):
+        server = WSGIServer(("0.0.0.0", candidate), registry.wsgi_app, log=None)
+        try:
+            server.start()
+        except OSError:
+            continue
+        print(f"[METRICS] Prometheus metrics on http://0.0.0.0:{candidate}/metrics")
+        return server
+    raise OSError(f"No free metrics port in {port}-{port + port_range - 1}; raise METRICS_PORT_RANGE.")
+
+
+@events.init.add_listener
+def _setup(environment, **kwargs):
+    if not ENABLED or isinstance(environment.runner, MasterRunner):
+        return
+    registry.runner = environment.runner
+    environment.events.request.add_listener(registry.record)
+    serve()
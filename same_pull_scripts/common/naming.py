@@ -0,0 +1,111 @@
+"""Bounded-cardinality request names.
+
+Every request of a ``BaseHttpUser`` goes through ``stats_name()`` before it
+reaches Locust's stats, so a long run keeps a small, fixed set of entries:
+
+- URLs become templates. Query strings drop the paging, search and date
+  parameters (``VOLATILE_PARAMS``) and keep the ones that select an endpoint
+  (``key``, ``assignment_type``, ``logs``, ``location`` ...); kept values and
+  path segments that look like record ids become ``{id}``. For example
+  ``get_data?key=ls_employees&page=1&limit=20`` becomes ``get_data?key=ls_employees``.
+- Ad-hoc names lose their dynamic parts: e-mail addresses become ``{user}``
+  and record names (``REC-0001``, ``HRA_0925_5848``, UUIDs) become ``{id}``.
+  Plain numbers stay, so "Level 2024 report" keeps its name.
+- A trailing bracketed qualifier such as ``[session pool]`` or
+  ``[page 6-20]`` (common/params.py) is kept as it is.
+- Users of an application in a mixed run (common/workloads.py) get the
+  application as a leading prefix, e.g. ``[payroll] /api/method/...``, so
+  the same endpoint is reported per application.
+- Dynamic values that are still worth keeping go in the request context
+  through ``tags(record=..., user=..., role=...)``. Event listeners (CSV log,
+  exporters) see them; the stats table does not.
+- After MAX_STATS_KEYS distinct (method, name) pairs in a process, new names
+  are reported under OVERFLOW_NAME and a warning is logged once.
+"""
+import logging
+import os
+import re
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode
+
+# ---------------- CONFIG ---------------- #
+MAX_STATS_KEYS = int(os.getenv("MAX_STATS_KEYS", "300"))
+OVERFLOW_NAME = "(other requests: MAX_STATS_KEYS reached)"
+TAG_DIMENSIONS = ("record", "user", "role")
+VOLATILE_PARAMS = (  # per-request values; every other query parameter selects the endpoint
+    "page", "limit", "query", "from_date", "to_date", "page_size", "start", "name",
+    "limit_start", "limit_page_length",
+)
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+RECORD_NAME = re.compile(
+    r"\b(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"  # UUID
+    r"|[A-Z][A-Z0-9]*(?:[-_][A-Z0-9]+)*[-_]\d{2,}(?:[-_]\d+)*)\b"  # naming series: REC-0001, HRA_0925_5848
+)
+NUMERIC_ID = re.compile(r"\d{4,}")  # only as a whole path segment or query value
+QUALIFIER = re.compile(r"(?: \[[^\[\]]*\])+$")
+
+_seen = set()
+_overflow_warned = False
+
+
+def tags(**values):
+    """Request context for the fixed tag dimensions (``record``, ``user``, ``role``)."""
+    unknown = set(values) - set(TAG_DIMENSIONS)
+    if unknown:
+        raise ValueError(f'Unknown tag(s) {", ".join(sorted(unknown))}. Allowed: {", ".join(TAG_DIMENSIONS)}')
+    return {key: value for key, value in values.items() if value not in (None, "")}
+
+
+@lru_cache(maxsize=4096)
+def template(name):
+    """Templated form of a URL or ad-hoc request name."""
+    qualifier = QUALIFIER.search(name)
+    if qualifier:
+        return template(name[:qualifier.start()]) + qualifier.group()
+    path, _, query = name.partition("?")
+    if path.startswith(("/", "http://", "https://")):
+        path = "/".join(_value_template(segment) for segment in path.split("/"))
+        routing = [(k, _value_template(v)) for k, v in parse_qsl(query, keep_blank_values=False)
+                   if k not in VOLATILE_PARAMS]
+        return f"{path}?{urlencode(routing, safe='{}')}" if routing else path
+    return RECORD_NAME.sub("{id}", EMAIL.sub("{user}", name)).strip()
+
+
+def _value_template(value):
+    if EMAIL.fullmatch(value):
+        return "{user}"
+    if RECORD_NAME.fullmatch(value) or NUMERIC_ID.fullmatch(value):
+        return "{id}"
+    return value
+
+
+def stats_name(method, name, app=None):
+    """Templated name for ``name`` (prefixed with ``[app]``), or OVERFLOW_NAME once the per-process cap is reached."""
+    global _overflow_warned
+    name = template(str(name))
+    if app:
+        name = f"[{app}] {name}"
+    key = (method, name)
+    if key in _seen:
+        return name
+    if len(_seen) < MAX_STATS_KEYS:
+        _seen.add(key)
+        return name
+    if not _overflow_warned:
+        _overflow_warned = True
+        logging.warning(
+            f"[NAMING] {MAX_STATS_KEYS} distinct request names reached; "
+            f'new names such as "{name}" are reported as "{OVERFLOW_NAME}"'
+        )
+    return OVERFLOW_NAME
+
+
+class NamingSessionMixin:
+    """Client mixin that passes every request name through ``stats_name()``."""
+
+    app = None  # set by the user for mixed-application runs
+
+    def request(self, method, url, name=None, *args, **kwargs):
+        name = name or getattr(self, "request_name", None) or url
+        return super().request(method, url, stats_name(str(method).upper(), name, self.app), *args, **kwargs)
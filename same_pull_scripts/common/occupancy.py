@@ -0,0 +1,102 @@
+"""Per-worker occupancy index for entry/exit scans.
+
+Every employee of the worker's slice of a sharded pool (common/sharding.py)
+is a small state machine: outside --entry(location)--> inside at that
+location --exit(same location)--> outside. Users ``claim()`` an idle
+employee together with the one valid next scan, send it, and ``release()``
+the employee, applying the transition only when the server accepted it:
+
+- No exits for people who never entered and no double entries, unless
+  they are asked for on purpose with ``claim_duplicate()``.
+- A claimed employee is never handed to a second user, so concurrent users
+  do not race on the same person's ledger.
+- Idle employees are kept in FIFO order per state: the person who entered
+  first is the first to leave, which gives realistic dwell times.
+
+All employees start outside. When the shard is rebalanced, employees that
+stay on this worker keep their state; new ones start outside.
+"""
+import random
+from collections import deque
+
+# ---------------- CONFIG ---------------- #
+ENTRY = "entry"
+EXIT = "exit"
+
+
+class OccupancyIndex:
+    def __init__(self, pool, locations, key="emp_email", entry_weight=0.6):
+        if not locations:
+            raise ValueError("OccupancyIndex needs at least one location")
+        self.pool = pool
+        self.locations = list(locations)
+        self.key = key
+        self.entry_weight = entry_weight
+
+        self.records = {}  # key -> record, for the current slice
+        self.location = {}  # key -> location while inside
+        self.outside = deque()  # idle keys
+        self.inside = deque()  # idle keys
+        self.claimed = set()
+        self.stats = {"entries": 0, "exits": 0, "rejected": 0, "all_claimed": 0}
+        self._slice = None
+
+    def _sync(self):
+        """Follow the pool's current slice (it changes when workers join or leave)."""
+        if self.pool.slice is self._slice:
+            return
+        self._slice = self.pool.slice
+        self.records = {record[self.key]: record for record in self._slice}
+        self.location = {key: loc for key, loc in self.location.items() if key in self.records}
+        self.outside = deque(k for k in self.records if k not in self.claimed and k not in self.location)
+        self.inside = deque(k for k in self.records if k not in self.claimed and k in self.location)
+
+    @property
+    def occupancy(self):
+        return len(self.location)
+
+    def claim(self):
+        """Claim an idle employee: (record, ENTRY | EXIT, location), or None when every employee is claimed."""
+        self._sync()
+        if self.outside and (not self.inside or random.random() < self.entry_weight):
+            key = self.outside.popleft()
+            action, location = ENTRY, random.choice(self.locations)
+        elif self.inside:
+            key = self.inside.popleft()
+            action, location = EXIT, self.location[key]
+        else:
+            self.stats["all_claimed"] += 1
+            return None
+        self.claimed.add(key)
+        return self.records[key], action, location
+
+    def claim_duplicate(self):
+        """Claim an idle employee with an invalid scan: entry while inside, or exit while outside."""
+        self._sync()
+        if self.inside and (not self.outside or random.random() < 0.5):
+            key = self.inside.popleft()
+            action, location = ENTRY, self.location[key]
+        elif self.outside:
+            key = self.outside.popleft()
+            action, location = EXIT, random.choice(self.locations)
+        else:
+            self.stats["all_claimed"] += 1
+            return None
+        self.claimed.add(key)
+        return self.records[key], action, location
+
+    def release(self, record, action, location, applied):
+        """Return a claimed employee; ``applied`` = the server accepted the transition."""
+        key = record[self.key]
+        self.claimed.discard(key)
+        if applied:
+            if action == ENTRY:
+                self.location[key] = location
+                self.stats["entries"] += 1
+            else:
+                self.location.pop(key, None)
+                self.stats["exits"] += 1
+        else:
+            self.stats["rejected"] += 1
+        if key in self.records:  # still in this worker's slice
+            (self.inside if key in self.location else self.outside).append(key)
@@ -0,0 +1,205 @@
+"""Closed-model think times, fixed pacing and an open-model (arrival-rate) wait_time.
+
+By default scripts keep their closed model: ``between(min, max)`` between
+tasks plus ``think()`` pauses inside tasks. When ARRIVAL_RATE is set, task
+iterations are instead started on a fixed schedule, like k6's arrival-rate
+executors:
+
+- ARRIVAL_RATE is the target iterations/sec for the whole run at the peak user
+  count of the TEST_TYPE scenario (see common/shapes.py).
+- Each process runs ``ARRIVAL_RATE * local_users / peak_users`` iterations/sec,
+  so ramps scale the rate and distributed workers need no coordination.
+- Users act as the pre-allocated VU pool. Any idle user claims the next slot,
+  so one slow response does not delay the schedule. Slots that pass while all
+  users are busy are counted as dropped iterations, as in k6.
+- ``think()`` becomes a no-op, because the schedule already sets the pacing.
+
+An iteration is one task, or one whole pass of a ``PacedSequentialTaskSet``
+flow: multi-step flows (entry/exit, visitor registration) subclass it so the
+schedule counts flows, not steps. Their steps follow each other without a
+wait on a schedule, and with the user's ``between()`` wait otherwise.
+
+PACING_INTERVAL=<seconds> keeps the closed model but gives every user a
+fixed schedule instead of ``between()``: its iterations are due every
+PACING_INTERVAL seconds, counted from the end of its first iteration.
+``think()`` still runs, as part of the iteration.
+
+CO_CORRECTION=true (needs ARRIVAL_RATE or PACING_INTERVAL) corrects for
+coordinated omission. A slow response no longer hides the requests that were
+due while the user waited for it:
+
+- Late iterations are not dropped. A user that falls behind starts the due
+  iterations back to back until it is on schedule again.
+- Every request keeps its normal entry, which is the raw service time.
+  A second entry, "<name> [corrected]", records the response time measured
+  from the intended start: service time plus how late the iteration started.
+  A failed request is a failure in its corrected entry too.
+- The corrected entries show up in the Locust stats, the CSV/HTML reports
+  and the HDR histograms (common/latency.py). Totals, failures, SLAs and the
+  other exporters only count the raw requests.
+
+NO_THINK_TIME=true removes every wait and think time (closed model at full
+speed); the generator benchmarks use it to measure raw requests per core.
+"""
+import os
+import random
+import time
+import weakref
+
+import gevent
+from locust import SequentialTaskSet, between, constant, events
+from locust.runners import MasterRunner
+
+from common import latency
+from common.shapes import peak_users
+
+# ---------------- CONFIG ---------------- #
+ARRIVAL_RATE = float(os.getenv("ARRIVAL_RATE") or 0)  # iterations/sec at peak users; 0 = closed model
+OPEN_MODEL = ARRIVAL_RATE > 0
+PACING_INTERVAL = float(os.getenv("PACING_INTERVAL") or 0)  # seconds between a user's iterations; 0 = between()
+NO_THINK_TIME = os.getenv("NO_THINK_TIME", "false").lower() == "true"
+CO_CORRECTION = os.getenv("CO_CORRECTION", "false").lower() == "true"
+CORRECTED_SUFFIX = " [corrected]"
+
+if OPEN_MODEL and PACING_INTERVAL > 0:
+    raise ValueError("Set either ARRIVAL_RATE or PACING_INTERVAL, not both.")
+if CO_CORRECTION and (NO_THINK_TIME or not (OPEN_MODEL or PACING_INTERVAL > 0)):
+    raise ValueError("CO_CORRECTION needs a schedule: set ARRIVAL_RATE or PACING_INTERVAL, without NO_THINK_TIME.")
+
+
+class ArrivalRateScheduler:
+    """Per-process iteration schedule shared by every user."""
+
+    def __init__(self, rate, peak, drop_missed=True):
+        self.per_user_rate = rate / max(1, peak)
+        self.drop_missed = drop_missed
+        self.next_slot = None
+        self.started = 0
+        self.dropped = 0
+        self.late = 0
+
+    def offset(self, runner_users):
+        """Seconds until the claimed slot; negative when it is already overdue."""
+        interval = 1.0 / (self.per_user_rate * max(1, runner_users))
+        now = time.monotonic()
+        if self.next_slot is None:
+            self.next_slot = now
+        elif self.drop_missed and now - self.next_slot > interval:
+            # Nobody was free for these slots: skip them instead of bursting.
+            missed = int((now - self.next_slot) / interval)
+            self.dropped += missed
+            self.next_slot += missed * interval
+
+        slot = self.next_slot
+        self.next_slot += interval
+        self.started += 1
+        if slot < now:
+            self.late += 1
+        return slot - now
+
+
+class PacingSchedule:
+    """Fixed per-user iteration schedule: one iteration every ``interval`` seconds."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_slot = weakref.WeakKeyDictionary()  # user -> when its next iteration is due
+        self.started = 0
+        self.late = 0
+
+    def offset(self, user):
+        """Seconds until ``user``'s next iteration is due; negative when it is already overdue."""
+        now = time.monotonic()
+        slot = self.next_slot.get(user, now + self.interval)
+        self.next_slot[user] = slot + self.interval
+        self.started += 1
+        if slot < now:
+            self.late += 1
+        return slot - now
+
+
+scheduler = ArrivalRateScheduler(ARRIVAL_RATE, peak_users(), drop_missed=not CO_CORRECTION) if OPEN_MODEL else None
+pacing = PacingSchedule(PACING_INTERVAL) if PACING_INTERVAL > 0 else None
+
+# user greenlet -> seconds its current iteration started behind schedule
+_lag = weakref.WeakKeyDictionary()
+_max_lag = 0.0
+
+
+def user_wait_time(min_wait, max_wait):
+    """wait_time for a script: ``between(min, max)``, or the schedule when ARRIVAL_RATE/PACING_INTERVAL is set."""
+    if NO_THINK_TIME:
+        return constant(0)
+    if not OPEN_MODEL and pacing is None:
+        return between(min_wait, max_wait)
+
+    def wait_time_func(self):
+        global _max_lag
+        user = getattr(self, "user", self)  # TaskSets delegate to their user
+        if OPEN_MODEL:
+            offset = scheduler.offset(user.environment.runner.user_count)
+        else:
+            offset = pacing.offset(user)
+        if CO_CORRECTION:
+            lag = _lag[gevent.getcurrent()] = max(0.0, -offset)
+            _max_lag = max(_max_lag, lag)
+        return max(0.0, offset)
+
+    return wait_time_func
+
+
+class PacedSequentialTaskSet(SequentialTaskSet):
+    """SequentialTaskSet whose whole pass is one iteration of the schedule."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._steps = 0
+
+    def get_next_task(self):
+        self._steps += 1
+        return super().get_next_task()
+
+    def wait_time(self):
+        if self._steps % len(self.tasks) and (OPEN_MODEL or pacing is not None):
+            return 0  # mid-flow: the next step belongs to the same iteration
+        return super().wait_time()
+
+
+def think(min_seconds, max_seconds):
+    """In-task think time; skipped in open-model runs."""
+    if OPEN_MODEL or NO_THINK_TIME:
+        return
+    time.sleep(random.uniform(min_seconds, max_seconds))
+
+
+@events.init.add_listener
+def _setup(environment, **kwargs):
+    if not CO_CORRECTION or isinstance(environment.runner, MasterRunner):
+        return
+
+    def record_corrected(request_type, name, response_time, response_length, exception=None, **kwargs):
+        # Only user greenlets that went through the schedule have a lag; background
+        # greenlets (pool refreshes, logins in on_start ...) keep their raw entry only.
+        lag = _lag.get(gevent.getcurrent())
+        if lag is None or response_time is None:
+            return
+        corrected = response_time + lag * 1000
+        entry = environment.stats.get(name + CORRECTED_SUFFIX, request_type)
+        entry.log(corrected, response_length or 0)
+        if exception:
+            entry.log_error(exception)  # the entry only; the errors table keeps the raw request
+        if latency.ENABLED:
+            latency.record(request_type, name + CORRECTED_SUFFIX, corrected)
+
+    environment.events.request.add_listener(record_corrected)
+
+
+@events.quitting.add_listener
+def _report_arrivals(environment, **kwargs):
+    if scheduler is not None:
+        print(f"[ARRIVAL RATE] iterations={scheduler.started} dropped_iterations={scheduler.dropped} "
+              f"late_iterations={scheduler.late}")
+    if pacing is not None:
+        print(f"[PACING] iterations={pacing.started} late_iterations={pacing.late}")
+    if CO_CORRECTION and not isinstance(environment.runner, MasterRunner):
+        print(f"[CO CORRECTION] max_schedule_lag={_max_lag * 1000:.0f}ms")
@@ -0,0 +1,150 @@
+"""Precomputed parameter tables for paged, search and date-window endpoints.
+
+Without them almost every list call asks for ``page=1&limit=20&query=``, so
+the ERP answers from the same cached first page. A ``ParamSpace`` builds a
+table of PARAMS_TABLE_SIZE ready-made URLs for one endpoint at import time:
+
+- ``page``: Zipf-distributed over 1..pages (exponent PARAMS_ZIPF_S), so
+  shallow pages stay the most common but deep offsets are hit too.
+- ``limit``: uniform over the endpoint's ``limits``.
+- ``query``: a term from data/test-data/search-terms.txt (or
+  PARAMS_VOCABULARY_FILE) in PARAMS_SEARCH_RATE of the rows, else empty.
+- ``from_date``/``to_date``: windows of 1..PARAMS_MAX_WINDOW_DAYS days
+  (log-uniform, so short windows are common), ending on a random day of the
+  PARAMS_LOOKBACK_DAYS before PARAMS_WINDOW_END (default today).
+
+The table comes from a fixed seed (PARAMS_SEED plus the space name), so
+every run and every worker has the same rows; each process starts at its own
+random row. ``draw()`` is a counter increment and a list index. It returns
+the URL and a stats name with the row's bucket, for example
+``... [page 6-20]``, ``... [page 1, search]`` or ``... [window 8-31d]``, so
+Locust reports latency per page depth, search and window width.
+
+PARAM_SPACES=false turns this off: ``draw()`` then returns the endpoint's
+old fixed URL and name, as before.
+"""
+import itertools
+import math
+import os
+import random
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from urllib.parse import quote_plus
+
+# ---------------- CONFIG ---------------- #
+ENABLED = os.getenv("PARAM_SPACES", "true").lower() == "true"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+VOCABULARY_FILE = os.getenv("PARAMS_VOCABULARY_FILE") or os.path.join(REPO_ROOT, "data/test-data/search-terms.txt")
+TABLE_SIZE = int(os.getenv("PARAMS_TABLE_SIZE", "32768"))
+SEED = os.getenv("PARAMS_SEED", "1")
+ZIPF_S = float(os.getenv("PARAMS_ZIPF_S", "1.1"))
+MAX_PAGE = int(os.getenv("PARAMS_MAX_PAGE", "200"))
+LIMITS = tuple(int(limit) for limit in os.getenv("PARAMS_LIMITS", "10,20,50").split(",") if limit.strip())
+SEARCH_RATE = float(os.getenv("PARAMS_SEARCH_RATE", "0.2"))
+MAX_WINDOW_DAYS = int(os.getenv("PARAMS_MAX_WINDOW_DAYS", "92"))
+LOOKBACK_DAYS = int(os.getenv("PARAMS_LOOKBACK_DAYS", "365"))
+WINDOW_END = os.getenv("PARAMS_WINDOW_END") or time.strftime("%Y-%m-%d")
+
+PAGE_BUCKETS = (1, 5, 20, 100)  # upper bounds: page 1, 2-5, 6-20, 21-100, 101+
+WINDOW_BUCKETS = (1, 7, 31, 92)  # upper bounds in days: 1d, 2-7d, 8-31d, 32-92d, 93d+
+
+_vocabulary = None
+
+
+def vocabulary(path=VOCABULARY_FILE):
+    """Search terms, one per line (loaded once)."""
+    global _vocabulary
+    if _vocabulary is None:
+        with open(path, encoding="utf-8") as f:
+            _vocabulary = [line.strip() for line in f if line.strip()]
+        if not _vocabulary:
+            raise ValueError(f"No search terms in {path}")
+    return _vocabulary
+
+
+def bucket_label(value, bounds, unit=""):
+    """'6-20' style label of the bucket holding ``value``."""
+    index = bisect_left(bounds, value)
+    if index == len(bounds):
+        return f"{bounds[-1] + 1}{unit}+"
+    low = bounds[index - 1] + 1 if index else 1
+    return f"{low}{unit}" if low == bounds[index] else f"{low}-{bounds[index]}{unit}"
+
+
+def zipf_cdf(n, s):
+    """Cumulative probabilities of ranks 1..n under Zipf(s)."""
+    weights = itertools.accumulate(1.0 / rank ** s for rank in range(1, n + 1))
+    cdf = list(weights)
+    return [value / cdf[-1] for value in cdf]
+
+
+class ParamSpace:
+    """Table of URLs for one endpoint; see the module docstring."""
+
+    def __init__(self, name, url, default, pages=None, limits=None, search=False, window=False,
+                 date_format="%Y-%m-%d", label=None, size=TABLE_SIZE):
+        self.name = name
+        self.url = url
+        self.label = label  # stats name without the bucket; None = the URL
+        self.default_url = f"{url}{'&' if '?' in url else '?'}{default}"
+        self.pages = pages
+        self.limits = limits
+        self.search = search
+        self.window = window
+        self.date_format = date_format
+        self.table = self._build(size) if ENABLED else None
+        self.size = size
+        self._positions = itertools.count(random.randrange(size))
+
+    def _build(self, size):
+        rng = random.Random(f"{SEED}:{self.name}")
+        page_cdf = zipf_cdf(self.pages, ZIPF_S) if self.pages else None
+        terms = [quote_plus(term) for term in vocabulary()] if self.search else None
+        window_end = date.fromisoformat(WINDOW_END)
+        days = {}  # days before WINDOW_END -> formatted date
+        separator = "&" if "?" in self.url else "?"
+        names = {}  # bucket -> stats name, shared by the rows
+        table = []
+        for _ in range(size):
+            params, bucket = [], []
+            if self.window:
+                width = min(MAX_WINDOW_DAYS, int(math.exp(rng.uniform(0, math.log(MAX_WINDOW_DAYS + 1)))))
+                end = rng.randrange(LOOKBACK_DAYS + 1)
+                for offset in (end + width - 1, end):
+                    if offset not in days:
+                        days[offset] = (window_end - timedelta(days=offset)).strftime(self.date_format)
+                params.append(f"from_date={days[end + width - 1]}&to_date={days[end]}")
+                bucket.append(f"window {bucket_label(width, WINDOW_BUCKETS, 'd')}")
+            if page_cdf:
+                page = min(self.pages, bisect_right(page_cdf, rng.random()) + 1)
+                params.append(f"page={page}")
+                if not self.window:
+                    bucket.append(f"page {bucket_label(page, PAGE_BUCKETS)}")
+            if self.limits:
+                params.append(f"limit={rng.choice(self.limits)}")
+            if terms is not None:
+                term = rng.choice(terms) if rng.random() < SEARCH_RATE else ""
+                params.append(f"query={term}")
+                if term:
+                    bucket.append("search")
+            bucket = ", ".join(bucket)
+            name = names.get(bucket)
+            if name is None:
+                base = self.label or self.url
+                name = names[bucket] = f"{base} [{bucket}]" if bucket else base
+            table.append((f"{self.url}{separator}{'&'.join(params)}", name))
+        return table
+
+    def draw(self):
+        """(url, stats name) of the next row; (old fixed URL, label) with PARAM_SPACES=false."""
+        if self.table is None:
+            return self.default_url, self.label
+        return self.table[next(self._positions) % self.size]
+
+
+def param_space(name, url, default="page=1&limit=20&query=", pages=MAX_PAGE, limits=LIMITS, search=True,
+                window=False, date_format="%Y-%m-%d", label=None):
+    """``ParamSpace`` for a paged list endpoint; pass ``pages=None``/``limits=None``/``search=False`` to drop a param."""
+    return ParamSpace(name, url, default, pages=pages, limits=limits, search=search, window=window,
+                      date_format=date_format, label=label)
@@ -0,0 +1,334 @@
+"""Connection phase timing per request: DNS, connect, time to first byte and body.
+
+Locust reports one response time per request. Both clients of
+``BaseHttpUser`` (common/users.py) also split it into phases:
+
+- ``dns``: name resolution for a new connection (0 for IP hosts).
+- ``connect``: TCP connect plus TLS handshake for a new connection.
+- ``ttfb``: from sending the request until the response headers arrived,
+  i.e. upload, server time and one network round trip.
+- ``body``: the rest of the response time, i.e. reading and decoding the body.
+- ``reused``: the request went out on a kept-alive connection (no dns/connect).
+
+The hooks sit where the clients open sockets (urllib3 connections for
+requests, geventhttpclient connection pools for LOCUST_CLIENT=fast) and
+write into a per-greenlet record, so a request costs two clock reads, two
+HDR records and a few additions. Redirects add up the phases of every hop.
+Requests that got no response (connection errors) are left out.
+
+Per endpoint the counts and phase sums, plus HDR histograms of ttfb and
+body, travel to the master like common/latency.py's histograms. At the end
+of the run the master (or a standalone process) prints a ``[PHASES]`` table
+and writes results/request-phases-<time>.csv (or REQUEST_PHASES_OUTPUT).
+The instrumentation is opt-in: set REQUEST_PHASES=true to time and report.
+"""
+import csv
+import ipaddress
+import os
+import socket
+import time
+from functools import lru_cache
+from time import perf_counter
+
+import gevent.local
+from geventhttpclient.client import HTTPClientPool
+from geventhttpclient.connectionpool import ConnectionPool, SSLConnectionPool
+from locust import events
+from locust.contrib.fasthttp import FastHttpSession
+from locust.runners import MasterRunner, WorkerRunner
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError
+from urllib3.util.connection import allowed_gai_family
+
+from common.hdr import HdrHistogram
+
+# ---------------- CONFIG ---------------- #
+ENABLED = os.getenv("REQUEST_PHASES", "false").lower() == "true"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+OUTPUT = os.getenv("REQUEST_PHASES_OUTPUT") or os.path.join(
+    REPO_ROOT, "results", time.strftime("request-phases-%Y%m%dT%H%M%S.csv")
+)
+REPORT_KEY = "request_phases"
+LOCAL_WORKER = "local"
+PHASES = ("dns", "connect", "ttfb", "body")
+
+_local = gevent.local.local()  # .phases: RequestPhases of the request this greenlet is sending
+
+
+class RequestPhases:
+    """Phase durations (seconds) of one request, filled in while it is sent."""
+
+    __slots__ = ("dns", "connect", "ttfb", "reused")
+
+    def __init__(self):
+        self.dns = 0.0
+        self.connect = 0.0
+        self.ttfb = None  # None = no response
+        self.reused = True
+
+
+@lru_cache(maxsize=256)
+def _is_address(host):
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+# ---------------- REQUESTS (urllib3) ---------------- #
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        phases = getattr(_local, "phases", None)
+        host = self._dns_host
+        if phases is None or _is_address(host):
+            return super()._new_conn()
+        # Resolve here so the lookup is timed on its own, then connect to the result.
+        started = perf_counter()
+        try:
+            self._dns_host = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)[0][4][0]
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        finally:
+            phases.dns += perf_counter() - started
+        try:
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        phases = getattr(_local, "phases", None)
+        if phases is None:
+            return super().connect()
+        dns = phases.dns
+        started = perf_counter()
+        super().connect()
+        phases.connect += perf_counter() - started - (phases.dns - dns)
+        phases.reused = False
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+POOL_CLASSES = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+# ---------------- FASTHTTP (geventhttpclient) ---------------- #
+class _TimedSocketPoolMixin:
+    def _resolve(self):
+        phases = getattr(_local, "phases", None)
+        started = perf_counter()
+        try:
+            return super()._resolve()
+        finally:
+            if phases is not None:
+                phases.dns += perf_counter() - started
+
+    def _create_socket(self):
+        phases = getattr(_local, "phases", None)
+        if phases is None:
+            return super()._create_socket()
+        dns = phases.dns
+        started = perf_counter()
+        sock = super()._create_socket()
+        phases.connect += perf_counter() - started - (phases.dns - dns)
+        phases.reused = False
+        return sock
+
+
+class TimedConnectionPool(_TimedSocketPoolMixin, ConnectionPool):
+    pass
+
+
+class TimedSSLConnectionPool(_TimedSocketPoolMixin, SSLConnectionPool):
+    pass
+
+
+class TimedHTTPClientPool(HTTPClientPool):
+    """Switches each host's connection pool to its timed subclass on first use."""
+
+    def get_client(self, url):
+        client = super().get_client(url)
+        pool = client._connection_pool
+        if not isinstance(pool, _TimedSocketPoolMixin):
+            pool.__class__ = TimedSSLConnectionPool if isinstance(pool, SSLConnectionPool) else TimedConnectionPool
+        return client
+
+
+def instrument(session):
+    """Install the connection hooks on a user's HttpSession or FastHttpSession."""
+    if not ENABLED:
+        return
+    if isinstance(session, FastHttpSession):
+        session.client.clientpool.__class__ = TimedHTTPClientPool
+    else:
+        for adapter in session.adapters.values():
+            adapter.poolmanager.pool_classes_by_scheme = POOL_CLASSES
+
+
+class PhaseTimingSessionMixin:
+    """Client mixin that attaches the request's ``RequestPhases`` to its response as ``.phases``."""
+
+    def _send_request_safe_mode(self, method, url, **kwargs):
+        if not ENABLED:
+            return super()._send_request_safe_mode(method, url, **kwargs)
+        phases = _local.phases = RequestPhases()
+        started = perf_counter()
+        try:
+            response = super()._send_request_safe_mode(method, url, **kwargs)
+        finally:
+            _local.phases = None
+        if getattr(response, "status_code", None):
+            # Both clients return once the headers are in; the body is read afterwards.
+            # ``elapsed`` (send -> headers of the final hop) leaves out client-side preparation.
+            elapsed = response.elapsed
+            headers = elapsed.total_seconds() if elapsed else perf_counter() - started
+            phases.ttfb = max(0.0, headers - phases.dns - phases.connect)
+        response.phases = phases
+        return response
+
+
+# ---------------- AGGREGATION ---------------- #
+class EndpointPhases:
+    __slots__ = ("count", "reused", "sums", "ttfb", "body")
+
+    def __init__(self):
+        self.count = 0
+        self.reused = 0
+        self.sums = [0.0] * len(PHASES)  # seconds, in PHASES order
+        self.ttfb = HdrHistogram()
+        self.body = HdrHistogram()
+
+    def record(self, phases, response_time):
+        body = max(0.0, response_time - phases.dns - phases.connect - phases.ttfb)
+        sums = self.sums
+        sums[0] += phases.dns
+        sums[1] += phases.connect
+        sums[2] += phases.ttfb
+        sums[3] += body
+        self.count += 1
+        self.reused += phases.reused
+        self.ttfb.record(phases.ttfb * 1e6)
+        self.body.record(body * 1e6)
+
+    def add(self, other):
+        self.count += other.count
+        self.reused += other.reused
+        self.sums = [a + b for a, b in zip(self.sums, other.sums)]
+        self.ttfb.add(other.ttfb)
+        self.body.add(other.body)
+
+    def encode(self):
+        return {"count": self.count, "reused": self.reused, "sums": self.sums,
+                "ttfb": self.ttfb.encode(), "body": self.body.encode()}
+
+    @classmethod
+    def decode(cls, data):
+        endpoint = cls()
+        endpoint.count = data["count"]
+        endpoint.reused = data["reused"]
+        endpoint.sums = list(data["sums"])
+        endpoint.ttfb = HdrHistogram.decode(data["ttfb"])
+        endpoint.body = HdrHistogram.decode(data["body"])
+        return endpoint
+
+    def row(self):
+        """Averages and p95s in milliseconds, connection reuse in percent."""
+        count = max(1, self.count)
+        averages = [total * 1000 / count for total in self.sums]
+        return [self.count, round(100.0 * self.reused / count, 1)] + [round(value, 2) for value in averages] + [
+            round(self.ttfb.percentile(95) / 1000, 2), round(self.body.percentile(95) / 1000, 2)
+        ]
+
+
+COLUMNS = ["Requests", "Reused %", "DNS ms", "Connect ms", "TTFB ms", "Body ms", "TTFB p95 ms", "Body p95 ms"]
+
+_pending = {}  # endpoint -> EndpointPhases recorded since the last report (workers) / whole run (local)
+_workers = {}  # worker id -> {endpoint: EndpointPhases}, merged on the master
+
+
+def record(request_type, name, response_time, response=None, **kwargs):
+    phases = getattr(response, "phases", None)
+    if phases is None or phases.ttfb is None or response_time is None:
+        return
+    key = f"{request_type} {name}"
+    endpoint = _pending.get(key)
+    if endpoint is None:
+        endpoint = _pending[key] = EndpointPhases()
+    endpoint.record(phases, response_time / 1000)
+
+
+def _report_to_master(client_id, data, **kwargs):
+    global _pending
+    sent, _pending = _pending, {}
+    data[REPORT_KEY] = {key: endpoint.encode() for key, endpoint in sent.items()}
+
+
+def _worker_report(client_id, data, **kwargs):
+    merged = _workers.setdefault(client_id, {})
+    for key, encoded in data.get(REPORT_KEY, {}).items():
+        merged.setdefault(key, EndpointPhases()).add(EndpointPhases.decode(encoded))
+
+
+def merged_endpoints():
+    endpoints = {}
+    for per_worker in _workers.values():
+        for key, endpoint in per_worker.items():
+            endpoints.setdefault(key, EndpointPhases()).add(endpoint)
+    return dict(sorted(endpoints.items()))
+
+
+def write_phases(endpoints, path=OUTPUT):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Endpoint"] + COLUMNS)
+        for key, endpoint in endpoints.items():
+            writer.writerow([key] + endpoint.row())
+    return path
+
+
+def print_phases(endpoints):
+    width = min(70, max(len(key) for key in endpoints))
+    print("[PHASES] " + " | ".join([f"{'Endpoint':<{width}}"] + [f"{column:>11}" for column in COLUMNS]))
+    for key, endpoint in endpoints.items():
+        print("[PHASES] " + " | ".join([f"{key[:width]:<{width}}"] + [f"{value:>11}" for value in endpoint.row()]))
+
+
+@events.init.add_listener
+def _setup(environment, **kwargs):
+    if not ENABLED:
+        return
+    runner = environment.runner
+    if isinstance(runner, MasterRunner):
+        environment.events.worker_report.add_listener(_worker_report)
+        return
+    environment.events.request.add_listener(record)
+    if isinstance(runner, WorkerRunner):
+        environment.events.report_to_master.add_listener(_report_to_master)
+    else:
+        _workers[LOCAL_WORKER] = _pending
+
+
+@events.quitting.add_listener
+def _report_on_quit(environment, **kwargs):
+    if not ENABLED or isinstance(environment.runner, WorkerRunner):
+        return
+    endpoints = merged_endpoints()
+    if endpoints:
+        print_phases(endpoints)
+        print(f"[PHASES] Connection phase breakdown written to {write_phases(endpoints)}")
@@ -0,0 +1,139 @@
+"""Shared retry policy: classified errors, exponential backoff, retry budget.
+
+- Only retryable failures are retried: connection errors (status 0), 429,
+  502/503/504 and Frappe lock errors ("Deadlock", "Lock wait timeout").
+  Other 4xx/5xx answers will not change on a retry and fail immediately.
+- Delays use exponential backoff with full jitter:
+  ``uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))``.
+- A per-process retry budget caps retries at RETRY_BUDGET_RATIO of first
+  attempts (plus RETRY_BUDGET_MIN_PER_SEC), shared by every user. Once it is
+  spent, failures are final, so a degraded ERP does not get extra load.
+
+In Locust stats the plain request name holds one entry per logical call (its
+final outcome). Attempts that were retried are reported under
+``"<name> [retried]"``.
+"""
+import os
+import random
+import re
+import time
+
+from locust import events
+
+from common.naming import stats_name
+
+# ---------------- CONFIG ---------------- #
+MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))  # seconds
+MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))  # seconds
+BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))  # retries per first attempt
+BUDGET_MIN_PER_SEC = float(os.getenv("RETRY_BUDGET_MIN_PER_SEC", "1"))
+RETRYABLE_STATUSES = frozenset(
+    int(code) for code in os.getenv("RETRY_STATUSES", "0,429,502,503,504").split(",") if code.strip()
+)
+RETRYABLE_BODY = re.compile(r"Deadlock|Lock wait timeout|QueryTimeoutError", re.IGNORECASE)
+RETRIED_SUFFIX = " [retried]"
+
+
+def is_retryable(status_code, text=""):
+    """True when a failure is worth retrying (transient server/network state)."""
+    if status_code in RETRYABLE_STATUSES:
+        return True
+    return bool(text) and RETRYABLE_BODY.search(text[:4096]) is not None
+
+
+class RetryBudget:
+    """Token bucket: each first attempt deposits ``ratio`` tokens, each retry spends one."""
+
+    def __init__(self, ratio=BUDGET_RATIO, min_per_sec=BUDGET_MIN_PER_SEC, cap=None):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.cap = cap if cap is not None else max(10.0, min_per_sec * 10)
+        self.balance = self.cap
+        self._refilled_at = time.monotonic()
+
+    def deposit(self):
+        self.balance = min(self.cap, self.balance + self.ratio)
+
+    def try_spend(self):
+        now = time.monotonic()
+        self.balance = min(self.cap, self.balance + (now - self._refilled_at) * self.min_per_sec)
+        self._refilled_at = now
+        if self.balance >= 1:
+            self.balance -= 1
+            return True
+        return False
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY, budget=None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.stats = {"calls": 0, "retries": 0, "budget_exhausted": 0, "gave_up": 0}
+
+    def start(self):
+        """Record a new logical call (first attempt)."""
+        self.stats["calls"] += 1
+        self.budget.deposit()
+
+    def should_retry(self, attempt, status_code, text=""):
+        """Decide whether failed ``attempt`` (0-based) gets another try."""
+        if not is_retryable(status_code, text):
+            return False
+        if attempt + 1 >= self.max_attempts:
+            self.stats["gave_up"] += 1
+            return False
+        if not self.budget.try_spend():
+            self.stats["budget_exhausted"] += 1
+            return False
+        self.stats["retries"] += 1
+        return True
+
+    def backoff(self, attempt):
+        time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt))))
+
+    def request(self, client, method, url, name=None, is_ok=None, **kwargs):
+        """Send a request through ``client`` with retries; returns the last response.
+
+        ``is_ok(response)`` decides success (default: 2xx). Failures are
+        marked on the response, so callers only need to inspect the result.
+        """
+        name = name or url
+        is_ok = is_ok or (lambda resp: 200 <= resp.status_code < 300)
+        context = kwargs.pop("context", {})
+        self.start()
+        for attempt in range(self.max_attempts):
+            # "retries" in the context lets request listeners (raw samples) count earlier attempts.
+            with client.request(method, url, name=name, catch_response=True,
+                                context={**context, "retries": attempt}, **kwargs) as resp:
+                if is_ok(resp):
+                    resp.success()
+                    return resp
+
+                text = (resp.text or "") if resp.status_code else str(getattr(resp, "error", ""))
+                retry = self.should_retry(attempt, resp.status_code, text)
+                if retry:
+                    # Report this attempt separately from final outcomes, named the way the
+                    # client names requests (template, [app] prefix, MAX_STATS_KEYS cap).
+                    resp.request_meta["name"] = stats_name(
+                        str(method).upper(), name + RETRIED_SUFFIX, getattr(client, "app", None)
+                    )
+                resp.failure(f"{name} failed: {resp.status_code} - {text[:200]}")
+            if not retry:
+                return resp
+            self.backoff(attempt)
+        return resp
+
+
+retry_policy = RetryPolicy()
+
+
+@events.quitting.add_listener
+def _report_retries(environment, **kwargs):
+    if retry_policy.stats["retries"] or retry_policy.stats["budget_exhausted"]:
+        print(
+            "[RETRY] calls={calls} retries={retries} budget_exhausted={budget_exhausted} "
+            "gave_up={gave_up}".format(**retry_policy.stats)
+        )
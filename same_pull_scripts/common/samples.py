@@ -0,0 +1,169 @@
+"""Per-worker raw-sample sink: every request as one typed row in Parquet.
+
+``api_responses.csv`` is row-oriented text with truncated bodies and ISO
+timestamps, which is slow to analyse after a long endurance run. With
+RAW_SAMPLES=true each load-generating process (local or worker, not the
+master) also keeps one row per request in typed arrays (common/columnar.py
+lists the columns):
+
+- Recording appends a few integers; endpoint, user class and error type are
+  dictionary codes.
+- Every RAW_SAMPLES_ROW_GROUP rows, or RAW_SAMPLES_FLUSH_INTERVAL seconds,
+  the buffer is handed to a background OS thread that writes it as one
+  compressed row group (RAW_SAMPLES_COMPRESSION, default zstd).
+- Files go to results/samples/ (or RAW_SAMPLES_DIR) as
+  samples-<time>-<host>-<pid>-partNNNN.parquet. A new part starts every
+  RAW_SAMPLES_FILE_ROWS rows, so a crash loses at most the open part.
+
+Analyse them with ``python -m common.columnar results/samples/*.parquet``.
+Needs pyarrow; the run refuses to start when RAW_SAMPLES=true without it.
+"""
+import os
+import socket
+import time
+from collections import deque
+
+from locust import events
+from locust.runners import MasterRunner
+
+from common.columnar import SampleBuffer, require_pyarrow, schema
+from common.csv_sink import _real_sleep, _start_thread  # real OS thread, see csv_sink
+
+# ---------------- CONFIG ---------------- #
+ENABLED = os.getenv("RAW_SAMPLES", "false").lower() == "true"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+OUTPUT_DIR = os.getenv("RAW_SAMPLES_DIR") or os.path.join(REPO_ROOT, "results", "samples")
+ROW_GROUP_ROWS = int(os.getenv("RAW_SAMPLES_ROW_GROUP", "65536"))
+FLUSH_INTERVAL = float(os.getenv("RAW_SAMPLES_FLUSH_INTERVAL", "30"))  # seconds
+FILE_ROWS = int(os.getenv("RAW_SAMPLES_FILE_ROWS", "20000000"))
+COMPRESSION = os.getenv("RAW_SAMPLES_COMPRESSION", "zstd")
+
+
+class RawSampleSink:
+    """Typed in-memory buffer + background Parquet writer for one process."""
+
+    def __init__(self, directory=OUTPUT_DIR, row_group_rows=ROW_GROUP_ROWS, flush_interval=FLUSH_INTERVAL,
+                 file_rows=FILE_ROWS, compression=COMPRESSION):
+        require_pyarrow()
+        import pyarrow.parquet as pq
+
+        self._pq = pq
+        self.directory = directory
+        self.prefix = time.strftime("samples-%Y%m%dT%H%M%S") + f"-{socket.gethostname()}-{os.getpid()}"
+        self.row_group_rows = row_group_rows
+        self.flush_interval = flush_interval
+        self.file_rows = file_rows
+        self.compression = compression
+
+        self.rows = 0
+        self.row_groups = 0
+        self.paths = []
+
+        self._buffer = SampleBuffer()
+        # Full buffers waiting for the writer thread; deque append/popleft are atomic.
+        self._ready = deque()
+        self._writer = None
+        self._file_rows = 0
+        self._closed = False
+        self._stopped = False
+        os.makedirs(directory, exist_ok=True)
+        _start_thread(self._run, ())
+
+    # ---------------- PRODUCER SIDE ---------------- #
+    def record(self, timestamp_ns, endpoint, status, latency_us, length, user_class, retries, failed, error):
+        buffer = self._buffer
+        buffer.append(timestamp_ns, endpoint, status, latency_us, length, user_class, retries, failed, error)
+        if len(buffer) >= self.row_group_rows or time.time() - buffer.started >= self.flush_interval:
+            self.handoff()
+
+    def handoff(self):
+        """Queue the current buffer for writing and start a new one."""
+        buffer = self._buffer
+        if len(buffer):
+            self._buffer = buffer.next_buffer()
+            self._ready.append(buffer)
+
+    def close(self):
+        """Write everything still buffered and close the current part."""
+        if self._closed:
+            return
+        self.handoff()
+        self._closed = True
+        deadline = time.time() + 30
+        while not self._stopped and time.time() < deadline:
+            time.sleep(0.01)
+        self._drain()
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    # ---------------- WRITER SIDE ---------------- #
+    def _write(self, buffer):
+        if self._writer is None or self._file_rows >= self.file_rows:
+            if self._writer:
+                self._writer.close()
+            path = os.path.join(self.directory, f"{self.prefix}-part{len(self.paths) + 1:04d}.parquet")
+            self._writer = self._pq.ParquetWriter(path, schema(), compression=self.compression)
+            self.paths.append(path)
+            self._file_rows = 0
+        batch = buffer.to_record_batch()
+        self._writer.write_batch(batch, row_group_size=len(batch))
+        self._file_rows += len(batch)
+        self.rows += len(batch)
+        self.row_groups += 1
+
+    def _drain(self):
+        while self._ready:
+            self._write(self._ready.popleft())
+
+    def _run(self):
+        while not self._closed:
+            if self._ready:
+                try:
+                    self._drain()
+                except Exception as e:
+                    print(f"[RAW SAMPLES ERROR] {self.prefix}: {e}")
+                continue
+            _real_sleep(0.05)
+        self._stopped = True
+
+
+_sink = None
+
+
+def _record(request_type, name, response_time, response_length, response=None, context=None, exception=None,
+            start_time=None, **kwargs):
+    context = context or {}
+    _sink.record(
+        int((start_time or time.time()) * 1e9),
+        f"{request_type} {name}",
+        getattr(response, "status_code", 0) or 0,
+        int(response_time * 1000),
+        response_length or 0,
+        context.get("user_class", ""),
+        context.get("retries", 0),
+        exception is not None,
+        type(exception).__name__ if exception is not None else "",
+    )
+
+
+@events.init.add_listener
+def _setup(environment, **kwargs):
+    global _sink
+    if not ENABLED or isinstance(environment.runner, MasterRunner):
+        return
+    _sink = RawSampleSink()
+    environment.events.request.add_listener(_record)
+
+
+@events.test_stop.add_listener
+def _flush_on_stop(environment, **kwargs):
+    if _sink:
+        _sink.handoff()
+
+
+@events.quitting.add_listener
+def _close_on_quit(environment, **kwargs):
+    if _sink:
+        _sink.close()
+        print(f"[RAW SAMPLES] {_sink.rows} rows in {_sink.row_groups} row groups: {', '.join(_sink.paths)}")
@@ -0,0 +1,308 @@
+"""Latency-versus-result-size samples and curve fits for list endpoints.
+
+scaling_sweep.py calls ``record()`` for every request of its parameter
+matrix with the response time, the body size and the number of items in the
+result. Workers send their samples to the master with each stats report.
+At the end of the run the master (or a standalone process):
+
+- writes every sample to results/scaling-samples-<time>.csv (or
+  SCALING_SAMPLES_OUTPUT);
+- groups them per endpoint and matrix cell and computes each cell's failure
+  rate, plus its mean size and p50/p95 latency over the successful requests.
+  A cell whose failure rate is over SLA_ERROR_RATE is marked FAIL whatever
+  its latency, so timeouts and errors cannot pass as a fast cell;
+- fits ``p95 = c + b * size ** k`` per endpoint over its cells. The exponent
+  ``k`` is picked from a grid and ``c``/``b`` by least squares, all at once
+  with NumPy. k > 1.1 means latency grows super-linearly with the result;
+- solves the fit for the size at which p95 crosses
+  SLA_HTTP_REQ_DURATION_P95_MS (common/sla.py) and writes a Markdown report
+  to results/scaling-report-<time>.md (or SCALING_REPORT_OUTPUT).
+
+Size is the item count when the endpoint returns a list, else body bytes.
+The report needs numpy. Without it only the samples are written;
+``python -m common.scaling results/scaling-samples-*.csv`` builds the report
+later from any number of sample files.
+"""
+import argparse
+import csv
+import os
+import time
+
+from locust import events
+from locust.runners import MasterRunner, WorkerRunner
+
+from common.sla import ERROR_RATE, HTTP_REQ_DURATION_P95_MS
+
+# ---------------- CONFIG ---------------- #
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SAMPLES_OUTPUT = os.getenv("SCALING_SAMPLES_OUTPUT") or os.path.join(
+    REPO_ROOT, "results", time.strftime("scaling-samples-%Y%m%dT%H%M%S.csv")
+)
+REPORT_OUTPUT = os.getenv("SCALING_REPORT_OUTPUT") or os.path.join(
+    REPO_ROOT, "results", time.strftime("scaling-report-%Y%m%dT%H%M%S.md")
+)
+REPORT_KEY = "scaling_samples"
+COLUMNS = ("endpoint", "width_days", "location", "page_size", "latency_ms", "bytes", "items", "failed")
+MIN_CELLS = 3  # distinct sizes needed for a fit
+SUPER_LINEAR = 1.1
+SUB_LINEAR = 0.9
+
+_pending = []  # sample rows recorded since the last report (workers) / whole run (local)
+_samples = []  # every sample, on the master or a standalone process
+
+
+def count_items(payload):
+    """Items in a Frappe list answer: the ``message`` list, or the first list inside ``message``."""
+    message = payload.get("message") if isinstance(payload, dict) else payload
+    if isinstance(message, list):
+        return len(message)
+    if isinstance(message, dict):
+        for value in message.values():
+            if isinstance(value, list):
+                return len(value)
+    return 0
+
+
+def record(endpoint, latency_ms, length, items, failed, width_days="", location="", page_size=""):
+    _pending.append((endpoint, width_days, location, page_size, round(latency_ms, 3), length, items, int(failed)))
+
+
+# ---------------- ANALYSIS ---------------- #
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("The scaling report needs numpy: pip install numpy") from None
+    return np
+
+
+def load_samples(paths):
+    rows = []
+    for path in paths:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                rows.append(tuple(row[column] for column in COLUMNS))
+    return rows
+
+
+def cell_stats(rows):
+    """Per (endpoint, cell): requests, mean items, mean bytes, p50 and p95 latency, failures.
+
+    Means and percentiles cover the successful samples; they are None when
+    every request of the cell failed.
+    """
+    np = _numpy()
+    if not rows:
+        return []
+    cells = {}
+    codes = np.array([cells.setdefault(tuple(str(value) for value in row[:4]), len(cells)) for row in rows])
+    failed = np.array([bool(int(row[7])) for row in rows])
+    requests = np.bincount(codes, minlength=len(cells))
+    failures = np.bincount(codes[failed], minlength=len(cells))
+    codes = codes[~failed]
+    latency = np.array([float(row[4]) for row in rows])[~failed]
+    length = np.array([float(row[5]) for row in rows])[~failed]
+    items = np.array([float(row[6]) for row in rows])[~failed]
+
+    measured = {}
+    if len(codes):
+        order = np.lexsort((latency, codes))  # by cell, then latency
+        codes, latency, length, items = codes[order], latency[order], length[order], items[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        counts = np.diff(np.r_[starts, len(codes)])
+        p50 = latency[starts + (counts - 1) // 2]
+        p95 = latency[starts + np.ceil(counts * 0.95).astype(np.int64) - 1]
+        mean_items = np.add.reduceat(items, starts) / counts
+        mean_bytes = np.add.reduceat(length, starts) / counts
+        for code, n_items, n_bytes, median, tail in zip(codes[starts], mean_items, mean_bytes, p50, p95):
+            measured[int(code)] = (float(n_items), float(n_bytes), float(median), float(tail))
+
+    return [
+        (key, int(requests[code]), *measured.get(code, (None, None, None, None)), int(failures[code]))
+        for code, key in enumerate(cells)
+    ]
+
+
+def failure_rate(cell):
+    return cell[6] / cell[1]
+
+
+def fit_power(sizes, latencies, exponents=None):
+    """Least-squares ``c + b * size ** k`` over a grid of k; returns (c, b, k, r2)."""
+    np = _numpy()
+    exponents = np.linspace(0.1, 4.0, 391) if exponents is None else exponents
+    x = np.asarray(sizes, dtype=float)
+    y = np.asarray(latencies, dtype=float)
+    scale = x.max()
+    powered = (x / scale)[None, :] ** exponents[:, None]  # one row per exponent
+    centred = powered - powered.mean(axis=1, keepdims=True)
+    variance = (centred ** 2).sum(axis=1)
+    slopes = np.divide((centred * (y - y.mean())).sum(axis=1), variance,
+                       out=np.zeros_like(variance), where=variance > 0)
+    intercepts = y.mean() - slopes * powered.mean(axis=1)
+    errors = ((intercepts[:, None] + slopes[:, None] * powered - y) ** 2).sum(axis=1)
+    best = int(np.argmin(errors))
+    total = ((y - y.mean()) ** 2).sum()
+    r2 = 1 - errors[best] / total if total > 0 else 1.0
+    # Undo the scaling: b * (x / scale) ** k == (b / scale ** k) * x ** k
+    return float(intercepts[best]), float(slopes[best] / scale ** exponents[best]), float(exponents[best]), float(r2)
+
+
+def crossing(c, b, k, threshold):
+    """Size at which ``c + b * size ** k`` reaches ``threshold``; 0 when already above, None when never."""
+    if c >= threshold:
+        return 0.0
+    if b <= 0:
+        return None
+    return ((threshold - c) / b) ** (1 / k)
+
+
+def analyse(rows, sla_ms=HTTP_REQ_DURATION_P95_MS):
+    """{endpoint: {"unit", "cells", "fit", "crossing", "first_over"}}."""
+    per_endpoint = {}
+    for cell in cell_stats(rows):
+        per_endpoint.setdefault(cell[0][0], []).append(cell)
+
+    results = {}
+    for endpoint, cells in per_endpoint.items():
+        measured = [cell for cell in cells if cell[5] is not None]  # cells with a successful request
+        unit = "items" if any(cell[2] > 0 for cell in measured) else "bytes"
+        size_index = 2 if unit == "items" else 3
+        measured.sort(key=lambda cell: cell[size_index])
+        sizes = [cell[size_index] for cell in measured]
+        fit = point = None
+        if len(set(sizes)) >= MIN_CELLS:
+            fit = fit_power(sizes, [cell[5] for cell in measured])
+            point = crossing(*fit[:3], sla_ms)
+        first_over = next((cell for cell in measured if cell[5] > sla_ms), None)
+        results[endpoint] = {"unit": unit, "size_index": size_index,
+                             "cells": measured + [cell for cell in cells if cell[5] is None],
+                             "fit": fit, "crossing": point, "first_over": first_over}
+    return results
+
+
+def _shape(k):
+    if k > SUPER_LINEAR:
+        return "super-linear"
+    if k < SUB_LINEAR:
+        return "sub-linear"
+    return "linear"
+
+
+def _summary(result, sla_ms):
+    unit = result["unit"]
+    if result["fit"] is None:
+        return f"not enough distinct sizes for a fit (need {MIN_CELLS})"
+    c, b, k, r2 = result["fit"]
+    text = f"p95 = {c:.0f} ms + {b:.3g} * {unit}^{k:.2f} ({_shape(k)}, R2 {r2:.2f}); "
+    if result["crossing"] is None:
+        return text + f"stays under {sla_ms:g} ms"
+    if result["crossing"] == 0:
+        return text + f"over {sla_ms:g} ms at any size"
+    return text + f"crosses {sla_ms:g} ms at ~{result['crossing']:,.0f} {unit}"
+
+
+def write_report(results, path=REPORT_OUTPUT, sla_ms=HTTP_REQ_DURATION_P95_MS, error_rate=ERROR_RATE):
+    lines = [
+        "# Latency versus result size",
+        "",
+        f"Generated {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())}. "
+        f"SLA: p95 < {sla_ms:g} ms (SLA_HTTP_REQ_DURATION_P95_MS) and failed requests "
+        f"<= {error_rate:.2%} (SLA_ERROR_RATE). Latency and size cover the successful requests. "
+        "Fit per endpoint over its cells: `p95 = c + b * size^k`.",
+    ]
+    for endpoint, result in sorted(results.items()):
+        fit = result["fit"]
+        lines += ["", f"## {endpoint}", "", _summary(result, sla_ms) + "."]
+        if result["first_over"] is not None:
+            cell = result["first_over"]
+            lines.append(f"Smallest measured cell over the SLA: {cell[result['size_index']]:,.0f} {result['unit']} "
+                         f"(p95 {cell[5]:.0f} ms).")
+        failing = sum(failure_rate(cell) > error_rate for cell in result["cells"])
+        if failing:
+            lines.append(f"Cells over the error rate: {failing} of {len(result['cells'])}.")
+        lines += [
+            "",
+            "| Width (days) | Location | Page size | Requests | Failed | Items | KB | p50 ms | p95 ms "
+            "| Fitted p95 ms | SLA |",
+            "|---:|---|---:|---:|---:|---:|---:|---:|---:|---:|---|",
+        ]
+        for cell in result["cells"]:
+            (_, width, location, page_size), count, items, length, p50, p95, _ = cell
+            over = failure_rate(cell) > error_rate or (p95 is not None and p95 > sla_ms)
+            if p95 is None:  # every request failed
+                measured = "| - | - | - | - | -"
+            else:
+                size = (items, length)[result["size_index"] - 2]
+                fitted = f"{fit[0] + fit[1] * size ** fit[2]:.0f}" if fit else "-"
+                measured = f"| {items:.0f} | {length / 1024:.1f} | {p50:.0f} | {p95:.0f} | {fitted}"
+            lines.append(f"| {width or '-'} | {location or '-'} | {page_size or '-'} | {count} "
+                         f"| {failure_rate(cell):.1%} {measured} | {'FAIL' if over else 'ok'} |")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def write_samples(rows, path=SAMPLES_OUTPUT):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+    return path
+
+
+def report(rows, sla_ms=HTTP_REQ_DURATION_P95_MS, path=REPORT_OUTPUT, error_rate=ERROR_RATE):
+    results = analyse(rows, sla_ms)
+    for endpoint, result in sorted(results.items()):
+        print(f"[SCALING] {endpoint}: {_summary(result, sla_ms)}")
+    return write_report(results, path, sla_ms, error_rate)
+
+
+# ---------------- EVENTS ---------------- #
+def _report_to_master(client_id, data, **kwargs):
+    global _pending
+    sent, _pending = _pending, []
+    data[REPORT_KEY] = sent
+
+
+def _worker_report(client_id, data, **kwargs):
+    _samples.extend(tuple(row) for row in data.get(REPORT_KEY, ()))
+
+
+@events.init.add_listener
+def _setup(environment, **kwargs):
+    runner = environment.runner
+    if isinstance(runner, MasterRunner):
+        environment.events.worker_report.add_listener(_worker_report)
+    elif isinstance(runner, WorkerRunner):
+        environment.events.report_to_master.add_listener(_report_to_master)
+
+
+@events.quitting.add_listener
+def _report_on_quit(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    rows = _samples if isinstance(environment.runner, MasterRunner) else _pending
+    if not rows:
+        return
+    print(f"[SCALING] {len(rows)} samples written to {write_samples(rows)}")
+    try:
+        print(f"[SCALING] Report written to {report(rows)}")
+    except ImportError as e:
+        print(f"[SCALING] {e}; build the report later with: python -m common.scaling <samples.csv>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency-versus-size fits and SLA crossings from scaling samples.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--sla-ms", type=float, default=HTTP_REQ_DURATION_P95_MS, help="p95 threshold")
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE, help="failed share of a cell")
+    parser.add_argument("--output", default=REPORT_OUTPUT)
+    args = parser.parse_args()
+    print(f"Report written to {report(load_samples(args.files), args.sla_ms, args.output, args.error_rate)}")
+
+
+if __name__ == "__main__":
+    main()
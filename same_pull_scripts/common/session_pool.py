@@ -0,0 +1,246 @@
+"""Process-wide pool of Frappe login sessions shared between virtual users.
+
+Instead of every virtual user calling /api/method/login from on_start, each
+credential is logged in once (or SESSION_POOL_SIZE times) per process and the
+resulting sid cookies and CSRF token are copied into each user's client.
+
+A request answered with 401/403 only marks its user for a refresh; the new
+login happens just before that user's next request, outside the request
+event, so listeners never block on a login.
+"""
+import itertools
+import os
+import time
+from functools import lru_cache
+
+from gevent.lock import BoundedSemaphore
+from locust import events
+
+from common.users import cookie_jar
+
+# ---------------- CONFIG ---------------- #
+POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "1"))  # logins per credential per process
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))  # seconds before a session is re-created
+MIN_REFRESH_AGE = float(os.getenv("SESSION_MIN_REFRESH_AGE", "30"))  # ignore 401/403 on younger sessions
+CSRF_PATH = os.getenv("SESSION_CSRF_PATH", "/api/method/core.api.csrf.token")  # empty disables
+LOGIN_PATH = "/api/method/login"
+LOGIN_NAME = "/api/method/login [session pool]"
+CSRF_NAME = "/api/method/core.api.csrf.token [session pool]"
+AUTH_ERROR_STATUSES = (401, 403)
+POOL_CONTEXT = {"session_pool": True}  # request context of the pool's own calls; the name may carry an [app] prefix
+
+
+class LoginFailed(Exception):
+    """Raised when the pool could not log a credential in."""
+
+    def __init__(self, usr, status_code, text):
+        super().__init__(f"Login failed for {usr}: {status_code} - {text}")
+        self.usr = usr
+        self.status_code = status_code
+        self.text = text or ""
+
+
+_generations = itertools.count(1)
+
+
+class PooledSession:
+    """One logged-in Frappe session (cookies + CSRF token)."""
+
+    def __init__(self, usr, cookies, csrf_token):
+        self.usr = usr
+        self.cookies = cookies
+        self.csrf_token = csrf_token
+        self.created_at = time.monotonic()
+        self.generation = next(_generations)
+
+    def age(self):
+        return time.monotonic() - self.created_at
+
+    def expired(self):
+        return SESSION_TTL > 0 and self.age() >= SESSION_TTL
+
+
+class SessionPool:
+    def __init__(self, size=POOL_SIZE):
+        self.size = max(1, size)
+        self._slots = {}  # usr -> [PooledSession | None] * size
+        self._locks = {}  # (usr, slot) -> BoundedSemaphore
+        self._cursor = {}  # usr -> round-robin counter
+        self.stats = {"logins": 0, "login_failures": 0, "reuses": 0, "refreshes": 0}
+        self._logging_in = set()  # users inside _login, which must not be re-entered
+
+    # ---------------- PUBLIC API ---------------- #
+    def acquire(self, user, creds):
+        """Attach a pooled session for ``creds`` to ``user`` and return it."""
+        usr = creds["usr"]
+        slots = self._slots.setdefault(usr, [None] * self.size)
+        slot = next(self._cursor.setdefault(usr, itertools.cycle(range(self.size))))
+
+        session = slots[slot]
+        if session is None or session.expired():
+            session = self._login(user, creds, slot, stale=session)
+        else:
+            self.stats["reuses"] += 1
+
+        self._apply(user, session)
+        user._pooled_session = (creds, slot, session.generation)
+        return session
+
+    def refresh(self, user):
+        """Replace the user's session after the server rejected it (401/403)."""
+        pooled = getattr(user, "_pooled_session", None)
+        if pooled is None:
+            return None
+        creds, slot, generation = pooled
+        current = self._slots[creds["usr"]][slot]
+
+        if current is not None and current.generation != generation:
+            # Another user already refreshed this slot; just pick up its cookies.
+            session = current
+        elif current is not None and current.age() < MIN_REFRESH_AGE:
+            # Too fresh to be expired; most likely a genuine permission error.
+            return current
+        else:
+            self.stats["refreshes"] += 1
+            session = self._login(user, creds, slot, stale=current)
+
+        self._apply(user, session)
+        user._pooled_session = (creds, slot, session.generation)
+        return session
+
+    # ---------------- INTERNALS ---------------- #
+    def _login(self, user, creds, slot, stale):
+        usr = creds["usr"]
+        if user in self._logging_in:
+            # A request listener tried to log in again while this user's login was running;
+            # waiting for the slot's lock would block the greenlet that holds it.
+            raise LoginFailed(usr, None, "login re-entered during the user's own login")
+        lock = self._locks.setdefault((usr, slot), BoundedSemaphore(1))
+        self._logging_in.add(user)
+        try:
+            with lock:
+                # Another greenlet may have logged in while we were waiting.
+                current = self._slots[usr][slot]
+                if current is not None and current is not stale and not current.expired():
+                    self.stats["reuses"] += 1
+                    return current
+
+                jar = cookie_jar(user.client)
+                jar.clear()
+                with user.client.post(LOGIN_PATH, json=creds, name=LOGIN_NAME,
+                                      context=POOL_CONTEXT, catch_response=True) as resp:
+                    try:
+                        logged_in = resp.status_code == 200 and resp.json().get("message") == "Logged In"
+                    except Exception:
+                        logged_in = False
+                    if not logged_in:
+                        self.stats["login_failures"] += 1
+                        resp.failure(f"Login failed for {usr}: {resp.status_code}")
+                        raise LoginFailed(usr, resp.status_code, resp.text)
+                    resp.success()
+
+                self.stats["logins"] += 1
+                session = PooledSession(usr, list(jar), self._fetch_csrf(user))
+                self._slots[usr][slot] = session
+                return session
+        finally:
+            self._logging_in.discard(user)
+
+    def _fetch_csrf(self, user):
+        if not CSRF_PATH:
+            return None
+        with user.client.get(CSRF_PATH, name=CSRF_NAME, context=POOL_CONTEXT, catch_response=True) as resp:
+            try:
+                token = resp.json().get("message") if resp.status_code == 200 else None
+            except Exception:
+                token = None
+            if isinstance(token, dict):
+                token = token.get("csrf_token")
+            if not isinstance(token, str):
+                # Not fatal for the login; GET traffic works without a token.
+                resp.failure(f"No CSRF token: {resp.status_code}")
+                return None
+            resp.success()
+            return token
+
+    def _apply(self, user, session):
+        jar = cookie_jar(user.client)
+        jar.clear()
+        for cookie in session.cookies:
+            jar.set_cookie(cookie)
+        if session.csrf_token:
+            user.session_headers = {"X-Frappe-CSRF-Token": session.csrf_token}
+        else:
+            user.session_headers = {}
+
+
+pool = SessionPool()
+
+
+class RefreshingSessionMixin:
+    """Client mixin that runs a user's pending pool refresh before its next request."""
+
+    def request(self, *args, **kwargs):
+        user = self.user
+        if user is not None and user.session_refresh_due:
+            user.session_refresh_due = False
+            try:
+                pool.refresh(user)
+            except LoginFailed as e:
+                print(f"[SESSION POOL] {e}")
+        return super().request(*args, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def _refreshing_client_class(client_class):
+    return type(client_class.__name__, (RefreshingSessionMixin, client_class), {})
+
+
+class SessionPoolMixin:
+    """Mixin for HttpUser classes that log in through the shared pool.
+
+    Use ``self.login_from_pool(creds)`` in on_start. A request answered with
+    401/403 schedules a pool refresh that runs before the user's next request.
+    """
+
+    session_headers = {}
+    session_refresh_due = False
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        self.client.__class__ = _refreshing_client_class(type(self.client))
+
+    def login_from_pool(self, creds):
+        """Attach a pooled session, or return None if the login failed.
+
+        The failed login is already recorded in Locust's stats; callers that
+        need the server's error text can use ``pool.acquire`` directly.
+        """
+        try:
+            return pool.acquire(self, creds)
+        except LoginFailed as e:
+            print(f"[SESSION POOL] {e}")
+            return None
+
+    def context(self):
+        return {**super().context(), "session_user": self}
+
+
+@events.request.add_listener
+def _refresh_on_auth_error(response=None, context=None, **kwargs):
+    if not context or context.get("session_pool"):
+        return
+    user = context.get("session_user")
+    status = getattr(response, "status_code", None)
+    if user is not None and status in AUTH_ERROR_STATUSES:
+        # Logging in from here would block the request event until the login returned.
+        user.session_refresh_due = True
+
+
+@events.quitting.add_listener
+def _report_pool(environment, **kwargs):
+    if any(pool.stats.values()):
+        print(
+            "[SESSION POOL] logins={logins} login_failures={login_failures} "
+            "reuses={reuses} refreshes={refreshes}".format(**pool.stats)
+        )
@@ -0,0 +1,127 @@
+"""Locust load shapes mirroring the k6 test types in config/scenarios.js.
+
+The same env knobs drive both tools: TEST_TYPE, VUS, DURATION, TARGET_VUS,
+RAMP_UP, STEADY_STATE and RAMP_DOWN. ``constant-vus`` scenarios start every
+user at once; ``ramping-vus`` scenarios interpolate linearly between stage
+targets, starting from 0 users like k6 does.
+"""
+import math
+import os
+import re
+
+from locust import LoadTestShape
+
+# ---------------- CONFIG ---------------- #
+TEST_TYPE = os.getenv("TEST_TYPE", "smoke").lower()
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    """Parse a k6 duration string such as "30s", "10m" or "1h30m" to seconds."""
+    text = str(value).strip()
+    if re.fullmatch(r"\d+(\.\d+)?", text):
+        return float(text)
+    parts = _DURATION_PART.findall(text)
+    if not parts or "".join(n + u for n, u in parts) != text:
+        raise ValueError(f"Invalid duration {value!r}")
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts)
+
+
+def _env_int(name, fallback):
+    return int(os.getenv(name) or fallback)
+
+
+def _env(name, fallback):
+    return os.getenv(name) or fallback
+
+
+def scenario_catalog():
+    """Return {test_type: (executor, stages)} with the same defaults as config/scenarios.js.
+
+    ``stages`` is a list of (duration_seconds, target_users).
+    """
+    target = lambda fallback: _env_int("TARGET_VUS", fallback)  # noqa: E731
+    return {
+        "smoke": ("constant-vus", [(parse_duration(_env("DURATION", "2m")), _env_int("VUS", 1))]),
+        "baseline": ("constant-vus", [(parse_duration(_env("DURATION", "10m")), _env_int("VUS", 10))]),
+        "load": ("ramping-vus", [
+            (parse_duration(_env("RAMP_UP", "10m")), target(300)),
+            (parse_duration(_env("STEADY_STATE", "30m")), target(300)),
+            (parse_duration(_env("RAMP_DOWN", "5m")), 0),
+        ]),
+        "stress": ("ramping-vus", [
+            (parse_duration("10m"), 300),
+            (parse_duration("15m"), 600),
+            (parse_duration("15m"), target(750)),
+            (parse_duration("10m"), 0),
+        ]),
+        "spike": ("ramping-vus", [
+            (parse_duration("2m"), 50),
+            (parse_duration("1m"), target(600)),
+            (parse_duration("5m"), target(600)),
+            (parse_duration("2m"), 50),
+            (parse_duration("2m"), 0),
+        ]),
+        "endurance": ("constant-vus", [(parse_duration(_env("DURATION", "4h")), _env_int("VUS", 300))]),
+        "sla": ("constant-vus", [(parse_duration(_env("DURATION", "30m")), _env_int("VUS", 300))]),
+        "capacity": ("ramping-vus", [
+            (parse_duration("10m"), 100),
+            (parse_duration("10m"), 200),
+            (parse_duration("10m"), 300),
+            (parse_duration("10m"), 450),
+            (parse_duration("10m"), 600),
+            (parse_duration("10m"), 0),
+        ]),
+    }
+
+
+def scenario_for(test_type=TEST_TYPE):
+    catalog = scenario_catalog()
+    if test_type not in catalog:
+        raise ValueError(f'Invalid TEST_TYPE="{test_type}". Must be one of: {", ".join(catalog)}')
+    return catalog[test_type]
+
+
+def peak_users(test_type=TEST_TYPE):
+    """Highest user count the scenario reaches."""
+    return max(users for _, users in scenario_for(test_type)[1])
+
+
+class ScenarioShape(LoadTestShape):
+    """Runs the TEST_TYPE scenario from config/scenarios.js.
+
+    Activate it next to any script with ``locust -f <script>.py,scenario_shape.py``.
+    """
+
+    test_type = TEST_TYPE
+
+    def __init__(self):
+        super().__init__()
+        executor, stages = scenario_for(self.test_type)
+        self.executor = executor
+        # (end_time, start_users, end_users) segments
+        self.segments = []
+        elapsed, users = 0.0, 0
+        for duration, target in stages:
+            start = target if executor == "constant-vus" else users
+            self.segments.append((elapsed + duration, start, target))
+            elapsed += duration
+            users = target
+
+    def tick(self):
+        run_time = self.get_run_time()
+        segment_start = 0.0
+        for end_time, start_users, end_users in self.segments:
+            if run_time < end_time:
+                length = end_time - segment_start
+                progress = (run_time - segment_start) / length if length else 1.0
+                users = start_users + (end_users - start_users) * progress
+                users = math.ceil(users) if end_users >= start_users else math.floor(users)
+                # Spawn at the stage slope; constant/flat stages get everyone at once.
+                slope = abs(end_users - start_users) / length if length else 0
+                spawn_rate = max(1.0, slope) if slope else max(1.0, float(end_users))
+                return users, spawn_rate
+            segment_start = end_time
+        return None
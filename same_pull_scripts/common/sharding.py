@@ -0,0 +1,174 @@
+"""Disjoint credential / test-data slices per distributed Locust worker.
+
+Scripts wrap their module-level pools with ``sharded_pool(name, records)``
+and users draw from it with ``.next()``:
+
+- Standalone runs use the whole pool.
+- In master/worker mode the master partitions every pool (``records[i::n]``
+  for worker ``i`` of ``n``) and sends each worker its own slice when the test
+  starts. When workers join or leave, the pools are partitioned again and the
+  new slices are sent out. Users that are already running keep their record;
+  users spawned later draw from the new slice.
+- If a pool has fewer records than there are workers, a disjoint split is not
+  possible. Worker ``i`` then gets ``records[i % len(records)]`` and a warning
+  is logged.
+
+``next()`` is round-robin over the slice and does not take a lock: the
+counter is a C-level ``itertools.count``. Pools created with ``unique=True``
+hand out each record at most once and then raise ``PoolExhausted``. The
+records a process has handed out are remembered across rebalances, so a new
+slice never gives them out again on that process. A record that a rebalance
+moves to another worker is not known there, so keep the worker set stable
+during runs that depend on unique records.
+
+Data discovered at run time (e.g. pending approvals) can be split the same
+way with ``owns(key)``, which hashes the key onto the worker's shard.
+"""
+import itertools
+import json
+import logging
+import zlib
+
+import gevent
+from locust import events
+from locust.runners import STATE_MISSING, MasterRunner, WorkerRunner
+
+# ---------------- CONFIG ---------------- #
+MESSAGE_TYPE = "shard_assign"
+REBALANCE_CHECK_INTERVAL = 1.0  # seconds between worker-set checks on the master
+
+_pools = {}
+_shard = {"index": 0, "count": 1}  # this process's position among the workers
+
+
+class PoolExhausted(LookupError):
+    """A ``unique`` pool has handed out every record of its slice."""
+
+
+class ShardedPool:
+    def __init__(self, name, records, unique=False):
+        if not records:
+            raise ValueError(f'Pool "{name}" is empty')
+        self.name = name
+        self.records = list(records)
+        self.unique = unique
+        self._issued = set()  # keys of the records a unique pool handed out; kept across assign()
+        self.assign(list(self.records))
+
+    def assign(self, records, index=0, count=1):
+        """Replace this process's slice (called on every (re)balance)."""
+        self.slice = records
+        self.index = index
+        self.count = count
+        self._counter = itertools.count()
+
+    def partition(self, index, count):
+        """Slice of the full pool for worker ``index`` of ``count``."""
+        if len(self.records) >= count:
+            return self.records[index::count]
+        return [self.records[index % len(self.records)]]
+
+    def next(self, user=None):
+        """Next record of the slice; ``user`` is accepted so callers can treat pools and CSV feeders alike."""
+        if self.unique:
+            return self._next_unique()
+        return self.slice[next(self._counter) % len(self.slice)]
+
+    def _next_unique(self):
+        for position in self._counter:
+            if position >= len(self.slice):
+                break
+            record = self.slice[position]
+            key = _record_key(record)
+            if key not in self._issued:
+                self._issued.add(key)
+                return record
+        raise PoolExhausted(f'Pool "{self.name}" exhausted ({len(self.slice)} records on this worker)')
+
+
+def _record_key(record):
+    """Hashable identity of a pool record; slices arrive on workers as copies."""
+    return json.dumps(record, sort_keys=True, default=str)
+
+
+def current_shard():
+    """(index, count) of this worker; (0, 1) for standalone runs."""
+    return _shard["index"], _shard["count"]
+
+
+def owns(key):
+    """True when ``key`` (e.g. a record name) belongs to this worker's shard."""
+    index, count = current_shard()
+    return count == 1 or zlib.crc32(str(key).encode()) % count == index
+
+
+def sharded_pool(name, records, unique=False):
+    """Register (or return the already registered) pool called ``name``."""
+    pool = _pools.get(name)
+    if pool is None:
+        pool = _pools[name] = ShardedPool(name, records, unique)
+    elif pool.records != list(records):
+        raise ValueError(f'Pool "{name}" is already registered with different records')
+    return pool
+
+
+# ---------------- MASTER ---------------- #
+def _active_workers(runner):
+    workers = [node.id for node in runner.clients.values() if node.state != STATE_MISSING]
+    return sorted(workers, key=runner.get_worker_index)
+
+
+def _send_slices(runner, workers):
+    count = len(workers)
+    for name, pool in _pools.items():
+        if len(pool.records) < count:
+            logging.warning(
+                f'[SHARDING] Pool "{name}" has {len(pool.records)} records for {count} workers; '
+                "some records are shared between workers."
+            )
+    for index, worker_id in enumerate(workers):
+        runner.send_message(
+            MESSAGE_TYPE,
+            {
+                "index": index,
+                "count": count,
+                "pools": {name: pool.partition(index, count) for name, pool in _pools.items()},
+            },
+            client_id=worker_id,
+        )
+    logging.info(f"[SHARDING] Sent {len(_pools)} pool slice(s) to {count} worker(s)")
+
+
+def _rebalance_loop(runner):
+    assigned = None
+    while True:
+        workers = _active_workers(runner)
+        if workers and workers != assigned:
+            _send_slices(runner, workers)
+            assigned = workers
+        gevent.sleep(REBALANCE_CHECK_INTERVAL)
+
+
+def _on_test_start(environment, **kwargs):
+    # Fires on the master before the first spawn message is sent, so workers
+    # hold their slice before any user starts.
+    _send_slices(environment.runner, _active_workers(environment.runner))
+
+
+# ---------------- WORKER ---------------- #
+def _on_assign(environment, msg, **kwargs):
+    _shard.update(index=msg.data["index"], count=msg.data["count"])
+    for name, records in msg.data["pools"].items():
+        if name in _pools:
+            _pools[name].assign(records, msg.data["index"], msg.data["count"])
+    logging.info(f"[SHARDING] Worker slice {msg.data['index'] + 1}/{msg.data['count']} assigned")
+
+
+@events.init.add_listener
+def _setup(environment, **kwargs):
+    runner = environment.runner
+    if isinstance(runner, WorkerRunner):
+        runner.register_message(MESSAGE_TYPE, _on_assign)
+    elif isinstance(runner, MasterRunner):
+        environment.events.test_start.add_listener(_on_test_start)
+        runner.greenlet.spawn(_rebalance_loop, runner)
@@ -0,0 +1,310 @@
+"""Streaming SLA evaluation with early abort, using the k6 thresholds.
+
+The thresholds are read from the same variables and defaults as
+config/slas.js (see .env.example):
+
+    SLA_HTTP_REQ_DURATION_P95_MS  2000    http_req_duration p(95) < value
+    SLA_HTTP_REQ_DURATION_P99_MS  5000    http_req_duration p(99) < value
+    SLA_ERROR_RATE                0.01    http_req_failed rate < value
+    SLA_SERVER_ERROR_RATE         0.001   server_error_rate < value
+    SLA_BUSINESS_FAILURE_RATE     0.02    business_failure_rate < value
+
+Requests are classified like src/core/metrics.js: a server error is a 5xx
+answer; a business failure is a failed request, a server error or a
+400/401/403/422 answer.
+
+The evaluator is opt-in (SLA_EVALUATOR=true). Workers send per-endpoint
+slices (HDR histogram and counters) with every stats report. The master, or
+a standalone process, keeps the last SLA_WINDOW seconds of them and checks
+every threshold, overall and for each endpoint with at least
+SLA_MIN_REQUESTS requests in the window, every SLA_CHECK_INTERVAL seconds.
+Breaches are printed. With SLA_ABORT_AFTER > 0 (default 0: never abort),
+breaches that last that many seconds stop the run with the reason and exit
+code 1.
+
+At the end the whole run is evaluated against the same thresholds and a
+JUnit report like src/core/junitReport.js is written to
+results/junit-locust-<time>.xml (or SLA_JUNIT_OUTPUT). A failed evaluation
+makes the exit code 1 only with SLA_EXIT_CODE=true; shapes that overload on
+purpose (common/capacity.py) turn that off again through
+``evaluator.sets_exit_code``.
+"""
+import os
+import time
+from collections import deque
+from xml.sax.saxutils import escape, quoteattr
+
+import gevent
+from locust import events
+from locust.runners import MasterRunner, WorkerRunner
+
+from common.hdr import HdrHistogram
+
+
+def _number_from_env(name, fallback):
+    # Same rule as numberFromEnv in config/slas.js: invalid or negative values use the default.
+    try:
+        value = float(os.getenv(name, ""))
+    except ValueError:
+        return fallback
+    return value if value >= 0 else fallback
+
+
+# ---------------- CONFIG ---------------- #
+ENABLED = os.getenv("SLA_EVALUATOR", "false").lower() == "true"
+HTTP_REQ_DURATION_P95_MS = _number_from_env("SLA_HTTP_REQ_DURATION_P95_MS", 2000)
+HTTP_REQ_DURATION_P99_MS = _number_from_env("SLA_HTTP_REQ_DURATION_P99_MS", 5000)
+ERROR_RATE = _number_from_env("SLA_ERROR_RATE", 0.01)
+SERVER_ERROR_RATE = _number_from_env("SLA_SERVER_ERROR_RATE", 0.001)
+BUSINESS_FAILURE_RATE = _number_from_env("SLA_BUSINESS_FAILURE_RATE", 0.02)
+WINDOW = float(os.getenv("SLA_WINDOW", "60"))  # seconds
+CHECK_INTERVAL = float(os.getenv("SLA_CHECK_INTERVAL", "3"))  # seconds
+ABORT_AFTER = float(os.getenv("SLA_ABORT_AFTER", "0"))  # seconds of sustained breach; 0 = never abort
+EXIT_CODE = os.getenv("SLA_EXIT_CODE", "false").lower() == "true"  # failed final evaluation -> exit code 1
+MIN_REQUESTS = int(os.getenv("SLA_MIN_REQUESTS", "50"))
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+JUNIT_OUTPUT = os.getenv("SLA_JUNIT_OUTPUT") or os.path.join(
+    REPO_ROOT, "results", time.strftime("junit-locust-%Y%m%dT%H%M%S.xml")
+)
+REPORT_KEY = "sla_slices"
+OVERALL = "overall"
+VALIDATION_STATUSES = frozenset((400, 401, 403, 422))
+
+
+class Slice:
+    """Counters and latency histogram of one endpoint over some interval."""
+
+    __slots__ = ("histogram", "requests", "failures", "server_errors", "business_failures")
+
+    def __init__(self):
+        self.histogram = HdrHistogram()
+        self.requests = self.failures = self.server_errors = self.business_failures = 0
+
+    def record(self, response_time, status, failed):
+        server_error = status >= 500
+        self.histogram.record(response_time * 1000)
+        self.requests += 1
+        self.failures += failed
+        self.server_errors += server_error
+        self.business_failures += failed or server_error or status in VALIDATION_STATUSES
+
+    def add(self, other):
+        self.histogram.add(other.histogram)
+        self.requests += other.requests
+        self.failures += other.failures
+        self.server_errors += other.server_errors
+        self.business_failures += other.business_failures
+        return self
+
+    def encode(self):
+        return [self.histogram.encode(), self.requests, self.failures, self.server_errors, self.business_failures]
+
+    @classmethod
+    def decode(cls, data):
+        piece = cls()
+        piece.histogram = HdrHistogram.decode(data[0])
+        piece.requests, piece.failures, piece.server_errors, piece.business_failures = data[1:]
+        return piece
+
+
+# (metric, value of a Slice, threshold); a threshold passes when value < threshold, as in k6.
+THRESHOLDS = (
+    ("http_req_duration p(95)", lambda s: s.histogram.percentile(95) / 1000, HTTP_REQ_DURATION_P95_MS),
+    ("http_req_duration p(99)", lambda s: s.histogram.percentile(99) / 1000, HTTP_REQ_DURATION_P99_MS),
+    ("http_req_failed rate", lambda s: s.failures / s.requests, ERROR_RATE),
+    ("server_error_rate", lambda s: s.server_errors / s.requests, SERVER_ERROR_RATE),
+    ("business_failure_rate", lambda s: s.business_failures / s.requests, BUSINESS_FAILURE_RATE),
+)
+
+
+def merge(slice_maps):
+    """Add up {endpoint: Slice} maps; the result also has an OVERALL entry."""
+    merged = {OVERALL: Slice()}
+    for slices in slice_maps:
+        for endpoint, piece in slices.items():
+            merged.setdefault(endpoint, Slice()).add(piece)
+            merged[OVERALL].add(piece)
+    return merged
+
+
+def evaluate(merged, min_requests=MIN_REQUESTS):
+    """[(scope, metric, value, threshold, passed)] for OVERALL and every endpoint with enough requests."""
+    results = []
+    for scope in [OVERALL] + sorted(key for key in merged if key != OVERALL):
+        piece = merged[scope]
+        if not piece.requests or (scope != OVERALL and piece.requests < min_requests):
+            continue
+        for metric, measure, threshold in THRESHOLDS:
+            value = measure(piece)
+            results.append((scope, metric, value, threshold, value < threshold))
+    return results
+
+
+def _describe(result):
+    scope, metric, value, threshold, _ = result
+    return f"{scope}: {metric}={value:.4g} (threshold < {threshold:g})"
+
+
+def junit_report(results, aborted_reason=None):
+    """JUnit XML with one testcase per threshold, laid out like src/core/junitReport.js."""
+    cases = []
+    for scope, metric, value, threshold, passed in results:
+        failure = "" if passed else (
+            f'\n      <failure message="SLA breach">{escape(_describe((scope, metric, value, threshold, passed)))}</failure>\n    '
+        )
+        cases.append(f'    <testcase classname={quoteattr("locust." + scope)} name={quoteattr(metric)}>{failure}</testcase>')
+    if aborted_reason:
+        cases.append(
+            '    <testcase classname="locust" name="run completed without SLA abort">\n'
+            f'      <failure message="Run aborted">{escape(aborted_reason)}</failure>\n    </testcase>'
+        )
+    failures = sum(not passed for *_, passed in results) + bool(aborted_reason)
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n'
+        f'  <testsuite name="locust SLA checks" tests="{len(cases)}" failures="{failures}" timestamp="{timestamp}">\n'
+        + "\n".join(cases) + "\n  </testsuite>\n</testsuites>\n"
+    )
+
+
+class SlaEvaluator:
+    """Rolling window of slices with sustained-breach detection."""
+
+    def __init__(self, window=WINDOW, abort_after=ABORT_AFTER, min_requests=MIN_REQUESTS):
+        self.window = window
+        self.abort_after = abort_after
+        self.min_requests = min_requests
+        self.sets_exit_code = EXIT_CODE  # False: the final verdict is reported but does not fail the run
+        self.pending = {}  # endpoint -> Slice since the last check (local requests or worker reports)
+        self.slices = deque()  # (time, {endpoint: Slice})
+        self.run_slices = {}  # endpoint -> Slice over the whole run
+        self.breach_since = None
+        self.aborted_reason = None
+
+    def add(self, slices):
+        for endpoint, piece in slices.items():
+            self.pending.setdefault(endpoint, Slice()).add(piece)
+
+    def roll(self, now):
+        """Move pending slices into the window and the run totals; drop slices older than the window."""
+        pending, self.pending = self.pending, {}
+        if pending:
+            self.slices.append((now, pending))
+            for endpoint, piece in pending.items():
+                self.run_slices.setdefault(endpoint, Slice()).add(piece)
+        while self.slices and self.slices[0][0] <= now - self.window:
+            self.slices.popleft()
+
+    def check(self, now):
+        """Evaluate the window; returns the abort reason once breaches have lasted ``abort_after`` seconds."""
+        self.roll(now)
+        breaches = [r for r in evaluate(merge(s for _, s in self.slices), self.min_requests) if not r[4]]
+        if not breaches:
+            if self.breach_since is not None:
+                print("[SLA] Back within thresholds")
+            self.breach_since = None
+            return None
+        if self.breach_since is None:
+            self.breach_since = now
+            print(f"[SLA] Breach in the last {self.window:g}s: " + "; ".join(_describe(b) for b in breaches))
+        if self.abort_after and now - self.breach_since >= self.abort_after:
+            self.aborted_reason = (
+                f"SLA breached for {now - self.breach_since:.0f}s (window {self.window:g}s): "
+                + "; ".join(_describe(b) for b in breaches)
+            )
+            return self.aborted_reason
+        return None
+
+
+evaluator = SlaEvaluator()
+_pending = {}  # endpoint -> Slice since the last report (workers) / check (local)
+_check_greenlet = None
+
+
+def _record(request_type, name, response_time, response=None, exception=None, **kwargs):
+    key = f"{request_type} {name}"
+    piece = _pending.get(key)
+    if piece is None:
+        piece = _pending[key] = Slice()
+    piece.record(response_time, getattr(response, "status_code", 0) or 0, exception is not None)
+
+
+def _report_to_master(client_id, data, **kwargs):
+    global _pending
+    sent, _pending = _pending, {}
+    data[REPORT_KEY] = {key: piece.encode() for key, piece in sent.items()}
+
+
+def _worker_report(client_id, data, **kwargs):
+    evaluator.add({key: Slice.decode(value) for key, value in data.get(REPORT_KEY, {}).items()})
+
+
+def _take_local():
+    global _pending
+    sent, _pending = _pending, {}
+    evaluator.add(sent)
+
+
+def _check_loop(environment):
+    local = not isinstance(environment.runner, MasterRunner)
+    while True:
+        gevent.sleep(CHECK_INTERVAL)
+        if local:
+            _take_local()
+        reason = evaluator.check(time.time())
+        if reason:
+            print(f"[SLA] Aborting run: {reason}")
+            environment.process_exit_code = 1
+            # quit() kills the runner's greenlets, this one included; run it outside of them.
+            gevent.spawn(environment.runner.quit)
+            return
+
+
+@events.init.add_listener
+def _setup(environment, **kwargs):
+    if not ENABLED:
+        return
+    runner = environment.runner
+    if isinstance(runner, WorkerRunner):
+        environment.events.request.add_listener(_record)
+        environment.events.report_to_master.add_listener(_report_to_master)
+        return
+    if isinstance(runner, MasterRunner):
+        environment.events.worker_report.add_listener(_worker_report)
+    else:
+        environment.events.request.add_listener(_record)
+
+
+@events.test_start.add_listener
+def _start_checks(environment, **kwargs):
+    global _check_greenlet
+    if ENABLED and not isinstance(environment.runner, WorkerRunner) and _check_greenlet is None:
+        _check_greenlet = environment.runner.greenlet.spawn(_check_loop, environment)
+
+
+@events.test_stop.add_listener
+def _stop_checks(environment, **kwargs):
+    global _check_greenlet
+    if _check_greenlet is not None:
+        _check_greenlet.kill(block=False)
+        _check_greenlet = None
+
+
+@events.quitting.add_listener
+def _final_report(environment, **kwargs):
+    if not ENABLED or isinstance(environment.runner, WorkerRunner):
+        return
+    _take_local()
+    evaluator.roll(time.time())
+    results = evaluate(merge([evaluator.run_slices]), evaluator.min_requests)
+    if not results:
+        return
+    failed = [r for r in results if not r[4]]
+    os.makedirs(os.path.dirname(JUNIT_OUTPUT), exist_ok=True)
+    with open(JUNIT_OUTPUT, "w", encoding="utf-8") as f:
+        f.write(junit_report(results, evaluator.aborted_reason))
+    for result in failed:
+        print(f"[SLA] FAILED {_describe(result)}")
+    print(f"[SLA] {len(results) - len(failed)}/{len(results)} thresholds passed; JUnit report: {JUNIT_OUTPUT}")
+    if (failed or evaluator.aborted_reason) and evaluator.sets_exit_code:
+        environment.process_exit_code = 1
@@ -0,0 +1,247 @@
+"""Run id tagging, a journal of created records and batched teardown.
+
+The write-path tasks (assignments, travel requests, visitor records) create
+rows that nobody deletes, so staging tables grow from run to run. This
+module lets every run clean up after itself:
+
+- ``RUN_ID`` (env RUN_ID, default ``lt-<time>-<random>``) names the run.
+  The master sends its id to the workers when the test starts, so all
+  records of one run carry the same id. ``run_tag(text)`` appends it to a
+  free-text field of the payload, e.g. "P1-Test-123 [lt-20251124T151944-3fa2]".
+- ``created(kind, response)`` reads the new record's name from a successful
+  Frappe answer (``message.name``) and appends ``kind<TAB>name`` to this
+  process's journal, results/teardown/<run id>-<host>-<pid>.tsv (or
+  TEARDOWN_DIR). The file is line-buffered, so it survives a crashed run.
+  Answers without a name are counted as untracked.
+- At the end of the run each process (each worker in distributed mode)
+  deletes the records in its journal through
+  ``frappe.desk.reportview.delete_items``: TEARDOWN_BATCH_SIZE names per
+  call (at most 10; Frappe hands larger batches to a background job),
+  at most TEARDOWN_RATE calls per second, authenticated with
+  TEARDOWN_API_KEY/TEARDOWN_API_SECRET. delete_items answers 200 even when
+  single records could not be deleted, so every batch is checked with
+  ``frappe.client.get_list`` afterwards. Deleted records leave the journal
+  and the ones still there stay in it, so a later call can retry them:
+
+      python -m common.teardown --host http://14.99.126.171 ../results/teardown/*.tsv
+
+Kinds map to DocTypes through TEARDOWN_DOCTYPES ("kind=DocType,..."). There
+is no default: until every journaled kind is mapped, teardown refuses to
+delete anything and the journal is kept. Without an API key, or with
+TEARDOWN=false, the journal is kept and the command above is printed instead.
+
+Entry/exit marks (employee_access_agk.py) are out of scope: mark_entry and
+mark_exit answer without the name of the log row they create, and the
+payload has no free-text field for the run id.
+"""
+import argparse
+import json
+import logging
+import os
+import secrets
+import socket
+import time
+from collections import Counter
+
+from locust import events  # first: it monkey-patches ssl before requests loads it (python -m common.teardown)
+from locust.runners import MasterRunner, WorkerRunner
+import requests
+
+# ---------------- CONFIG ---------------- #
+ENABLED = os.getenv("TEARDOWN", "true").lower() == "true"
+RUN_ID = os.getenv("RUN_ID") or f"lt-{time.strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(2)}"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+JOURNAL_DIR = os.getenv("TEARDOWN_DIR") or os.path.join(REPO_ROOT, "results", "teardown")
+API_KEY = os.getenv("TEARDOWN_API_KEY", "")
+API_SECRET = os.getenv("TEARDOWN_API_SECRET", "")
+MAX_BATCH_SIZE = 10  # delete_items deletes up to 10 names in the request, more in a background job
+BATCH_SIZE = min(int(os.getenv("TEARDOWN_BATCH_SIZE", "10")), MAX_BATCH_SIZE)
+RATE = float(os.getenv("TEARDOWN_RATE", "2"))  # delete calls per second
+HOST = os.getenv("TEARDOWN_HOST", "")  # default: the run's host
+DOCTYPES = dict(  # kind -> DocType, e.g. "travel_request=Payroll Request"; no default, check the names in the ERP
+    pair.split("=", 1) for pair in os.getenv("TEARDOWN_DOCTYPES", "").split(",") if "=" in pair
+)
+DELETE_PATH = "/api/method/frappe.desk.reportview.delete_items"
+LIST_PATH = "/api/method/frappe.client.get_list"
+MESSAGE_TYPE = "teardown_run_id"
+
+_journal = None
+_counts = Counter()  # kind -> records journaled
+_untracked = Counter()  # kind -> created without a name in the answer
+
+
+def run_tag(text):
+    """``text`` with the run id appended, for a free-text field of a created record."""
+    return f"{text} [{RUN_ID}]"
+
+
+def record_name(payload):
+    """Name of the created record in a Frappe answer, or None."""
+    if not isinstance(payload, dict):
+        return None
+    message = payload.get("message")
+    if isinstance(message, dict):
+        return message.get("name") or message.get("docname")
+    return payload.get("name")
+
+
+def created(kind, response):
+    """Journal the record a successful write ``response`` created; returns its name or None."""
+    global _journal
+    try:
+        name = record_name(response.json())
+    except ValueError:
+        name = None
+    if not name:
+        _untracked[kind] += 1
+        return None
+    if _journal is None:
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        path = os.path.join(JOURNAL_DIR, f"{RUN_ID}-{socket.gethostname()}-{os.getpid()}.tsv")
+        _journal = open(path, "a", buffering=1, encoding="utf-8")
+    _journal.write(f"{kind}\t{name}\n")
+    _counts[kind] += 1
+    return name
+
+
+# ---------------- TEARDOWN ---------------- #
+def read_journal(path):
+    """[(kind, name)] in journal order, without duplicates."""
+    entries = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            kind, _, name = line.rstrip("\n").partition("\t")
+            if name:
+                entries[(kind, name)] = None
+    return list(entries)
+
+
+def existing_names(session, host, doctype, names):
+    """The ``names`` of ``doctype`` that still exist on the server."""
+    resp = session.get(host.rstrip("/") + LIST_PATH, params={
+        "doctype": doctype,
+        "filters": json.dumps([["name", "in", names]]),
+        "fields": json.dumps(["name"]),
+        "limit_page_length": len(names),
+    }, timeout=60)
+    resp.raise_for_status()
+    return [row["name"] for row in resp.json()["message"]]
+
+
+def delete_records(entries, host, session=None, batch_size=BATCH_SIZE, rate=RATE):
+    """Delete (kind, name) records in batches; returns the entries that are still on the server."""
+    unmapped = sorted({kind for kind, _ in entries if kind not in DOCTYPES})
+    if unmapped:
+        raise ValueError(f'No DocType for kind(s) {", ".join(unmapped)}. '
+                         f'Set TEARDOWN_DOCTYPES, e.g. "{unmapped[0]}=<DocType>,..."')
+    session = session or requests.Session()
+    session.headers["Authorization"] = f"token {API_KEY}:{API_SECRET}"
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    by_doctype = {}
+    failed = []
+    for kind, name in entries:
+        by_doctype.setdefault((kind, DOCTYPES[kind]), []).append(name)
+
+    interval = 1.0 / rate if rate > 0 else 0.0
+    next_call = time.monotonic()
+
+    def throttle():
+        nonlocal next_call
+        time.sleep(max(0.0, next_call - time.monotonic()))
+        next_call = time.monotonic() + interval
+
+    for (kind, doctype), names in by_doctype.items():
+        for start in range(0, len(names), batch_size):
+            batch = names[start:start + batch_size]
+            throttle()
+            try:
+                resp = session.post(host.rstrip("/") + DELETE_PATH,
+                                    data={"doctype": doctype, "items": json.dumps(batch)}, timeout=60)
+                if resp.status_code != 200:
+                    print(f"[TEARDOWN] Deleting {len(batch)} {doctype} record(s) failed: status {resp.status_code}")
+                    failed.extend((kind, name) for name in batch)
+                    continue
+                throttle()
+                remaining = existing_names(session, host, doctype, batch)
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                print(f"[TEARDOWN] Deleting {len(batch)} {doctype} record(s) failed: {e}")
+                failed.extend((kind, name) for name in batch)
+                continue
+            if remaining:
+                print(f"[TEARDOWN] {len(remaining)} of {len(batch)} {doctype} record(s) still exist after deletion: "
+                      + ", ".join(remaining))
+                failed.extend((kind, name) for name in remaining)
+    return failed
+
+
+def teardown_journal(path, host, session=None):
+    """Delete a journal's records; the journal keeps only the failed ones (removed when none failed)."""
+    entries = read_journal(path)
+    failed = delete_records(entries, host, session) if entries else []
+    if failed:
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(f"{kind}\t{name}\n" for kind, name in failed)
+    else:
+        os.remove(path)
+    print(f"[TEARDOWN] {path}: {len(entries) - len(failed)}/{len(entries)} record(s) deleted")
+    return failed
+
+
+# ---------------- EVENTS ---------------- #
+def _send_run_id(environment, **kwargs):
+    # Fires on the master before the first spawn message is sent.
+    environment.runner.send_message(MESSAGE_TYPE, RUN_ID)
+
+
+def _on_run_id(environment, msg, **kwargs):
+    global RUN_ID
+    RUN_ID = msg.data
+
+
+@events.init.add_listener
+def _setup(environment, **kwargs):
+    runner = environment.runner
+    if isinstance(runner, WorkerRunner):
+        runner.register_message(MESSAGE_TYPE, _on_run_id)
+    elif isinstance(runner, MasterRunner):
+        environment.events.test_start.add_listener(_send_run_id)
+
+
+@events.quitting.add_listener
+def _teardown_on_quit(environment, **kwargs):
+    if isinstance(environment.runner, MasterRunner):
+        print(f"[TEARDOWN] Run id {RUN_ID}")
+        return
+    for kind, count in sorted(_untracked.items()):
+        print(f"[TEARDOWN] {count} {kind} record(s) created without a name in the answer; not journaled")
+    if _journal is None:
+        return
+    _journal.close()
+    print(f"[TEARDOWN] Run id {RUN_ID}: journaled " + ", ".join(f"{n} {kind}" for kind, n in sorted(_counts.items())))
+    host = HOST or environment.host or next((u.host for u in environment.user_classes if u.host), "")
+    if not ENABLED or not API_KEY or not host:
+        print(f"[TEARDOWN] Records kept. Delete them with: "
+              f"python -m common.teardown --host <host> {_journal.name}")
+        return
+    try:
+        teardown_journal(_journal.name, host)
+    except ValueError as e:
+        logging.error(f"[TEARDOWN] {e}. Nothing deleted; the journal is kept: {_journal.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete the records listed in load-test teardown journals.")
+    parser.add_argument("journals", nargs="+")
+    parser.add_argument("--host", default=HOST, required=not HOST)
+    args = parser.parse_args()
+    if not API_KEY:
+        parser.error("set TEARDOWN_API_KEY and TEARDOWN_API_SECRET")
+    for path in args.journals:
+        try:
+            teardown_journal(path, args.host)
+        except ValueError as e:
+            parser.error(f"{path}: {e}")
+
+
+if __name__ == "__main__":
+    main()
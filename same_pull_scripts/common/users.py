@@ -0,0 +1,118 @@
+"""Base user class that runs a script on either Locust HTTP client.
+
+Set LOCUST_CLIENT=fast to run on FastHttpUser (geventhttpclient) instead of
+the default requests-based HttpUser. Scripts subclass ``BaseHttpUser`` and
+keep using ``catch_response``, ``json=``, ``params=``, ``timeout=`` and
+cookies exactly as they would on HttpUser.
+
+Both clients template request names and cap their number
+(common/naming.py). Importing this module also registers the optional
+listeners for every script: HDR latency capture (common/latency.py,
+HDR_HISTOGRAMS=true), the SLA evaluator (common/sla.py, SLA_EVALUATOR=true),
+the Parquet raw-sample sink (common/samples.py, RAW_SAMPLES=true) and the
+Prometheus exporter (common/metrics.py, PROMETHEUS_EXPORTER=true). Each request's
+context carries the ``user_class`` name (and ``app`` in mixed runs, see
+common/workloads.py) for those listeners. With REQUEST_PHASES=true both
+clients also time the connection phases of every request (common/phases.py).
+"""
+import os
+
+import gevent
+from locust import HttpUser
+from locust.clients import HttpSession
+from geventhttpclient._parser import HTTPParseError
+from locust.contrib.fasthttp import FAILURE_EXCEPTIONS, ErrorResponse, FastHttpSession, FastHttpUser
+
+import common.latency  # noqa: F401  (registers the HDR latency listener)
+import common.metrics  # noqa: F401  (registers the Prometheus exporter)
+import common.samples  # noqa: F401  (registers the raw-sample sink)
+import common.sla  # noqa: F401  (registers the SLA evaluator)
+from common.naming import NamingSessionMixin
+from common.phases import PhaseTimingSessionMixin, instrument
+
+# ---------------- CONFIG ---------------- #
+CLIENT_MODE = os.getenv("LOCUST_CLIENT", "requests").lower()  # requests | fast
+CLIENT_MODES = ("requests", "fast")
+
+if CLIENT_MODE not in CLIENT_MODES:
+    raise ValueError(f"Invalid LOCUST_CLIENT={CLIENT_MODE!r}. Must be one of: {', '.join(CLIENT_MODES)}")
+
+
+class NamedHttpSession(PhaseTimingSessionMixin, NamingSessionMixin, HttpSession):
+    pass
+
+
+class CompatFastHttpSession(PhaseTimingSessionMixin, NamingSessionMixin, FastHttpSession):
+    """FastHttpSession with the HttpSession behaviour our scripts rely on."""
+
+    @property
+    def cookies(self):
+        # requests exposes the cookie jar as .cookies; keep that name working.
+        return self.cookiejar
+
+    def request(self, method, url, *args, **kwargs):
+        # FastHttpSession.request reads the body after _send_request_safe_mode
+        # returns; have it read there instead, under the same timeout.
+        if kwargs.get("timeout") is not None and not kwargs.get("stream"):
+            kwargs["read_body"] = True
+        return super().request(method, url, *args, **kwargs)
+
+    def _send_request_safe_mode(self, method, url, timeout=None, read_body=False, **kwargs):
+        # geventhttpclient has no per-request timeout and would otherwise send
+        # an unknown ``timeout`` kwarg as a query parameter. One gevent.Timeout
+        # covers sending the request and reading the body. It is one of
+        # FastHttpSession's failure exceptions, and a timeout during the body
+        # read comes back as an ErrorResponse too, so either way it is reported
+        # as a failed request just like a requests timeout. Streamed bodies are
+        # read by the caller (see common/validation.py).
+        if timeout is None:
+            return super()._send_request_safe_mode(method, url, **kwargs)
+        if isinstance(timeout, tuple):
+            timeout = sum(t for t in timeout if t)
+        with gevent.Timeout(timeout):
+            response = super()._send_request_safe_mode(method, url, **kwargs)
+            if read_body and not isinstance(response, ErrorResponse):
+                try:
+                    response.content  # cached for FastHttpSession.request
+                except (HTTPParseError, *FAILURE_EXCEPTIONS) as e:
+                    return ErrorResponse(response.request, e)  # the half-read connection is dropped
+            return response
+
+
+class UserClassContextMixin:
+    app = None  # application of the user in a mixed run; prefixes its request names
+
+    def context(self):
+        if self.app:
+            return {"user_class": type(self).__name__, "app": self.app}
+        return {"user_class": type(self).__name__}
+
+
+class FastCompatUser(UserClassContextMixin, FastHttpUser):
+    abstract = True
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        # FastHttpUser builds its session inline; swap in the compatible
+        # subclass rather than duplicating its long constructor call.
+        self.client.__class__ = CompatFastHttpSession
+        self.client.app = self.app
+        instrument(self.client)
+
+
+class CompatHttpUser(UserClassContextMixin, HttpUser):
+    abstract = True
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        self.client.__class__ = NamedHttpSession
+        self.client.app = self.app
+        instrument(self.client)
+
+
+BaseHttpUser = FastCompatUser if CLIENT_MODE == "fast" else CompatHttpUser
+
+
+def cookie_jar(client):
+    """Return the http.cookiejar-compatible jar of either client type."""
+    return getattr(client, "cookiejar", None) or client.cookies
@@ -0,0 +1,185 @@
+"""Streaming response validation that avoids full-body parsing on the generator.
+
+``checked_request`` sends the request with ``stream=True`` and reads the
+body in chunks:
+
+- The first VALIDATION_PREFIX_BYTES are kept. Status, the expected JSON key
+  (e.g. ``"message"``, like the catalog's ``expectedBodyKey``), an optional
+  byte prefix and Frappe exception markers are checked against them.
+- The rest of the body is only counted, never buffered, so large lists and
+  export downloads cost no memory. Draining it keeps the connection reusable.
+- A VALIDATION_FULL_PARSE_SAMPLE fraction of responses is still buffered and
+  parsed with ``json.loads``, so malformed bodies are caught statistically.
+  Set it to 1 to parse every response.
+
+Response time and length are reported for the full download, as without
+streaming. A ``timeout=`` also bounds the body read: whatever the send left
+of it, on both clients. The fast client streams the raw body, so it is decompressed here
+according to Content-Encoding (gzip, deflate, and br when the brotli package
+is installed); the checks always see the decoded bytes, and the wire bytes
+are counted separately.
+"""
+import json
+import os
+import random
+import time
+import zlib
+
+import gevent
+from locust.contrib.fasthttp import FastResponse
+
+# ---------------- CONFIG ---------------- #
+PREFIX_BYTES = int(os.getenv("VALIDATION_PREFIX_BYTES", "4096"))
+FULL_PARSE_SAMPLE = float(os.getenv("VALIDATION_FULL_PARSE_SAMPLE", "0.01"))
+CHUNK_SIZE = 64 * 1024
+FRAPPE_EXCEPTION_MARKERS = (b'"exc_type"', b'"exception"')
+
+
+class CheckedBody:
+    """What was read from a streamed response."""
+
+    __slots__ = ("head", "length", "wire_length", "data", "failure")
+
+    def __init__(self, head, length, data=None, failure=None, wire_length=None):
+        self.head = head  # first PREFIX_BYTES decoded bytes
+        self.length = length  # total decoded body bytes
+        self.wire_length = length if wire_length is None else wire_length  # body bytes as received
+        self.data = data  # parsed JSON for sampled responses, else None
+        self.failure = failure  # reason the response was marked failed, else None
+
+    def head_text(self):
+        return self.head.decode("utf-8", errors="replace")
+
+
+def _decoder(encoding):
+    """(decompress, flush) for a Content-Encoding, or None for an uncompressed body."""
+    encoding = (encoding or "identity").strip().lower()
+    if encoding in ("gzip", "x-gzip", "deflate"):
+        decompressor = zlib.decompressobj(31 if encoding != "deflate" else 15)
+        return decompressor.decompress, decompressor.flush
+    if encoding == "br":
+        try:
+            import brotli
+        except ImportError:
+            raise ValueError("br-encoded body and no brotli package installed") from None
+        decompressor = brotli.Decompressor()
+        return decompressor.process, lambda: b""
+    if encoding == "identity":
+        return None
+    raise ValueError(f"unsupported Content-Encoding {encoding!r}")
+
+
+def _chunks(response):
+    """(wire bytes, decoded chunk) for every chunk of the body."""
+    if isinstance(response, FastResponse):
+        # FastResponse streams the body as sent, still compressed.
+        decoder = _decoder(response.headers.get("content-encoding"))
+        for chunk in response.iter_content(CHUNK_SIZE, decode_content=False):
+            yield len(chunk), decoder[0](chunk) if decoder else chunk
+        if decoder:
+            tail = decoder[1]()
+            if tail:
+                yield 0, tail
+        return
+    # requests decodes while streaming; urllib3's tell() counts the bytes read from the socket.
+    raw = response.raw
+    position = raw.tell() if hasattr(raw, "tell") else None
+    for chunk in response.iter_content(CHUNK_SIZE):
+        if position is None:
+            yield len(chunk), chunk
+        else:
+            now = raw.tell()
+            yield now - position, chunk
+            position = now
+
+
+def read_body(response, full=False, prefix_bytes=PREFIX_BYTES):
+    """Drain ``response``; (head, decoded length, wire length, full body or None).
+
+    ``head`` is the first ``prefix_bytes`` decoded bytes; the full body is only kept when ``full``.
+    """
+    head = bytearray()
+    parts = [] if full else None
+    length = wire_length = 0
+    for wire, chunk in _chunks(response):
+        wire_length += wire
+        length += len(chunk)
+        if full:
+            parts.append(chunk)
+        elif len(head) < prefix_bytes:
+            head += chunk[:prefix_bytes - len(head)]
+    if full:
+        body = b"".join(parts)
+        return bytes(body[:prefix_bytes]), length, wire_length, body
+    return bytes(head), length, wire_length, None
+
+
+def check_head(head, expect_key=None, expect_prefix=None):
+    """Failure reason from the first bytes of a JSON body, or None."""
+    if expect_prefix is not None and not head.lstrip().startswith(expect_prefix):
+        return f"body does not start with {expect_prefix!r}"
+    if any(marker in head for marker in FRAPPE_EXCEPTION_MARKERS):
+        return "returned a Frappe exception"
+    if expect_key and f'"{expect_key}"'.encode() not in head:
+        return f"no '{expect_key}' key in the first {len(head)} bytes"
+    return None
+
+
+def check_parsed(data, expect_key=None):
+    if expect_key and (not isinstance(data, dict) or expect_key not in data):
+        return f"body has no '{expect_key}' key"
+    return None
+
+
+def _time_left(timeout, start_time):
+    """Seconds of a request's ``timeout=`` left for reading its streamed body (None: no limit)."""
+    if timeout is None:
+        return None
+    if isinstance(timeout, tuple):
+        timeout = sum(t for t in timeout if t)
+    return max(0.0, timeout - (time.time() - start_time))
+
+
+def checked_request(client, method, url, name=None, expect_status=(200,), expect_key=None, expect_prefix=b"{",
+                    full_parse_sample=FULL_PARSE_SAMPLE, prefix_bytes=PREFIX_BYTES, **kwargs):
+    """Send a request and validate it from a streamed body; returns (response, CheckedBody | None).
+
+    ``expect_key=None, expect_prefix=None`` only checks the status and counts
+    bytes (file downloads). The response is marked success/failure here.
+    """
+    full = random.random() < full_parse_sample
+    body = None
+    with client.request(method, url, name=name, stream=True, catch_response=True, **kwargs) as resp:
+        if not resp.status_code:  # connection error, already reported as a failure
+            return resp, None
+        try:
+            time_left = _time_left(kwargs.get("timeout"), resp.request_meta["start_time"])
+            with gevent.Timeout(time_left, TimeoutError(f"body not read within timeout={kwargs.get('timeout')}")):
+                head, length, wire_length, raw = read_body(resp, full, prefix_bytes)
+        except Exception as e:
+            resp.failure(f"body read failed: {e}")
+            return resp, None
+        # Report the full download like a non-streamed request would.
+        resp.request_meta["response_time"] = (time.time() - resp.request_meta["start_time"]) * 1000
+        resp.request_meta["response_length"] = length
+
+        reason = None
+        if resp.status_code not in expect_status:
+            reason = f"unexpected status {resp.status_code}"
+        elif resp.status_code != 204:
+            reason = check_head(head, expect_key, expect_prefix)
+            if reason is None and raw is not None and (expect_key or expect_prefix):
+                try:
+                    data = json.loads(raw)
+                except ValueError as e:
+                    reason = f"invalid JSON: {e}"
+                else:
+                    reason = check_parsed(data, expect_key)
+                    body = CheckedBody(head, length, data, wire_length=wire_length)
+        body = body or CheckedBody(head, length, wire_length=wire_length)
+        body.failure = reason
+        if reason:
+            resp.failure(reason)
+        else:
+            resp.success()
+    return resp, body
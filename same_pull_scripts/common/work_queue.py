@@ -0,0 +1,133 @@
+"""Process-wide cache of pending records that approvers claim exactly once.
+
+One background greenlet per queue polls the list endpoint every
+WORK_QUEUE_REFRESH seconds. Users then ``claim()`` a record from memory
+instead of fetching the list before every write:
+
+- The list is fetched with the client of a user that ``join()``-ed the
+  queue, so its answer is the list that user's account may act on; keep one
+  queue per approver account. When that user stops (``leave()``), the next
+  joined user takes over; with nobody left the refresher stops.
+
+- A claimed record leaves the queue and is not queued again by later
+  refreshes, even while the server still lists it (approval in flight, or
+  failed). Names the server no longer lists are forgotten.
+- In master/worker mode each worker only queues the records that hash to
+  its shard (``common.sharding.owns``), so two workers never claim the same
+  record.
+- ``sample()`` returns a random queued record without claiming it, for
+  read-only flows such as viewing details.
+"""
+import os
+import random
+from collections import deque
+
+import gevent
+from locust import events
+
+from common.sharding import owns
+
+# ---------------- CONFIG ---------------- #
+REFRESH_INTERVAL = float(os.getenv("WORK_QUEUE_REFRESH", "5"))  # seconds between list refreshes
+NAME_SUFFIX = " [work queue]"
+
+_queues = []
+
+
+def message_names(data):
+    """Record names from a Frappe ``{"message": [{"name": ...}, ...]}`` answer."""
+    return [row.get("name") for row in data.get("message") or [] if isinstance(row, dict) and row.get("name")]
+
+
+class WorkQueue:
+    def __init__(self, path, extract=message_names, interval=REFRESH_INTERVAL, label=""):
+        self.path = path
+        self.label = label  # e.g. the approver account, for the end-of-run report
+        self.extract = extract
+        self.interval = interval
+        self.available = deque()
+        self.queued = set()
+        self.claimed = set()
+        self.stats = {"refreshes": 0, "refresh_failures": 0, "claimed": 0, "empty": 0}
+        self._users = []  # joined users; the first one's client polls the list
+        self._greenlet = None
+        _queues.append(self)
+
+    def join(self, user):
+        """Add an authenticated ``user`` and start the refresher if it is not running."""
+        self._users.append(user)
+        if self._greenlet is None or self._greenlet.dead:
+            self._greenlet = gevent.spawn(self._refresh_loop)
+
+    def leave(self, user):
+        """Remove a stopping ``user``; the refresher stops with the last one."""
+        if user in self._users:
+            self._users.remove(user)
+        if not self._users:
+            self.stop()
+
+    def stop(self):
+        if self._greenlet is not None:
+            self._greenlet.kill(block=False)
+            self._greenlet = None
+
+    def _refresh_loop(self):
+        while self._users:
+            self.refresh(self._users[0].client)
+            gevent.sleep(self.interval)
+
+    def refresh(self, client):
+        with client.get(self.path, name=self.path + NAME_SUFFIX, catch_response=True) as resp:
+            try:
+                if resp.status_code != 200:
+                    raise ValueError(f"status {resp.status_code}")
+                names = self.extract(resp.json())
+            except Exception as e:
+                self.stats["refresh_failures"] += 1
+                resp.failure(f"Failed to refresh pending records: {e}")
+                return
+            resp.success()
+
+        listed = set(names)
+        self.claimed &= listed
+        self.queued &= listed
+        self.available = deque(name for name in self.available if name in listed)
+        for name in names:
+            if name not in self.queued and name not in self.claimed and owns(name):
+                self.queued.add(name)
+                self.available.append(name)
+        self.stats["refreshes"] += 1
+
+    def claim(self):
+        """Take the oldest queued record, or None when the queue is empty."""
+        if not self.available:
+            self.stats["empty"] += 1
+            return None
+        name = self.available.popleft()
+        self.queued.discard(name)
+        self.claimed.add(name)
+        self.stats["claimed"] += 1
+        return name
+
+    def sample(self):
+        """A random queued record without claiming it, or None."""
+        if not self.available:
+            return None
+        return random.choice(self.available)
+
+
+@events.test_stop.add_listener
+def _stop_refreshers(environment, **kwargs):
+    for queue in _queues:
+        queue.stop()
+
+
+@events.quitting.add_listener
+def _report_queues(environment, **kwargs):
+    for queue in _queues:
+        if queue.stats["refreshes"] or queue.stats["refresh_failures"]:
+            print(
+                f"[WORK QUEUE] {queue.path}{f' ({queue.label})' if queue.label else ''}: refreshes={queue.stats['refreshes']} "
+                f"refresh_failures={queue.stats['refresh_failures']} claimed={queue.stats['claimed']} "
+                f"empty={queue.stats['empty']} pending={len(queue.available)}"
+            )
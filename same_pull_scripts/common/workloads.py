@@ -0,0 +1,155 @@
+"""Registry of the application workloads for mixed-application runs.
+
+Every app in ``REGISTRY`` is a locustfile in this folder plus the user
+classes it contributes. mixed_apps.py runs several of them in one test,
+because in production they all share the same Frappe workers and database.
+The mix comes from data/test-data/app.mix.json (or MIXED_APPS_CONFIG):
+
+    {"apps": {
+        "payroll": {"weight": 4, "users": {"EmployeeUser": 3, "PLUser": 2, "FLUser": 1}},
+        "visitor": {"weight": 2},
+        "employee_access": {"weight": 1, "enabled": false}
+    }}
+
+- Only enabled apps are imported (MIXED_APPS="payroll,visitor" overrides the
+  file's ``enabled`` flags), so a disabled app's data files, feeders and
+  event listeners are never loaded.
+- ``weight`` is the app's share of the users. ``users`` splits that share
+  between its user classes; by default each class keeps its own ``weight``.
+- Each class is subclassed as ``<Class>_<app>`` with ``app`` set, so every
+  request name gets an ``[app]`` prefix (common/naming.py) and the Locust
+  stats, CSV and HTML reports list each endpoint per application.
+
+At the end of the run the master (or a standalone process) prints an
+``[APPS]`` table with the totals per application and writes it to
+results/app-stats-<time>.csv (or MIXED_APPS_OUTPUT).
+"""
+import csv
+import importlib
+import json
+import os
+import re
+import time
+
+from locust import events
+from locust.runners import WorkerRunner
+from locust.stats import StatsEntry
+
+# ---------------- CONFIG ---------------- #
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_FILE = os.getenv("MIXED_APPS_CONFIG") or os.path.join(REPO_ROOT, "data/test-data/app.mix.json")
+ENABLED_APPS = [app.strip() for app in os.getenv("MIXED_APPS", "").split(",") if app.strip()]  # empty = file flags
+OUTPUT = os.getenv("MIXED_APPS_OUTPUT") or os.path.join(
+    REPO_ROOT, "results", time.strftime("app-stats-%Y%m%dT%H%M%S.csv")
+)
+WEIGHT_SCALE = 1000  # Locust weights are integers; app share x class share is scaled to this total
+
+# app -> (locustfile module, user classes it contributes)
+REGISTRY = {
+    "hr_ops_fl": ("HR_Ops_FL", ("HRUser",)),
+    "hr_ops_assignments": ("HR_Ops_assignments", ("FLUser", "SAUser", "FUUser")),
+    "hr_ops_fu": ("hr_ops_FU_assignments", ("FUUser",)),
+    "hr_ops_sa": ("hr_ops_SA_assignments", ("SAUser",)),
+    "payroll": ("test_payroll", ("EmployeeUser", "PLUser", "FLUser")),
+    "visitor": ("visitor_management", ("VisitorUser",)),
+    "visitor_agk": ("visitor_management_agk", ("VisitorUser",)),
+    "employee_access": ("employee_access_agk", ("WebsiteUser",)),
+}
+APP_PREFIX = re.compile(r"^\[(\w+)\] ")
+COLUMNS = ["Requests", "Failures", "Failure %", "RPS", "Avg ms", "p50 ms", "p95 ms", "p99 ms"]
+
+
+def load_config(path=CONFIG_FILE):
+    with open(path, encoding="utf-8") as f:
+        apps = json.load(f)["apps"]
+    unknown = set(apps) - set(REGISTRY)
+    if unknown:
+        raise ValueError(f'Unknown app(s) {", ".join(sorted(unknown))} in {path}. Known: {", ".join(REGISTRY)}')
+    return apps
+
+
+def enabled_apps(apps, only=ENABLED_APPS):
+    """{app: settings} of the apps to run: ``only`` when given, else those not ``"enabled": false``."""
+    if only:
+        missing = [app for app in only if app not in REGISTRY]
+        if missing:
+            raise ValueError(f'Unknown app(s) {", ".join(missing)} in MIXED_APPS. Known: {", ".join(REGISTRY)}')
+        return {app: apps.get(app, {}) for app in only}
+    return {app: settings for app, settings in apps.items() if settings.get("enabled", True)}
+
+
+def build_user_classes(apps):
+    """{class name: user class} for the enabled apps, weighted by app share x class share."""
+    apps = {app: settings for app, settings in apps.items() if float(settings.get("weight", 1)) > 0}
+    if not apps:
+        raise ValueError("No application enabled for the mixed run")
+    total = sum(float(settings.get("weight", 1)) for settings in apps.values())
+    classes = {}
+    for app, settings in apps.items():
+        module_name, class_names = REGISTRY[app]
+        module = importlib.import_module(module_name)
+        mix = settings.get("users") or {name: getattr(module, name).weight for name in class_names}
+        unknown = set(mix) - set(class_names)
+        if unknown:
+            raise ValueError(f'App "{app}" has no user class(es) {", ".join(sorted(unknown))}. '
+                             f'Known: {", ".join(class_names)}')
+        share = float(settings.get("weight", 1)) / total
+        mix_total = sum(float(weight) for weight in mix.values())
+        for name, weight in mix.items():
+            if float(weight) <= 0:
+                continue
+            user_class = getattr(module, name)
+            subclass_name = f"{name}_{app}"
+            classes[subclass_name] = type(subclass_name, (user_class,), {
+                "app": app,
+                "weight": max(1, round(WEIGHT_SCALE * share * float(weight) / mix_total)),
+                "__module__": user_class.__module__,
+            })
+    return classes
+
+
+# ---------------- REPORT ---------------- #
+def app_totals(stats):
+    """{app: StatsEntry} merged from the ``[app]``-prefixed entries of ``stats``."""
+    totals = {}
+    for entry in stats.entries.values():
+        match = APP_PREFIX.match(entry.name)
+        if match is None:
+            continue
+        app = match.group(1)
+        if app not in totals:
+            totals[app] = StatsEntry(stats, app, "", use_response_times_cache=False)
+        totals[app].extend(entry)
+    return dict(sorted(totals.items()))
+
+
+def app_row(entry):
+    return [
+        entry.num_requests, entry.num_failures, round(100.0 * entry.fail_ratio, 2), round(entry.total_rps, 2),
+        round(entry.avg_response_time, 1), entry.get_response_time_percentile(0.5),
+        entry.get_response_time_percentile(0.95), entry.get_response_time_percentile(0.99),
+    ]
+
+
+def write_app_stats(totals, path=OUTPUT):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["App"] + COLUMNS)
+        for app, entry in totals.items():
+            writer.writerow([app] + app_row(entry))
+    return path
+
+
+@events.quitting.add_listener
+def _report_on_quit(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    totals = app_totals(environment.stats)
+    if not totals:
+        return
+    width = max(len("App"), max(len(app) for app in totals))
+    print("[APPS] " + " | ".join([f"{'App':<{width}}"] + [f"{column:>9}" for column in COLUMNS]))
+    for app, entry in totals.items():
+        print("[APPS] " + " | ".join([f"{app:<{width}}"] + [f"{value:>9}" for value in app_row(entry)]))
+    print(f"[APPS] Per-application totals written to {write_app_stats(totals)}")
@@ -10,27 +10,67 @@
 # ✔ 10. Retry logic
 
 # locustfile.py
-from locust import HttpUser, SequentialTaskSet, task, between
-import random, json, time
-
-# --- Test data: replace / extend with real emails or read from file ---
-EMPLOYEES = [
-    {"emp_email": "emp1@example.com", "emp_id": "AGK001"},
-    {"emp_email": "emp2@example.com", "emp_id": "AGK002"},
-    {"emp_email": "emp3@example.com", "emp_id": "AGK003"},
+#
+# Entry/exit scans follow a per-worker occupancy index (common/occupancy.py):
+# entries only for employees outside, exits only for employees inside, at the
+# location they entered. INVALID_SCAN_RATE of the scans are deliberately
+# invalid (5, 6, 7 above): unknown QR, expired QR (qr_status=expired rows of
+# EMPLOYEES_FILE) and duplicate scans. The employee_details lookup before a
+# scan is for the same employee the scan is for.
+import csv
+import os
+import random
+
+from locust import events, task
+
+from common.occupancy import ENTRY, OccupancyIndex
+from common.pacing import PacedSequentialTaskSet, think, user_wait_time
+from common.sharding import sharded_pool
+from common.users import BaseHttpUser
+
+# ---------------- CONFIG ---------------- #
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMPLOYEES_FILE = os.getenv("EMPLOYEES_FILE", os.path.join(REPO_ROOT, "data/test-data/employees.csv"))
+LOCATIONS = [
+    location.strip()
+    for location in os.getenv("ENTRY_EXIT_LOCATIONS", "Open Work Space 2 - IITMRP E Block").split(",")
+    if location.strip()
 ]
+ENTRY_WEIGHT = float(os.getenv("ENTRY_WEIGHT", "0.6"))  # share of entries while both are possible
+INVALID_SCAN_RATE = float(os.getenv("INVALID_SCAN_RATE", "0.05"))
+INVALID_SCAN_KINDS = [
+    kind.strip() for kind in os.getenv("INVALID_SCAN_KINDS", "duplicate,expired_qr,invalid_qr").split(",")
+    if kind.strip()
+]
+
+MARK_ENTRY_URL = "/api/method/visitor_management.custom_api.entry_exit.mark_entry"
+MARK_EXIT_URL = "/api/method/visitor_management.custom_api.entry_exit.mark_exit"
+
+
+def load_employees(path):
+    """(valid, expired) employee rows; ``qr_status`` defaults to valid."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [{key.strip(): (value or "").strip() for key, value in row.items()} for row in csv.DictReader(f)]
+    valid = [row for row in rows if row.get("qr_status", "valid") != "expired"]
+    expired = [row for row in rows if row.get("qr_status") == "expired"]
+    return valid, expired
 
-LOCATION = "Open Work Space 2 - IITMRP E Block"
+
+EMPLOYEES, EXPIRED_QR_EMPLOYEES = load_employees(EMPLOYEES_FILE)
+employee_pool = sharded_pool("employee_access.EMPLOYEES", EMPLOYEES)
+occupancy = OccupancyIndex(employee_pool, LOCATIONS, entry_weight=ENTRY_WEIGHT)
+
+LOCATION = LOCATIONS[0]
 
 
 # --- Example payload constructors ---
-def make_employee_details_payload(emp):
-    return {"emp_email": emp["emp_email"], "location": LOCATION}
+def make_employee_details_payload(emp, location=LOCATION):
+    return {"emp_email": emp["emp_email"], "location": location}
 
 
-def make_mark_entry_payload_with_laptop():
+def make_mark_entry_payload_with_laptop(location=LOCATION):
     return {
-        "location": LOCATION,
+        "location": location,
         "laptop_status": "with",
         "laptop_image": {"laptop": "/path/of/laptop.png", "form": "/path/of/form.png"},
         "mobile": "Yes",
@@ -41,9 +81,9 @@ def make_mark_entry_payload_with_laptop():
     }
 
 
-def make_mark_entry_payload_without_laptop():
+def make_mark_entry_payload_without_laptop(location=LOCATION):
     return {
-        "location": LOCATION,
+        "location": location,
         "laptop_status": "without",
         "mobile": "No",
         "no_mobile": 0,
@@ -52,9 +92,9 @@ def make_mark_entry_payload_without_laptop():
     }
 
 
-def make_mark_exit_payload_with_return():
+def make_mark_exit_payload_with_return(location=LOCATION):
     return {
-        "location": LOCATION,
+        "location": location,
         "laptop_status": "with",
         "return_mobile": "Yes",
         "laptop_image": {"laptop": "/path/of/laptop.png", "form": "/path/of/form.png"},
@@ -64,7 +104,7 @@ def make_mark_exit_payload_with_return():
 
 
 # --- Sequential flow for each virtual user ---
-class EntryExitFlow(SequentialTaskSet):
+class EntryExitFlow(PacedSequentialTaskSet):
 
     def on_start(self):
         # Called when a simulated user starts — do security_login
@@ -83,12 +123,11 @@ class EntryExitFlow(SequentialTaskSet):
                 resp.success()
 
         # small think time after login
-        time.sleep(random.uniform(0.5, 1.5))
+        think(0.5, 1.5)
 
-    @task
-    def get_employee_details(self):
-        emp = random.choice(EMPLOYEES)
-        payload = make_employee_details_payload(emp)
+    def get_employee_details(self, emp, location):
+        """Look up the scanned employee, as the security app does before marking entry/exit."""
+        payload = make_employee_details_payload(emp, location)
         with self.client.post(
             "/api/method/visitor_management.custom_api.entry_exit.employee_details",
             json=payload,
@@ -101,57 +140,102 @@ class EntryExitFlow(SequentialTaskSet):
             else:
                 # optional: inspect JSON to decide next step
                 resp.success()
-        time.sleep(random.uniform(0.2, 1.0))
+        think(0.2, 1.0)
 
     @task
     def mark_entry_or_exit(self):
-        # choose entry or exit randomly (you can bias probability)
-        choice = random.choices(["entry", "exit"], weights=[0.6, 0.4])[0]
-        emp = random.choice(EMPLOYEES)
+        if INVALID_SCAN_KINDS and random.random() < INVALID_SCAN_RATE:
+            self.mark_invalid_scan(random.choice(INVALID_SCAN_KINDS))
+        else:
+            claimed = occupancy.claim()
+            if claimed is None:
+                # every employee of this worker is mid-scan; more users than employees
+                think(1.0, 3.0)
+                return
+            emp, action, location = claimed
+            applied = False
+            try:
+                self.get_employee_details(emp, location)
+                applied = self.send_scan(emp["emp_email"], action, location, action_name(action))
+            finally:
+                occupancy.release(emp, action, location, applied)
+        # think time before next iteration / user stops
+        think(1.0, 3.0)
 
-        if choice == "entry":
+    def send_scan(self, emp_email, action, location, req_name):
+        """POST a mark_entry / mark_exit scan; returns True when it was accepted."""
+        if action == ENTRY:
             # randomly with/without laptop
             if random.random() < 0.5:
-                payload = {
-                    "emp_email": emp["emp_email"],
-                    "entry_exit_data": make_mark_entry_payload_with_laptop(),
-                }
+                data = make_mark_entry_payload_with_laptop(location)
             else:
-                payload = {
-                    "emp_email": emp["emp_email"],
-                    "entry_exit_data": make_mark_entry_payload_without_laptop(),
-                }
-
-            endpoint = "/api/method/visitor_management.custom_api.entry_exit.mark_entry"
-            req_name = "mark_entry"
+                data = make_mark_entry_payload_without_laptop(location)
+            endpoint = MARK_ENTRY_URL
         else:
-            # exit payload
             if random.random() < 0.6:
-                payload = {
-                    "emp_email": emp["emp_email"],
-                    "entry_exit_data": make_mark_exit_payload_with_return(),
-                }
+                data = make_mark_exit_payload_with_return(location)
             else:
                 # exit without returning mobile
-                payload = {
-                    "emp_email": emp["emp_email"],
-                    "entry_exit_data": make_mark_entry_payload_without_laptop(),
-                }
-            endpoint = "/api/method/visitor_management.custom_api.entry_exit.mark_exit"
-            req_name = "mark_exit"
+                data = make_mark_entry_payload_without_laptop(location)
+            endpoint = MARK_EXIT_URL
 
+        payload = {"emp_email": emp_email, "entry_exit_data": data}
         with self.client.post(
             endpoint, json=payload, name=req_name, catch_response=True
         ) as resp:
             if resp.status_code not in (200, 201, 202):
                 resp.failure(f"{req_name} failed: {resp.status_code}")
+                return False
+            resp.success()
+            return True
+
+    def mark_invalid_scan(self, kind):
+        """Send a scan the ERP must reject; only 5xx or connection errors count as failures."""
+        if kind == "duplicate":
+            claimed = occupancy.claim_duplicate()
+            if claimed is None:
+                return
+            emp, action, location = claimed
+            try:
+                self.get_employee_details(emp, location)
+                self.send_rejected_scan(emp["emp_email"], action, location, kind)
+            finally:
+                occupancy.release(emp, action, location, applied=False)
+        elif kind == "expired_qr" and EXPIRED_QR_EMPLOYEES:
+            emp = random.choice(EXPIRED_QR_EMPLOYEES)
+            location = random.choice(LOCATIONS)
+            self.get_employee_details(emp, location)
+            self.send_rejected_scan(emp["emp_email"], ENTRY, location, kind)
+        elif kind == "invalid_qr":
+            emp_email = f"unknown-{random.randrange(10 ** 6)}@invalid.example"
+            self.send_rejected_scan(emp_email, ENTRY, random.choice(LOCATIONS), kind)
+
+    def send_rejected_scan(self, emp_email, action, location, kind):
+        endpoint = MARK_ENTRY_URL if action == ENTRY else MARK_EXIT_URL
+        req_name = f"{action_name(action)} [{kind}]"
+        payload = {"emp_email": emp_email, "entry_exit_data": make_mark_entry_payload_without_laptop(location)}
+        with self.client.post(endpoint, json=payload, name=req_name, catch_response=True) as resp:
+            if not resp.status_code or resp.status_code >= 500:
+                resp.failure(f"{req_name} failed: {resp.status_code}")
             else:
                 resp.success()
-        # think time before next iteration / user stops
-        time.sleep(random.uniform(1.0, 3.0))
 
 
-class WebsiteUser(HttpUser):
+def action_name(action):
+    return "mark_entry" if action == ENTRY else "mark_exit"
+
+
+@events.quitting.add_listener
+def _report_occupancy(environment, **kwargs):
+    stats = occupancy.stats
+    if stats["entries"] or stats["exits"] or stats["rejected"]:
+        print(
+            f"[OCCUPANCY] inside={occupancy.occupancy} entries={stats['entries']} exits={stats['exits']} "
+            f"rejected={stats['rejected']} all_claimed={stats['all_claimed']}"
+        )
+
+
+class WebsiteUser(BaseHttpUser):
     tasks = [EntryExitFlow]
-    wait_time = between(1, 3)  # adjust to simulate user pacing
+    wait_time = user_wait_time(1, 3)  # adjust to simulate user pacing
     # host can be overridden with CLI: --host http://14.99.126.171
@@ -1,33 +1,50 @@
-from locust import HttpUser, task, between
+from locust import task
+
+from common.naming import tags
+from common.pacing import user_wait_time
+from common.params import param_space
+from common.session_pool import SessionPoolMixin
+from common.feeder import data_pool
+from common.users import BaseHttpUser
 
 # --- Super Admin ---
-SA_USERS = [{"usr": "emp1@erp.in", "pwd": "Agnikul_1"}]
+SA_USERS = data_pool("assignments.SA_USERS", [{"usr": "emp1@erp.in", "pwd": "Agnikul_1"}])
 
 USER_ROLE_MAP = {
     "emp1@erp.in": " (SA)"
 }
 
-class SAUser(HttpUser):
-    wait_time = between(1, 3)
+# --- Parameter spaces (page depth, limit) ---
+ASSIGNMENTS_URL = "/api/method/core.factory.api.get_data?key=ls_assignments"
+ONBOARDING_ASSIGNMENTS = param_space("assignments.onboarding", ASSIGNMENTS_URL, default="page=1&limit=20",
+                                     search=False, label="Onboarding Assignments")
+DEBOARDING_ASSIGNMENTS = param_space("assignments.deboarding", ASSIGNMENTS_URL, default="page=1&limit=20",
+                                     search=False, label="Deboarding Assignments")
+
+
+class SAUser(SessionPoolMixin, BaseHttpUser):
+    wait_time = user_wait_time(1, 3)
     host = "http://14.99.126.171"
     user_pool = SA_USERS
+    user_id = None
+    user_role = ""
 
     def on_start(self):
-        creds = self.user_pool[0]
-        self.client.post("/api/method/login", json=creds, name=f"{creds['usr']} - Login")
+        creds = self.user_pool.next(self)
+        self.login_from_pool(creds)
         self.user_id = creds["usr"]
         self.user_role = USER_ROLE_MAP.get(creds["usr"], "")
 
+    def context(self):
+        # User and role are tags on each request, not part of the stats name.
+        return {**super().context(), **tags(user=self.user_id, role=self.user_role.strip(" ()"))}
+
     @task
     def onboarding_assignments(self):
-        self.client.get(
-            "/api/method/core.factory.api.get_data?key=ls_assignments&page=1&limit=20",
-            name=f"{self.user_id}{self.user_role} - Onboarding Assignments"
-        )
+        url, name = ONBOARDING_ASSIGNMENTS.draw()
+        self.client.get(url, name=name)
 
     @task
     def deboarding_assignments(self):
-        self.client.get(
-            "/api/method/core.factory.api.get_data?key=ls_assignments&page=1&limit=20",
-            name=f"{self.user_id}{self.user_role} - Deboarding Assignments"
-        )
+        url, name = DEBOARDING_ASSIGNMENTS.draw()
+        self.client.get(url, name=name)
@@ -0,0 +1,14 @@
+"""All applications against the shared Frappe backend in one run.
+
+Loads the apps enabled in data/test-data/app.mix.json (or MIXED_APPS_CONFIG,
+or the MIXED_APPS list) from the registry in common/workloads.py and runs
+their user classes side by side with the configured weights. Request names
+carry an ``[app]`` prefix, and the run ends with an ``[APPS]`` table per
+application:
+
+    locust -f mixed_apps.py --headless -u 400 -r 10 -t 30m
+    TEST_TYPE=load locust -f mixed_apps.py,scenario_shape.py --headless
+"""
+from common.workloads import build_user_classes, enabled_apps, load_config
+
+globals().update(build_user_classes(enabled_apps(load_config())))
@@ -0,0 +1,31 @@
+"""Recruitment load driven by the generated k6 endpoint catalog.
+
+Runs the same workflow mix as tests/recruitment.js without hand-written tasks:
+
+    LOGIN_USR=... LOGIN_PWD=... locust -f recruitment_catalog.py
+
+Mutation endpoints are only executed when INCLUDE_MUTATIONS=true.
+"""
+import os
+
+from common.catalog import build_user_class
+
+# ---------------- CONFIG ---------------- #
+# Same base URLs as config/environments.js; --host still overrides.
+ENVIRONMENTS = {
+    "local": os.getenv("DEV_BASE_URL", "http://localhost:3000"),
+    "staging": os.getenv("STAGING_BASE_URL", "http://14.99.126.171"),
+    "production": os.getenv("PROD_BASE_URL", "https://erp.agnikul.in"),
+}
+ENVIRONMENT = os.getenv("ENVIRONMENT", "staging").lower()
+LOGIN_USR = os.getenv("LOGIN_USR")
+LOGIN_PWD = os.getenv("LOGIN_PWD")
+
+if ENVIRONMENT not in ENVIRONMENTS:
+    raise ValueError(f"Invalid ENVIRONMENT={ENVIRONMENT!r}. Must be one of: {', '.join(ENVIRONMENTS)}")
+
+RecruitmentUser = build_user_class(
+    "RecruitmentUser",
+    host=ENVIRONMENTS[ENVIRONMENT],
+    credentials={"usr": LOGIN_USR, "pwd": LOGIN_PWD} if LOGIN_USR and LOGIN_PWD else None,
+)
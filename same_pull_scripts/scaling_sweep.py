@@ -0,0 +1,134 @@
+"""Scaling mode: latency versus result size for the visitor and payroll list endpoints.
+
+Sweeps a parameter matrix and records response bytes and item counts next
+to latency for every request (common/scaling.py):
+
+- get_visitors: date-range width (SCALING_WIDTHS) x location (SCALING_LOCATIONS)
+- track_requests: date-range width x page_size (SCALING_PAGE_SIZES)
+- get_leave_tracker_details: page_size
+
+Ranges end on SCALING_END (default today); a width of 0 sends no dates.
+Users walk their endpoint's cells round-robin, so every cell gets the same
+number of samples. Each cell is its own stats entry, e.g.
+"get_visitors [30d, Thaiyur]". At the end the master writes the samples and
+a report with a latency-versus-size fit per endpoint and the size at which
+each one crosses the p95 SLA.
+
+    locust -f scaling_sweep.py --headless -u 4 -r 1 -t 20m -H http://14.99.126.171
+"""
+import itertools
+import os
+import time
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from locust import task
+from locust.exception import StopUser
+
+from common.feeder import data_pool
+from common.pacing import user_wait_time
+from common.scaling import count_items, record
+from common.session_pool import SessionPoolMixin
+from common.users import BaseHttpUser
+
+# ---------------- CONFIG ---------------- #
+API_KEY = os.getenv("VISITOR_API_KEY", "627d011a1324aa6")
+API_SECRET = os.getenv("VISITOR_API_SECRET", "115f2b70018adf7")
+WIDTHS = [int(width) for width in os.getenv("SCALING_WIDTHS", "1,7,30,90,365").split(",") if width.strip()]
+LOCATIONS = [location.strip() for location in os.getenv(
+    "SCALING_LOCATIONS",
+    ",SDSC - SHAR,Open Work Space 2 - IITMRP E Block,Rocket Factory - IITMRP A Block,Thaiyur,TAMCOE",
+).split(",")]  # the empty entry = all locations
+PAGE_SIZES = [int(size) for size in os.getenv("SCALING_PAGE_SIZES", "20,100,250,500,1000").split(",") if size.strip()]
+END = date.fromisoformat(os.getenv("SCALING_END") or time.strftime("%Y-%m-%d"))
+REQUEST_TIMEOUT = float(os.getenv("SCALING_TIMEOUT", "60"))  # seconds; large cells are slow on purpose
+
+EMPLOYEES = data_pool("payroll.EMPLOYEES", [{"usr": "emp95@erp.in", "pwd": "Agnikul_1"}])
+
+
+def date_range(width):
+    """(from_date, to_date) of a window of ``width`` days ending on END; ("", "") for 0."""
+    if not width:
+        return "", ""
+    return (END - timedelta(days=width - 1)).isoformat(), END.isoformat()
+
+
+def width_label(width):
+    return f"{width}d" if width else "all dates"
+
+
+# Every cell of the matrix, walked round-robin by all users of a process.
+VISITOR_CELLS = itertools.cycle(list(itertools.product(WIDTHS, LOCATIONS)))
+TRACK_CELLS = itertools.cycle(list(itertools.product(WIDTHS, PAGE_SIZES)))
+LEAVE_CELLS = itertools.cycle(PAGE_SIZES)
+
+
+class ScalingMixin:
+    def measure(self, endpoint, url, name, headers=None, params=None, **cell):
+        """GET one cell and record its latency, bytes and item count."""
+        with self.client.get(url, name=name, headers=headers, params=params, timeout=REQUEST_TIMEOUT,
+                             catch_response=True) as resp:
+            items = 0
+            failed = resp.status_code != 200
+            if failed:
+                resp.failure(f"{name}: status {resp.status_code}")
+            else:
+                try:
+                    items = count_items(resp.json())
+                except ValueError:
+                    failed = True
+                    resp.failure(f"{name}: response is not JSON")
+            record(endpoint, resp.request_meta["response_time"], len(resp.content or b""), items, failed, **cell)
+
+
+class VisitorScalingUser(ScalingMixin, BaseHttpUser):
+    wait_time = user_wait_time(1, 3)
+
+    def on_start(self):
+        self.headers = {"Authorization": f"token {API_KEY}:{API_SECRET}"}
+
+    @task
+    def get_visitors(self):
+        width, location = next(VISITOR_CELLS)
+        from_date, to_date = date_range(width)
+        query = urlencode({"location": location, "from_date": from_date, "to_date": to_date})
+        self.measure(
+            "get_visitors",
+            f"/api/method/visitor_management.custom_api.visitor.get_visitors?{query}",
+            f"get_visitors [{width_label(width)}, {location or 'all locations'}]",
+            headers=self.headers, width_days=width, location=location,
+        )
+
+
+class PayrollScalingUser(ScalingMixin, SessionPoolMixin, BaseHttpUser):
+    wait_time = user_wait_time(1, 3)
+    host = "http://14.99.126.171"
+
+    def on_start(self):
+        creds = EMPLOYEES.next(self)
+        self.user_email = creds["usr"]
+        if self.login_from_pool(creds) is None:
+            raise StopUser(f"Login failed for user: {self.user_email}")
+
+    @task
+    def track_requests(self):
+        width, page_size = next(TRACK_CELLS)
+        from_date, to_date = date_range(width)
+        self.measure(
+            "track_requests",
+            "/api/method/payroll_management.api.track_requests",
+            f"track_requests [{width_label(width)}, page_size {page_size}]",
+            params={"request_type": "Self", "from_date": from_date, "to_date": to_date, "page_size": page_size},
+            width_days=width, page_size=page_size,
+        )
+
+    @task
+    def leave_tracker(self):
+        page_size = next(LEAVE_CELLS)
+        self.measure(
+            "get_leave_tracker_details",
+            "/api/method/payroll_management.api.get_leave_tracker_details",
+            f"get_leave_tracker_details [page_size {page_size}]",
+            params={"request": "Self", "year": str(END.year), "user": self.user_email, "page_size": page_size},
+            page_size=page_size,
+        )
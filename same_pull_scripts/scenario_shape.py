@@ -0,0 +1,9 @@
+"""Load shape for the k6 TEST_TYPE scenarios (config/scenarios.js).
+
+Combine it with any script in this folder:
+
+    TEST_TYPE=load TARGET_VUS=600 locust -f test_payroll.py,scenario_shape.py --headless
+
+Add ARRIVAL_RATE=<iterations/sec at peak> for an open (arrival-rate) workload.
+"""
+from common.shapes import ScenarioShape  # noqa: F401
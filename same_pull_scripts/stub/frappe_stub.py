@@ -0,0 +1,498 @@
+"""Local asyncio stand-in for the Frappe/ERPNext endpoints the locustfiles hit.
+
+Serves login/session, core.factory.api, hr_operations.v2.*,
+payroll_management.api.* and visitor_management.custom_api.* with response
+shapes taken from the live system (see ../api_responses.csv). Latency,
+response size and error injection are set per endpoint in endpoints.json:
+
+    "latency_ms": {"dist": "lognormal", "median": 40, "p99": 400}
+                | {"dist": "uniform", "min": 5, "max": 50} | {"dist": "fixed", "value": 10}
+    "rows": 20                       list length of generated list responses
+    "pad_bytes": 0                   extra payload bytes per response
+    "errors": {"deadlock": 0.001, "403": 0.0, "500": 0.0, "502": 0.0, "503": 0.0, "insufficient": 0.0}
+
+Responses are encoded once at startup (payroll approvals are the only
+stateful endpoint), the parser is a bare asyncio.Protocol and ``--workers``
+forks processes that share the port through SO_REUSEPORT, so the stub keeps
+well ahead of the load generator:
+
+    python stub/frappe_stub.py --port 8000 --workers 4
+    locust -f test_payroll.py -H http://127.0.0.1:8000
+
+Every worker answers the same: the user is encoded in the session id, and
+payroll request states live in memory shared by the workers.
+
+Unknown /api/method/* paths answer with the "fallback" entry, so catalog
+driven runs work too. Per-path request counts are printed on exit.
+"""
+import argparse
+import asyncio
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import random
+import secrets
+import signal
+import socket
+import struct
+import sys
+from collections import Counter, deque
+from urllib.parse import parse_qsl
+
+try:
+    import uvloop
+except ImportError:  # optional; plain asyncio is fast enough for most runs
+    uvloop = None
+
+# ---------------- CONFIG ---------------- #
+STUB_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG = os.path.join(STUB_DIR, "endpoints.json")
+Z_99 = 2.3263  # standard normal quantile for p99
+MAX_HEADER_BYTES = 64 * 1024
+MAX_REQUESTS = 1 << 20  # payroll requests the shared state can hold (one byte each)
+
+REASONS = {200: "OK", 400: "BAD REQUEST", 403: "FORBIDDEN", 404: "NOT FOUND", 417: "EXPECTATION FAILED",
+           500: "INTERNAL SERVER ERROR", 502: "BAD GATEWAY", 503: "SERVICE UNAVAILABLE"}
+
+ERROR_BODIES = {
+    "deadlock": (500, {
+        "exception": "frappe.exceptions.QueryDeadlockError: (1213, 'Deadlock found when trying to get lock; "
+                     "try restarting transaction')",
+        "exc_type": "QueryDeadlockError",
+        "_server_messages": "[]",
+    }),
+    "403": (403, {
+        "exception": "frappe.exceptions.PermissionError: Not permitted",
+        "exc_type": "PermissionError",
+        "_server_messages": json.dumps([json.dumps({"message": "Not permitted", "title": "Message"})]),
+    }),
+    "500": (500, {"exception": "Internal Server Error", "exc_type": "Exception", "_server_messages": "[]"}),
+    "502": (502, None),
+    "503": (503, None),
+    # The live system answers some permission problems with a 200.
+    "insufficient": (200, {"message": "Insufficient permissions to access this resource."}),
+}
+
+
+# ---------------- RESPONSE SHAPES ---------------- #
+def _rows(prefix, count, **fields):
+    return [{"name": f"{prefix}-{i:05d}", "modified": "2025-11-24 15:19:44.218891", **fields} for i in range(count)]
+
+
+def _visitor(i):
+    return {
+        "name": f"VT_1125_{i:04d}", "visitor_name": f"Visitor {i}", "entry_time": "2025-11-24 15:19:44.218891",
+        "exit_time": None, "image": None, "visitor_status": "In", "type_of_visit": "Others",
+        "email": f"visitor{i}@example.com", "mobile_number": f"89259{i:05d}",
+        "organisation_institution": "TechNova Solutions Pvt. Ltd.", "referral_name": "emp1@erp.in",
+        "location": "Open Work Space 2 - IITMRP E Block",
+    }
+
+
+def build_body(spec):
+    """Static response body for an endpoint spec (``body`` literal or a generated ``shape``)."""
+    if "body" in spec:
+        return spec["body"]
+    rows = spec.get("rows", 20)
+    shape = spec.get("shape", "list")
+    prefix = spec.get("prefix", "REC")
+    if shape == "list":
+        return {"message": {"data": _rows(prefix, rows, status="Open", owner="emp1@erp.in"), "total_count": rows * 5}}
+    if shape == "records":
+        return {"message": _rows(prefix, rows, status="Pending", employee="emp95@erp.in")}
+    if shape == "counts":
+        return {"message": {key: random.randint(0, 500) for key in spec.get("keys", ["total", "open", "closed"])}}
+    if shape == "visitors":
+        return {"message": {"status": "success", "status_code": 200, "total_visitors": rows,
+                            "visitors": [_visitor(i) for i in range(rows)]}}
+    if shape == "options":
+        return {"message": [{"name": f"{prefix} {i}", "value": f"{prefix}-{i:03d}"} for i in range(rows)]}
+    raise ValueError(f"Unknown shape {shape!r}")
+
+
+class Latency:
+    def __init__(self, spec):
+        self.dist = spec.get("dist", "fixed")
+        if self.dist == "lognormal":
+            self.mu = math.log(spec["median"] / 1000)
+            self.sigma = max(0.0, math.log(spec["p99"] / spec["median"]) / Z_99)
+        elif self.dist == "uniform":
+            self.low, self.high = spec["min"] / 1000, spec["max"] / 1000
+        elif self.dist == "fixed":
+            self.value = spec.get("value", 0) / 1000
+        else:
+            raise ValueError(f"Unknown latency distribution {self.dist!r}")
+
+    def sample(self):
+        if self.dist == "lognormal":
+            return random.lognormvariate(self.mu, self.sigma)
+        if self.dist == "uniform":
+            return random.uniform(self.low, self.high)
+        return self.value
+
+
+def encode_response(status, body, extra_headers=b"", pad_bytes=0):
+    if body is None:
+        payload = f"<html><body><h1>{status} {REASONS[status]}</h1></body></html>".encode()
+        content_type = b"text/html"
+    else:
+        if pad_bytes:
+            body = {**body, "_pad": "x" * pad_bytes}
+        payload = json.dumps(body, separators=(",", ":")).encode()
+        content_type = b"application/json"
+    return (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n".encode()
+        + b"Content-Type: " + content_type + b"\r\nServer: frappe-stub\r\n"
+        + extra_headers
+        + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+        + payload
+    )
+
+
+class Endpoint:
+    def __init__(self, path, spec, defaults):
+        spec = {**defaults, **spec}
+        self.path = path
+        self.handler = spec.get("handler")
+        self.latency = Latency(spec.get("latency_ms", {}))
+        self.pad_bytes = spec.get("pad_bytes", 0)
+        self.response = encode_response(200, build_body(spec), pad_bytes=self.pad_bytes) if not self.handler else None
+        # cumulative error table: [(threshold, encoded response)]
+        self.errors = []
+        threshold = 0.0
+        for kind, probability in (spec.get("errors") or {}).items():
+            if probability > 0:
+                threshold += probability
+                status, body = ERROR_BODIES[kind]
+                self.errors.append((threshold, encode_response(status, body)))
+
+
+# ---------------- STATEFUL HANDLERS ---------------- #
+class PayrollRequests:
+    """Payroll request states in an anonymous shared mmap, so forked workers see one list.
+
+    Byte 0-7 hold the next request number, then one state byte per request
+    number. Created before the fork; updates take a process-shared lock.
+    """
+    PENDING = b"\x01"
+    APPROVED = b"\x02"
+    HEADER = 8
+
+    def __init__(self, seed, capacity=MAX_REQUESTS):
+        self.capacity = capacity
+        self.lock = multiprocessing.Lock()
+        self.states = mmap.mmap(-1, self.HEADER + capacity)  # MAP_SHARED: survives os.fork()
+        self.states[self.HEADER:self.HEADER + seed] = self.PENDING * seed
+        struct.pack_into("<Q", self.states, 0, seed)
+
+    @staticmethod
+    def name(number):
+        return f"PR-REQ-{number:05d}"
+
+    def number(self, name):
+        prefix, _, digits = (name or "").rpartition("-")
+        if prefix != "PR-REQ" or not digits.isdigit() or int(digits) >= self.capacity:
+            return None
+        return int(digits)
+
+    def pending(self, count):
+        names, offset = [], self.HEADER
+        while len(names) < count:
+            offset = self.states.find(self.PENDING, offset)
+            if offset < 0:
+                break
+            names.append(self.name(offset - self.HEADER))
+            offset += 1
+        return names
+
+    def create(self):
+        with self.lock:
+            number, = struct.unpack_from("<Q", self.states, 0)
+            if number >= self.capacity:
+                return None
+            self.states[self.HEADER + number] = self.PENDING[0]
+            struct.pack_into("<Q", self.states, 0, number + 1)
+        return self.name(number)
+
+    def approve(self, name):
+        number = self.number(name)
+        if number is None:
+            return False
+        with self.lock:
+            if self.states[self.HEADER + number] != self.PENDING[0]:
+                return False
+            self.states[self.HEADER + number] = self.APPROVED[0]
+        return True
+
+
+class StubState:
+    """Sessions and payroll approvals. Nothing is per process: the sid carries the user."""
+
+    def __init__(self, requests):
+        self.requests = requests
+
+    def login(self, request):
+        fields = request.form()
+        usr = fields.get("usr") or "Administrator"
+        sid = secrets.token_hex(8) + usr.encode().hex()
+        cookies = (
+            f"Set-Cookie: sid={sid}; Path=/; HttpOnly\r\n"
+            f"Set-Cookie: system_user=yes; Path=/\r\n"
+            f"Set-Cookie: full_name={usr}; Path=/\r\n"
+            f"Set-Cookie: user_id={usr}; Path=/\r\n"
+        ).encode()
+        return encode_response(200, {"message": "Logged In", "home_page": "/app", "full_name": usr}, cookies)
+
+    def logged_user(self, request):
+        sid = request.sid() or ""
+        try:
+            usr = bytes.fromhex(sid[16:]).decode() or "Guest"
+        except ValueError:
+            usr = "Guest"
+        return encode_response(200, {"message": usr})
+
+    def csrf_token(self, request):
+        return encode_response(200, {"message": secrets.token_hex(16)})
+
+    def request_approvals(self, request):
+        rows = [{"name": name, "status": "Pending", "request_type": "Travel", "employee": "emp95@erp.in"}
+                for name in self.requests.pending(50)]
+        return encode_response(200, {"message": rows})
+
+    def create_request(self, request):
+        name = self.requests.create()
+        if name is None:
+            return encode_response(417, {"exc_type": "ValidationError",
+                                         "_server_messages": json.dumps(["Too many payroll requests"])})
+        return encode_response(200, {"message": {"status": "success", "name": name}})
+
+    def approve_request(self, request):
+        record = request.query().get("record") or request.form().get("record")
+        if not self.requests.approve(record):
+            return encode_response(417, {"exc_type": "ValidationError",
+                                         "_server_messages": json.dumps([f"{record} is not pending"])})
+        return encode_response(200, {"message": {"status": "success", "record": record}})
+
+
+class Request:
+    __slots__ = ("method", "target", "headers", "body")
+
+    def __init__(self, method, target, headers, body):
+        self.method = method
+        self.target = target
+        self.headers = headers
+        self.body = body
+
+    def query(self):
+        return dict(parse_qsl(self.target.partition("?")[2]))
+
+    def form(self):
+        if not self.body:
+            return {}
+        if self.headers.get("content-type", "").startswith("application/json"):
+            try:
+                data = json.loads(self.body)
+            except ValueError:
+                return {}
+            return data if isinstance(data, dict) else {}
+        return dict(parse_qsl(self.body.decode("latin-1")))
+
+    def sid(self):
+        for part in self.headers.get("cookie", "").split(";"):
+            key, _, value = part.strip().partition("=")
+            if key == "sid":
+                return value
+        return None
+
+
+# ---------------- SERVER ---------------- #
+class StubProtocol(asyncio.Protocol):
+    def __init__(self, app):
+        self.app = app
+        self.buffer = bytearray()
+        self.transport = None
+        self.queue = deque()  # responses waiting for their latency, kept in request order
+        self.closing = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+    def data_received(self, data):
+        self.buffer += data
+        buffer, offset = self.buffer, 0
+        while True:
+            end = buffer.find(b"\r\n\r\n", offset)
+            if end < 0:
+                if len(buffer) - offset > MAX_HEADER_BYTES:
+                    self.transport.close()
+                    return
+                break
+            head = buffer[offset:end].decode("latin-1").split("\r\n")
+            headers = {}
+            for line in head[1:]:
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.reject()
+                return
+            if len(buffer) < end + 4 + length:
+                break
+            body = bytes(buffer[end + 4:end + 4 + length])
+            offset = end + 4 + length
+            method, target, _ = (head[0].split(" ", 2) + ["", ""])[:3]
+            if headers.get("connection", "").lower() == "close":
+                self.closing = True
+            self.dispatch(Request(method, target, headers, body))
+        del buffer[:offset]
+        self.flush()
+
+    def reject(self):
+        # Unparseable framing: answer 400 after the queued responses and close.
+        self.app.counts["400"] += 1
+        self.queue.append([self.app.bad_request])
+        self.closing = True
+        self.buffer.clear()
+        self.flush()
+
+    def dispatch(self, request):
+        response, delay = self.app.handle(request)
+        slot = [None]
+        self.queue.append(slot)
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self.complete, slot, response)
+        else:
+            slot[0] = response  # written by flush() once the whole read is parsed
+
+    def complete(self, slot, response):
+        slot[0] = response
+        self.flush()
+
+    def flush(self):
+        # HTTP/1.1 pipelining: answers leave in request order, in one write.
+        ready = []
+        while self.queue and self.queue[0][0] is not None:
+            ready.append(self.queue.popleft()[0])
+        if ready and self.transport is not None:
+            self.transport.write(b"".join(ready))
+        if self.closing and not self.queue and self.transport is not None:
+            self.transport.close()
+
+
+class StubApp:
+    def __init__(self, config, requests):
+        defaults = config.get("defaults", {})
+        self.state = StubState(requests)
+        self.endpoints = {path: Endpoint(path, spec, defaults) for path, spec in config["endpoints"].items()}
+        self.fallback = Endpoint("*", config.get("fallback", {"shape": "list"}), defaults)
+        self.not_found = encode_response(404, {"exc_type": "DoesNotExistError", "_server_messages": "[]"})
+        self.bad_request = encode_response(400, None)
+        self.counts = Counter()
+
+    def handle(self, request):
+        path = request.target.partition("?")[0]
+        endpoint = self.endpoints.get(path)
+        if endpoint is None:
+            if not path.startswith("/api/"):
+                self.counts["404"] += 1
+                return self.not_found, 0
+            endpoint = self.fallback
+        self.counts[endpoint.path] += 1
+
+        delay = endpoint.latency.sample()
+        if endpoint.errors:
+            roll = random.random()
+            for threshold, response in endpoint.errors:
+                if roll < threshold:
+                    return response, delay
+        if endpoint.handler:
+            return getattr(self.state, endpoint.handler)(request), delay
+        return endpoint.response, delay
+
+
+def make_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(4096)
+    sock.setblocking(False)
+    return sock
+
+
+def serve(host, port, config, requests):
+    app = StubApp(config, requests)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(lambda: StubProtocol(app), sock=make_socket(host, port))
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set_result, None)
+        async with server:
+            await stop
+
+    if uvloop is not None:
+        uvloop.install()
+    asyncio.run(main())
+    for path, count in app.counts.most_common():
+        print(f"[STUB pid={os.getpid()}] {count:>9} {path}", file=sys.stderr)
+
+
+def load_config(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Frappe stand-in server for offline load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="processes sharing the port (SO_REUSEPORT)")
+    parser.add_argument("--config", default=DEFAULT_CONFIG)
+    parser.add_argument("--no-latency", action="store_true", help="answer immediately (generator benchmarks)")
+    parser.add_argument("--no-errors", action="store_true", help="disable error injection")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    overrides = {}
+    if args.no_latency:
+        overrides["latency_ms"] = {"dist": "fixed", "value": 0}
+    if args.no_errors:
+        overrides["errors"] = {}
+    if overrides:
+        config["defaults"] = {**config.get("defaults", {}), **overrides}
+        for spec in list(config["endpoints"].values()) + [config.setdefault("fallback", {"shape": "list"})]:
+            for key in overrides:
+                spec.pop(key, None)
+
+    print(f"Frappe stub on http://{args.host}:{args.port} ({args.workers} worker(s), config {args.config})")
+    requests = PayrollRequests(config.get("pending_seed", 200))
+    children = []
+    for _ in range(args.workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            serve(args.host, args.port, config, requests)
+            os._exit(0)
+        children.append(pid)
+    try:
+        serve(args.host, args.port, config, requests)
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except ProcessLookupError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
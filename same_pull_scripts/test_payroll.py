@@ -1,6 +1,15 @@
 import random
-from json import JSONDecodeError  # Corrected import
-from locust import HttpUser, task, between
+from locust import task
+from locust.exception import StopUser
+
+from common.pacing import user_wait_time
+from common.session_pool import SessionPoolMixin
+from common.naming import tags
+from common.feeder import data_pool
+from common.teardown import created, run_tag
+from common.validation import checked_request
+from common.work_queue import WorkQueue
+from common.users import BaseHttpUser
 
 # --- Configuration ---
 # It's better to pass the host via the command line: --host=http://14.99.126.171
@@ -9,17 +18,30 @@ HOST = "http://14.99.126.171"
 
 # --- User Pools ---
 # Consider using a more secure method for credentials in production tests.
-EMPLOYEES = [{"usr": "emp95@erp.in", "pwd": "Agnikul_1"}]
-PL_USERS = [{"usr": "emp54@erp.in", "pwd": "Agnikul_1"}]
-FL_USERS = [{"usr": "emp50@erp.in", "pwd": "Agnikul_1"}]
+# Each pool is split into disjoint slices across distributed workers.
+EMPLOYEES = data_pool("payroll.EMPLOYEES", [{"usr": "emp95@erp.in", "pwd": "Agnikul_1"}])
+PL_USERS = data_pool("payroll.PL_USERS", [{"usr": "emp54@erp.in", "pwd": "Agnikul_1"}])
+FL_USERS = data_pool("payroll.FL_USERS", [{"usr": "emp50@erp.in", "pwd": "Agnikul_1"}])
 
+# Pending approvals, refreshed in the background and claimed once by approvers.
+# The list depends on the approver, so each PL account has its own queue.
+REQUEST_APPROVALS = "/api/method/payroll_management.api.request_approvals"
+pending_queues = {}  # PL account -> WorkQueue
 
-class ERPUser(HttpUser):
+
+def pending_queue(usr):
+    queue = pending_queues.get(usr)
+    if queue is None:
+        queue = pending_queues[usr] = WorkQueue(REQUEST_APPROVALS, label=usr)
+    return queue
+
+
+class ERPUser(SessionPoolMixin, BaseHttpUser):
     """
     Base class for all ERP users.
     Handles login and stores user-specific information.
     """
-    wait_time = between(1, 3)  # Simulates realistic user think time
+    wait_time = user_wait_time(1, 3)  # Simulates realistic user think time
     host = HOST
 
     # Each subclass will define its own user_pool
@@ -30,60 +52,18 @@ class ERPUser(HttpUser):
         Called when a virtual user is started.
         Logs in the user and stores credentials.
         """
-        # Pick a random user from the pool defined in the subclass
-        creds = random.choice(self.user_pool)
+        # Next user from this worker's slice of the subclass's pool
+        creds = self.user_pool.next(self)
         self.user_email = creds["usr"]
 
         print(f"User {self.user_email} starting...")
 
-        # Use catch_response=True to manually mark the request as success or failure
-        with self.client.post(
-            "/api/method/login",
-            json=creds,
-            catch_response=True,
-            name="/api/method/login" # Explicit name for cleaner reporting
-        ) as resp:
-            try:
-                if resp.status_code == 200 and resp.json().get("message") == "Logged In":
-                    resp.success()
-                    print(f"User {self.user_email} logged in successfully.")
-                else:
-                    # Mark as failure and provide a reason
-                    resp.failure(f"Login failed. Status: {resp.status_code}, Body: {resp.text}")
-                    # Stop the user if login fails, as all subsequent tasks will fail anyway
-                    self.environment.runner.stop_user(self)
-            except JSONDecodeError:
-                resp.failure(f"Login failed. Could not decode JSON response. Body: {resp.text}")
-                self.environment.runner.stop_user(self)
-
-    def _get_random_pending_request(self):
-        """
-        Helper method to fetch a list of pending requests and return a random one.
-        This prevents race conditions from multiple users approving the same request.
-        """
-        with self.client.get(
-            "/api/method/payroll_management.api.request_approvals",
-            catch_response=True,
-            name="/api/method/payroll_management.api.request_approvals (for pending request)"
-        ) as resp:
-            if resp.status_code == 200:
-                try:
-                    data = resp.json()
-                    # Assuming the API returns a list of requests under a 'message' or 'data' key
-                    # Adjust the key based on your actual API response structure
-                    pending_requests = data.get("message", [])
-                    if pending_requests:
-                        # Assuming each request is a dict with a 'name' field
-                        request_names = [req.get('name') for req in pending_requests if req.get('name')]
-                        if request_names:
-                            return random.choice(request_names)
-                except (JSONDecodeError, KeyError) as e:
-                    resp.failure(f"Failed to parse pending requests: {e}")
-                    return None
-            else:
-                resp.failure(f"Failed to get pending requests. Status: {resp.status_code}")
-                return None
-        return None
+        # Log in through the shared session pool: each account is logged in
+        # once per process and the sid cookies are reused by every user.
+        if self.login_from_pool(creds) is None:
+            # Stop the user if login fails, as all subsequent tasks will fail anyway
+            raise StopUser(f"Login failed for user: {self.user_email}")
+        print(f"User {self.user_email} logged in successfully.")
 
 
 class EmployeeUser(ERPUser):
@@ -97,7 +77,7 @@ class EmployeeUser(ERPUser):
     def create_travel_request(self):
         payload = {
             "req_for": "Project",
-            "req_name": f"P1-Test-{random.randint(100, 999)}",
+            "req_name": run_tag(f"P1-Test-{random.randint(100, 999)}"),
             "age": "27",
             "phone_number": "7823450987",
             "aadhaar_attachment": "http://14.99.126.171/payroll_desk",
@@ -113,23 +93,23 @@ class EmployeeUser(ERPUser):
         with self.client.post(
             "/api/method/payroll_management.api.create_travel_accommodation_requests",
             json=payload,
+            headers=self.session_headers,
             catch_response=True
         ) as resp:
             if resp.status_code == 200:
                 resp.success()
+                created("travel_request", resp)
             else:
                 resp.failure(f"Failed to create travel request. Status: {resp.status_code}, Body: {resp.text}")
 
     @task(1)
     def track_self_requests(self):
-        with self.client.get(
+        # Up to 1000 rows: validated from the first bytes instead of parsing the list.
+        checked_request(
+            self.client, "GET",
             "/api/method/payroll_management.api.track_requests?request_type=Self&from_date=&to_date=&page_size=1000",
-            catch_response=True
-        ) as resp:
-            if resp.status_code == 200:
-                resp.success()
-            else:
-                resp.failure(f"Failed to track self requests. Status: {resp.status_code}")
+            expect_key="message",
+        )
 
     @task(1)
     def leave_tracker(self):
@@ -147,15 +127,13 @@ class EmployeeUser(ERPUser):
 
     @task(1)
     def export_reimbursements(self):
-        with self.client.get(
+        # Export endpoints might return a file or a 200 OK: only the status is
+        # checked and the download is counted, not buffered.
+        checked_request(
+            self.client, "GET",
             "/api/method/payroll_management.api.export_reimbursements",
-            catch_response=True
-        ) as resp:
-            # Export endpoints might return a file or a 200 OK. Adjust as needed.
-            if resp.status_code == 200:
-                resp.success()
-            else:
-                resp.failure(f"Failed to export reimbursements. Status: {resp.status_code}")
+            expect_prefix=None,
+        )
 
 
 class PLUser(ERPUser):
@@ -164,17 +142,25 @@ class PLUser(ERPUser):
     """
     user_pool = PL_USERS
     weight = 2
+    pending_requests = None  # set once logged in
+
+    def on_start(self):
+        super().on_start()
+        # This account's pending approvals, polled with the client of one of its users.
+        self.pending_requests = pending_queue(self.user_email)
+        self.pending_requests.join(self)
+
+    def on_stop(self):
+        if self.pending_requests is not None:
+            self.pending_requests.leave(self)
 
     @task(2)
     def team_track_requests(self):
-        with self.client.get(
+        checked_request(
+            self.client, "GET",
             "/api/method/payroll_management.api.track_requests?request_type=Team&from_date=&to_date=&page_size=1000",
-            catch_response=True
-        ) as resp:
-            if resp.status_code == 200:
-                resp.success()
-            else:
-                resp.failure(f"Failed to track team requests. Status: {resp.status_code}")
+            expect_key="message",
+        )
 
     @task(1)
     def request_approvals(self):
@@ -190,10 +176,10 @@ class PLUser(ERPUser):
     @task(3) # Higher weight as this is a key PL action
     def approve_request(self):
         """
-        Dynamically fetches a pending request and approves it.
-        This is more realistic than using a hardcoded ID.
+        Claims a pending request from the shared work queue and approves it.
+        Each record is claimed by exactly one approver.
         """
-        record_to_approve = self._get_random_pending_request()
+        record_to_approve = self.pending_requests.claim()
 
         if record_to_approve:
             params = {
@@ -206,7 +192,7 @@ class PLUser(ERPUser):
                 "/api/method/payroll_management.api.approve_request",
                 params=params,
                 catch_response=True,
-                name=f"/api/method/payroll_management.api.approve_request [{record_to_approve}]"
+                context=tags(record=record_to_approve)
             ) as resp:
                 if resp.status_code == 200:
                     resp.success()
@@ -228,12 +214,13 @@ class FLUser(ERPUser):
     @task(3)
     def view_request_details(self):
         """
-        Dynamically fetches a request to view details for.
-        Reuses the helper method from PLUser for simplicity.
+        Picks a request to view details for from a PL approver's work queue.
+        Viewing does not claim the record, so it stays available to approvers.
         """
         # NOTE: You might need a different endpoint to get a list of *viewable* requests
-        # rather than just *pending* ones. For this example, we'll reuse the pending list.
-        record_to_view = self._get_random_pending_request()
+        # rather than just *pending* ones. For this example, we'll reuse the PL pending lists.
+        queues = list(pending_queues.values())
+        record_to_view = random.choice(queues).sample() if queues else None
 
         if record_to_view:
             params = {"doctype": "PR_Reimbursement_Requests", "name": record_to_view}
@@ -241,7 +228,7 @@ class FLUser(ERPUser):
                 "/api/method/payroll_management.api.view_details",
                 params=params,
                 catch_response=True,
-                name=f"/api/method/payroll_management.api.view_details [{record_to_view}]"
+                context=tags(record=record_to_view)
             ) as resp:
                 if resp.status_code == 200:
                     resp.success()
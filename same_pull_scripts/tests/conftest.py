@@ -0,0 +1,7 @@
+import os
+import sys
+
+import locust  # noqa: F401  (gevent monkey-patching has to come first, as in a Locust run)
+
+# Tests import the scripts' helpers the way the locustfiles do: ``from common.x import ...``.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,27 @@
+"""Sticky CSV feeders."""
+import pytest
+
+from common.feeder import CsvFeeder
+
+
+class User:
+    pass
+
+
+@pytest.fixture
+def feeder(tmp_path):
+    path = tmp_path / "employees.csv"
+    path.write_text("usr,pwd\n" + "".join(f"emp{i}@erp.in,secret\n" for i in range(3)), encoding="utf-8")
+    return CsvFeeder("payroll.EMPLOYEES", str(path), order="sticky")
+
+
+def test_sticky_feeder_keeps_a_row_per_user(feeder):
+    first, second = User(), User()
+    assert feeder.next(first)["usr"] == "emp0@erp.in"
+    assert feeder.next(second)["usr"] == "emp1@erp.in"
+    assert feeder.next(first)["usr"] == "emp0@erp.in"
+
+
+def test_sticky_feeder_needs_the_user(feeder):
+    with pytest.raises(ValueError, match="sticky"):
+        feeder.next()
@@ -0,0 +1,36 @@
+"""Request name templates keep endpoints apart and drop only per-request values."""
+import pytest
+
+from common.naming import template
+
+GET_DATA = "/api/method/core.factory.api.get_data"
+NB_STATS = "/api/method/hr_operations.v2.addon.nb_stats"
+
+
+@pytest.mark.parametrize("url, expected", [
+    (f"{GET_DATA}?key=ls_employees&page=1&limit=20&query=", f"{GET_DATA}?key=ls_employees"),
+    (f"{GET_DATA}?key=ls_reports&assignment_type=Onboarding&page=7&limit=50 [page 6-20]",
+     f"{GET_DATA}?key=ls_reports&assignment_type=Onboarding [page 6-20]"),
+    (f"{GET_DATA}?key=assignment_data&name=HRA_0925_5848", f"{GET_DATA}?key=assignment_data"),
+    (f"{NB_STATS}?logs=log", f"{NB_STATS}?logs=log"),
+    ("/api/resource/Employee/HR-EMP-00012", "/api/resource/Employee/{id}"),
+    ("/api/resource/Visitor/123456", "/api/resource/Visitor/{id}"),
+    ("approve HRA_0925_5848 for emp54@erp.in", "approve {id} for {user}"),
+    ("Level 2024 report", "Level 2024 report"),
+])
+def test_template(url, expected):
+    assert template(url) == expected
+
+
+def test_hr_ops_fl_endpoints_stay_separate():
+    names = {
+        template(f"{GET_DATA}?key={key}&assignment_type={kind}&page=1&limit=20")
+        for key in ("ls_reports", "ls_assignments") for kind in ("Onboarding", "Deboarding")
+    }
+    names |= {template(NB_STATS), template(f"{NB_STATS}?logs=log")}
+    assert len(names) == 6
+
+
+def test_locations_stay_separate():
+    url = "/api/method/visitor_management.custom_api.get_visitors?location={}&from_date=2025-01-01&to_date=2025-01-31"
+    assert template(url.format("TAMCOE")) != template(url.format("Thaiyur"))
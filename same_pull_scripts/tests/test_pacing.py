@@ -0,0 +1,49 @@
+"""Schedule details: corrected entries keep their outcome, and a multi-step flow is one iteration."""
+import gevent
+from locust import User
+from locust.env import Environment
+
+from common import pacing
+
+
+def test_failed_request_fails_its_corrected_entry(monkeypatch):
+    monkeypatch.setattr(pacing, "CO_CORRECTION", True)
+    env = Environment()
+    pacing._setup(env)
+    monkeypatch.setitem(pacing._lag, gevent.getcurrent(), 0.5)
+
+    for exception in (None, RuntimeError("503")):
+        env.events.request.fire(request_type="GET", name="track_requests", response_time=100,
+                                response_length=10, exception=exception, context={})
+
+    corrected = env.stats.get("track_requests" + pacing.CORRECTED_SUFFIX, "GET")
+    assert corrected.num_requests == 2 and corrected.num_failures == 1
+    assert corrected.max_response_time == 600
+    assert not env.stats.errors  # the failures table only lists raw requests
+
+
+class Flow(pacing.PacedSequentialTaskSet):
+    tasks = [lambda self: None] * 3
+
+
+class FlowUser(User):
+    tasks = [Flow]
+
+    def wait_time(self):
+        return 7
+
+
+def test_scheduled_flow_waits_once_per_pass(monkeypatch):
+    monkeypatch.setattr(pacing, "OPEN_MODEL", True)
+    flow = Flow(FlowUser(Environment()))
+    waits = []
+    for _ in range(6):
+        flow.get_next_task()
+        waits.append(flow.wait_time())
+    assert waits == [0, 0, 7, 0, 0, 7]
+
+
+def test_closed_model_flow_waits_between_steps():
+    flow = Flow(FlowUser(Environment()))
+    flow.get_next_task()
+    assert flow.wait_time() == 7
@@ -0,0 +1,69 @@
+"""Retried attempts are named like every other request of a prefixed user."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from locust import events
+from locust.env import Environment
+
+from common.retry import RetryBudget, RetryPolicy
+from common.users import BaseHttpUser
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    answers = []
+
+    def do_GET(self):
+        status = FlakyHandler.answers.pop(0) if FlakyHandler.answers else 200
+        body = b'{"message": "ok"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def host():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class PrefixedUser(BaseHttpUser):
+    abstract = True
+    app = "payroll"
+
+
+@pytest.fixture
+def requests_seen():
+    seen = []
+
+    def record(name, exception=None, **kwargs):
+        seen.append((name, exception is None))
+
+    events.request.add_listener(record)
+    yield seen
+    events.request.remove_listener(record)
+
+
+def test_retried_attempt_keeps_template_and_prefix(host, monkeypatch, requests_seen):
+    monkeypatch.setattr(PrefixedUser, "host", host)
+    monkeypatch.setattr(FlakyHandler, "answers", [503])
+    user = PrefixedUser(Environment(user_classes=[PrefixedUser], events=events))
+    policy = RetryPolicy(base_delay=0, budget=RetryBudget(cap=10))
+
+    resp = policy.request(user.client, "GET", "/api/resource/Employee/HR-EMP-00012")
+
+    assert resp.status_code == 200
+    assert requests_seen == [
+        ("[payroll] /api/resource/Employee/{id} [retried]", False),
+        ("[payroll] /api/resource/Employee/{id}", True),
+    ]
@@ -0,0 +1,33 @@
+"""Failed requests count against a scaling cell instead of vanishing from it."""
+import pytest
+
+from common import scaling
+
+pytest.importorskip("numpy")
+
+ENDPOINT = "get_visitors"
+
+
+def sample(width, latency_ms, failed=False):
+    return (ENDPOINT, width, "TAMCOE", "", latency_ms, 2048, 10 * width, int(failed))
+
+
+def rows():
+    fast = [sample(width, 100 + width) for width in (1, 7, 30) for _ in range(20)]
+    timeouts = [sample(90, 60000, failed=True) for _ in range(5)] + [sample(90, 150) for _ in range(15)]
+    down = [sample(365, 0, failed=True) for _ in range(3)]
+    return fast + timeouts + down
+
+
+def test_cell_stats_count_failures():
+    cells = {cell[0][1]: cell for cell in scaling.cell_stats(rows())}
+    assert cells["90"][1] == 20 and cells["90"][6] == 5
+    assert cells["90"][5] == 150  # percentiles cover the successful requests
+    assert cells["365"][1:] == (3, None, None, None, None, 3)
+
+
+def test_cells_over_the_error_rate_fail(tmp_path):
+    path = scaling.report(rows(), sla_ms=2000, path=str(tmp_path / "report.md"), error_rate=0.01)
+    table = [line for line in open(path, encoding="utf-8") if line.startswith("| ")][1:]
+    verdicts = {line.split("|")[1].strip(): line.rstrip().rsplit("|", 2)[1].strip() for line in table}
+    assert verdicts == {"1": "ok", "7": "ok", "30": "ok", "90": "FAIL", "365": "FAIL"}
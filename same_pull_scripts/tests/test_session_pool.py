@@ -0,0 +1,125 @@
+"""Session pool logins and refreshes, for a user whose request names carry an ``[app]`` prefix."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import gevent
+import pytest
+from locust import events
+from locust.env import Environment
+
+from common import session_pool
+from common.session_pool import SessionPool, SessionPoolMixin
+from common.users import BaseHttpUser
+
+CREDS = {"usr": "pool@example.com", "pwd": "secret"}
+
+
+class FrappeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    logins = 0
+    accept_logins = 1  # later logins are rejected
+    login_answer = b'{"message": "Logged In"}'
+    csrf_status = 200
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        FrappeHandler.logins += 1
+        if FrappeHandler.logins <= FrappeHandler.accept_logins:
+            self.answer(200, FrappeHandler.login_answer, cookie="sid=abc; Path=/")
+        else:
+            self.answer(401, b'{"message": "Incorrect password"}')
+
+    def do_GET(self):
+        if self.path.startswith(session_pool.CSRF_PATH):
+            self.answer(FrappeHandler.csrf_status, b'{"message": "token"}')
+        else:
+            self.answer(403, b'{"exc_type": "PermissionError"}')
+
+    def answer(self, status, body, cookie=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if cookie:
+            self.send_header("Set-Cookie", cookie)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def host(monkeypatch):
+    FrappeHandler.logins = 0
+    monkeypatch.setattr(session_pool, "pool", SessionPool())
+    monkeypatch.setattr(session_pool, "MIN_REFRESH_AGE", 0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FrappeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class PooledUser(SessionPoolMixin, BaseHttpUser):
+    abstract = True
+    app = "payroll"
+
+
+def make_user(host, monkeypatch):
+    monkeypatch.setattr(PooledUser, "host", host)
+    return PooledUser(Environment(user_classes=[PooledUser], events=events))  # the pool listens on the global events
+
+
+@pytest.fixture
+def failures():
+    names = []
+
+    def record(name, exception=None, **kwargs):
+        if exception:
+            names.append(name)
+
+    events.request.add_listener(record)
+    yield names
+    events.request.remove_listener(record)
+
+
+def test_auth_error_refreshes_before_the_next_request(host, monkeypatch):
+    monkeypatch.setattr(FrappeHandler, "accept_logins", 2)
+    user = make_user(host, monkeypatch)
+    assert user.login_from_pool(CREDS) is not None
+
+    assert user.client.get("/api/resource/Payroll%20Request").status_code == 403
+    assert FrappeHandler.logins == 1  # not from inside the request event
+    assert user.session_refresh_due
+
+    user.client.get("/api/resource/Payroll%20Request")
+    assert FrappeHandler.logins == 2
+    assert session_pool.pool.stats["refreshes"] == 1
+
+
+def test_failed_relogin_of_prefixed_user_does_not_deadlock(host, monkeypatch):
+    user = make_user(host, monkeypatch)
+    assert user.login_from_pool(CREDS) is not None
+
+    with gevent.Timeout(10):
+        user.client.get("/api/resource/Payroll%20Request")
+        resp = user.client.get("/api/resource/Payroll%20Request")
+    assert resp.status_code == 403
+    assert FrappeHandler.logins == 2  # one refresh attempt, not one per failed login
+    assert session_pool.pool.stats["login_failures"] == 1
+
+
+def test_login_without_logged_in_message_fails(host, monkeypatch, failures):
+    monkeypatch.setattr(FrappeHandler, "login_answer", b'{"message": "No App"}')
+    user = make_user(host, monkeypatch)
+    assert user.login_from_pool(CREDS) is None
+    assert failures == [f"[payroll] {session_pool.LOGIN_NAME}"]
+
+
+def test_csrf_error_is_a_failure_but_not_fatal(host, monkeypatch, failures):
+    monkeypatch.setattr(FrappeHandler, "csrf_status", 404)
+    user = make_user(host, monkeypatch)
+    session = user.login_from_pool(CREDS)
+    assert session is not None and session.csrf_token is None
+    assert failures == [f"[payroll] {session_pool.CSRF_NAME}"]
@@ -0,0 +1,28 @@
+"""Unique sharded pools across rebalances."""
+import copy
+
+import pytest
+
+from common.sharding import PoolExhausted, ShardedPool
+
+RECORDS = [{"usr": f"emp{i}@erp.in", "pwd": "secret"} for i in range(6)]
+
+
+def test_unique_pool_does_not_reissue_records_after_a_rebalance():
+    pool = ShardedPool("employees", RECORDS, unique=True)
+    pool.assign(pool.partition(0, 2), 0, 2)
+    issued = [pool.next(), pool.next()]
+    assert issued == [RECORDS[0], RECORDS[2]]
+
+    # A worker left; the master sends the whole pool again, as copies.
+    pool.assign(copy.deepcopy(pool.partition(0, 1)), 0, 1)
+    issued += [pool.next() for _ in range(4)]
+    assert sorted(record["usr"] for record in issued) == sorted(record["usr"] for record in RECORDS)
+    with pytest.raises(PoolExhausted):
+        pool.next()
+
+
+def test_shared_pool_keeps_cycling_after_a_rebalance():
+    pool = ShardedPool("credentials", RECORDS)
+    pool.assign(pool.partition(1, 2), 1, 2)
+    assert [pool.next()["usr"] for _ in range(4)] == ["emp1@erp.in", "emp3@erp.in", "emp5@erp.in", "emp1@erp.in"]
@@ -0,0 +1,70 @@
+"""delete_records against a server that, like Frappe, answers 200 even when a record was not deleted."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from common import teardown
+
+
+class FrappeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    records = set()
+    locked = set()  # linked records: delete_bulk logs the error and carries on
+    delete_batches = []
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        items = json.loads(form["items"][0])
+        FrappeHandler.delete_batches.append(items)
+        FrappeHandler.records -= set(items) - FrappeHandler.locked
+        self.answer({"message": None})
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        (_, _, names), = json.loads(query["filters"][0])
+        self.answer({"message": [{"name": name} for name in names if name in FrappeHandler.records]})
+
+    def answer(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def host(monkeypatch):
+    monkeypatch.setattr(teardown, "DOCTYPES", {"travel_request": "Payroll Request"})
+    FrappeHandler.records = {f"PR-REQ-{i:05d}" for i in range(23)}
+    FrappeHandler.locked = {"PR-REQ-00007"}
+    FrappeHandler.delete_batches = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FrappeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_records_still_there_after_a_200_are_kept(host):
+    entries = [("travel_request", name) for name in sorted(FrappeHandler.records)]
+    failed = teardown.delete_records(entries, host, batch_size=50, rate=0)
+    assert failed == [("travel_request", "PR-REQ-00007")]
+    assert [len(batch) for batch in FrappeHandler.delete_batches] == [10, 10, 3]
+    assert FrappeHandler.records == {"PR-REQ-00007"}
+
+
+def test_unmapped_kind_deletes_nothing_and_keeps_the_journal(host, tmp_path):
+    journal = tmp_path / "run.tsv"
+    journal.write_text("travel_request\tPR-REQ-00001\nvisitor_record\tVIS-0001\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="visitor_record"):
+        teardown.teardown_journal(str(journal), host)
+    assert FrappeHandler.delete_batches == []
+    assert journal.read_text(encoding="utf-8").count("\n") == 2
@@ -0,0 +1,108 @@
+"""checked_request against a server that compresses its answers, and timeouts on slow bodies, on both Locust clients."""
+import gzip
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from locust.env import Environment
+
+from common.users import CompatFastHttpSession, NamedHttpSession
+from common.validation import checked_request
+
+BODY = json.dumps({"message": [{"name": f"REC-{i:04d}", "status": "Pending"} for i in range(500)]}).encode()
+SLOW_BODY_SECONDS = 2
+ENCODERS = {
+    "gzip": gzip.compress,
+    "deflate": zlib.compress,
+    "identity": lambda body: body,
+}
+
+
+class CompressingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/slow":
+            return self.stall_body()
+        encoding = self.path.strip("/") or "identity"
+        body = ENCODERS[encoding](BODY)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stall_body(self):
+        # Headers and half the body at once, the rest only after the client's timeout.
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY[:len(BODY) // 2])
+        self.wfile.flush()
+        time.sleep(SLOW_BODY_SECONDS)
+        self.wfile.write(BODY[len(BODY) // 2:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def host():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompressingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_session(mode, host, env=None):
+    session_class = CompatFastHttpSession if mode == "fast" else NamedHttpSession
+    return session_class(base_url=host, request_event=(env or Environment()).events.request, user=None)
+
+
+@pytest.mark.parametrize("mode", ["requests", "fast"])
+@pytest.mark.parametrize("encoding", sorted(ENCODERS))
+@pytest.mark.parametrize("full_parse_sample", [0, 1])
+def test_compressed_bodies_are_validated_decoded(host, mode, encoding, full_parse_sample):
+    session = make_session(mode, host)
+    resp, body = checked_request(session, "GET", f"/{encoding}", expect_key="message",
+                                 full_parse_sample=full_parse_sample)
+    assert body.failure is None
+    assert body.head.startswith(b'{"message"')
+    assert body.length == len(BODY)
+    assert body.wire_length == len(ENCODERS[encoding](BODY))
+    assert resp.request_meta["response_length"] == len(BODY)
+    if full_parse_sample:
+        assert len(body.data["message"]) == 500
+
+
+@pytest.mark.parametrize("mode", ["requests", "fast"])
+def test_missing_key_still_fails_on_compressed_body(host, mode):
+    _, body = checked_request(make_session(mode, host), "GET", "/gzip", expect_key="data", full_parse_sample=0)
+    assert body.failure == "no 'data' key in the first 4096 bytes"
+
+
+@pytest.mark.parametrize("mode", ["requests", "fast"])
+def test_timeout_covers_the_body_read(host, mode):
+    env = Environment()
+    exceptions = []
+    env.events.request.add_listener(lambda exception=None, **kwargs: exceptions.append(exception))
+    started = time.monotonic()
+    make_session(mode, host, env).get("/slow", timeout=0.5)
+    assert time.monotonic() - started < SLOW_BODY_SECONDS
+    assert len(exceptions) == 1 and exceptions[0] is not None
+
+
+@pytest.mark.parametrize("mode", ["requests", "fast"])
+def test_timeout_covers_a_streamed_body_read(host, mode):
+    started = time.monotonic()
+    resp, body = checked_request(make_session(mode, host), "GET", "/slow", expect_key="message", timeout=0.5)
+    assert time.monotonic() - started < SLOW_BODY_SECONDS
+    assert body is None and resp.request_meta["exception"] is not None
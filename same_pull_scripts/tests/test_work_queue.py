@@ -0,0 +1,57 @@
+"""Work queue refreshes follow the users that joined it."""
+from contextlib import contextmanager
+
+import gevent
+
+from common.work_queue import WorkQueue
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, names):
+        self.names = names
+
+    def json(self):
+        return {"message": [{"name": name} for name in self.names]}
+
+    def success(self):
+        pass
+
+    def failure(self, message):
+        raise AssertionError(message)
+
+
+class FakeClient:
+    def __init__(self, names):
+        self.names = names
+        self.calls = 0
+
+    @contextmanager
+    def get(self, path, name=None, catch_response=False):
+        self.calls += 1
+        yield FakeResponse(self.names)
+
+
+class FakeUser:
+    def __init__(self, names):
+        self.client = FakeClient(names)
+
+
+def test_refresher_moves_to_the_next_user_and_stops_with_the_last():
+    queue = WorkQueue("/api/method/request_approvals", interval=0.01, label="emp54@erp.in")
+    first, second = FakeUser(["PR-REQ-00001"]), FakeUser(["PR-REQ-00002"])
+    queue.join(first)
+    queue.join(second)
+    gevent.sleep(0.05)
+    assert first.client.calls and not second.client.calls
+    assert queue.claim() == "PR-REQ-00001"
+
+    queue.leave(first)
+    calls = first.client.calls
+    gevent.sleep(0.05)
+    assert first.client.calls == calls and second.client.calls
+    assert queue.claim() == "PR-REQ-00002"
+
+    queue.leave(second)
+    assert queue._greenlet is None
@@ -1,10 +1,14 @@
-from locust import HttpUser, task, between
+from locust import task
 import os
-import csv
 import json
 from datetime import datetime
 from requests.exceptions import RequestException
 
+from common.pacing import user_wait_time
+from common.users import BaseHttpUser
+from common.csv_sink import get_sink
+from common.validation import checked_request
+
 # ---------------- CONFIG ---------------- #
 API_KEY = os.getenv("VISITOR_API_KEY", "627d011a1324aa6")
 API_SECRET = os.getenv("VISITOR_API_SECRET", "115f2b70018adf7")
@@ -12,18 +16,18 @@ CSV_FILE = "api_responses.csv"
 MAX_JSON_LENGTH = 1000  # truncate JSON if too long
 REQUEST_TIMEOUT = 10  # seconds
 
-# Ensure CSV has headers if file does not exist
-if not os.path.exists(CSV_FILE):
-    with open(CSV_FILE, mode="w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "timestamp", "api_name", "endpoint", "status_code",
-            "success", "response_json"
-        ])
+CSV_HEADER = [
+    "timestamp", "api_name", "endpoint", "status_code",
+    "success", "response_json"
+]
+
+# One background writer per process; it writes the header for new files and
+# batches/rotates output (see common/csv_sink.py for the CSV_SINK_* knobs).
+csv_sink = get_sink(CSV_FILE, CSV_HEADER)
 
 # ---------------- USER CLASS ---------------- #
-class VisitorUser(HttpUser):
-    wait_time = between(1, 3)
+class VisitorUser(BaseHttpUser):
+    wait_time = user_wait_time(1, 3)
 
     def on_start(self):
         """Set authentication headers for all requests"""
@@ -32,38 +36,36 @@ class VisitorUser(HttpUser):
         }
 
     # ---------------- LOGGING FUNCTION ---------------- #
-    def log_response(self, api_name, url, response, success, full_json):
-        """Log API response to CSV file, truncating JSON if too long."""
+    def log_response(self, api_name, url, response, success, body):
+        """Queue API response for the CSV sink, truncating the body if too long.
+
+        ``body`` is the raw response text where available, so large payloads
+        are sliced instead of being re-serialised with json.dumps.
+        """
         timestamp = datetime.utcnow().isoformat()
         try:
-            json_str = json.dumps(full_json)
+            json_str = body if isinstance(body, str) else json.dumps(body)
             if len(json_str) > MAX_JSON_LENGTH:
                 json_str = json_str[:MAX_JSON_LENGTH] + "...(truncated)"
-            with open(CSV_FILE, mode="a", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow([timestamp, api_name, url, response.status_code, success, json_str])
+            csv_sink.write([timestamp, api_name, url, response.status_code, success, json_str])
         except Exception as e:
             print(f"[LOG ERROR] Failed for {api_name} ({url}): {e}")
 
     # ---------------- API CALL FUNCTION ---------------- #
     def make_get_request(self, api_name, url):
-        """Perform GET request with timeout, handle success/failure, and log full JSON."""
+        """Perform GET request with timeout, handle success/failure, and log the response body.
+
+        The body is streamed: status and the "message" key are checked in its
+        first bytes, which are also what gets logged (see common/validation.py).
+        """
         try:
-            with self.client.get(url, headers=self.headers, name=api_name, catch_response=True, timeout=REQUEST_TIMEOUT) as response:
-                success = False
-                full_json = {}
-                try:
-                    full_json = response.json()
-                    success = response.status_code == 200
-                except Exception as e:
-                    full_json = {"error": f"Invalid JSON: {e}"}
-
-                if success:
-                    response.success()
-                else:
-                    response.failure(f"HTTP {response.status_code}")
-
-                self.log_response(api_name, url, response, success, full_json)
+            response, body = checked_request(
+                self.client, "GET", url, name=api_name, expect_key="message",
+                headers=self.headers, timeout=REQUEST_TIMEOUT,
+            )
+            success = body is not None and body.failure is None
+            logged_body = body.head_text() if body is not None else {"error": "No response body"}
+            self.log_response(api_name, url, response, success, logged_body)
         except RequestException as e:
             print(f"[REQUEST ERROR] {api_name} ({url}): {e}")
             # Log HTTP 0 for connection errors
@@ -1,8 +1,11 @@
-from locust import HttpUser, task, between, SequentialTaskSet
-import random
-import time
+from locust import task
 import json
 
+from common.feeder import data_pool
+from common.pacing import PacedSequentialTaskSet, think, user_wait_time
+from common.teardown import created, run_tag
+from common.users import BaseHttpUser
+
 HOST = "http://14.99.126.171"
 
 SAMPLE_VISITOR = {
@@ -13,9 +16,13 @@ SAMPLE_VISITOR = {
     "organisation": "ABC Corp",
     "location": "IITMRP E Block",
 }
+# Set VISITOR_AGK_VISITORS_FILE to a CSV with these columns for distinct visitors
+# (VISITOR_AGK_VISITORS_ORDER=unique registers each one once).
+VISITORS = data_pool("visitor_agk.VISITORS", [SAMPLE_VISITOR])
 
 
-class VisitorFlow(SequentialTaskSet):
+class VisitorFlow(PacedSequentialTaskSet):
+    visitor = SAMPLE_VISITOR
 
     def on_start(self):
         """
@@ -32,7 +39,7 @@ class VisitorFlow(SequentialTaskSet):
         self.client.get(
             "/api/method/visitor_management.custom_api.visitor.get_org", name="get_org"
         )
-        time.sleep(random.uniform(0.3, 1))
+        think(0.3, 1)
 
     # --------------------------------------------------------------------
     # 2️⃣ GET EMPLOYEE LIST
@@ -43,20 +50,22 @@ class VisitorFlow(SequentialTaskSet):
             "/api/method/visitor_management.custom_api.visitor.get_referral",
             name="get_referral",
         )
-        time.sleep(random.uniform(0.3, 1))
+        think(0.3, 1)
 
     # --------------------------------------------------------------------
     # 3️⃣ GENERATE OTP
     # --------------------------------------------------------------------
     @task
     def generate_otp(self):
-        payload = {"mobile": SAMPLE_VISITOR["mobile"]}
+        # Each pass through the flow registers the next visitor.
+        self.visitor = VISITORS.next(self.user)
+        payload = {"mobile": self.visitor["mobile"]}
         self.client.post(
             "/api/method/visitor_management.custom_api.visitor.generate_and_send_otp",
             json=payload,
             name="generate_otp",
         )
-        time.sleep(random.uniform(0.5, 1.2))
+        think(0.5, 1.2)
 
     # --------------------------------------------------------------------
     # 4️⃣ VERIFY OTP
@@ -64,13 +73,13 @@ class VisitorFlow(SequentialTaskSet):
     @task
     def verify_otp(self):
         # NOTE: You need real OTP; using dummy 0000 for load test
-        payload = {"mobile": SAMPLE_VISITOR["mobile"], "otp": "0000"}
+        payload = {"mobile": self.visitor["mobile"], "otp": "0000"}
         self.client.post(
             "/api/method/visitor_management.custom_api.visitor.verify_otp",
             json=payload,
             name="verify_otp",
         )
-        time.sleep(random.uniform(0.5, 1.2))
+        think(0.5, 1.2)
 
     # --------------------------------------------------------------------
     # 5️⃣ CREATE VISITOR ENTRY RECORD
@@ -78,20 +87,22 @@ class VisitorFlow(SequentialTaskSet):
     @task
     def create_visitor_entry(self):
         data = {
-            "visitor_name": SAMPLE_VISITOR["visitor_name"],
-            "mobile": SAMPLE_VISITOR["mobile"],
-            "email": SAMPLE_VISITOR["email"],
-            "referral": SAMPLE_VISITOR["referral"],
-            "organisation": SAMPLE_VISITOR["organisation"],
-            "location": SAMPLE_VISITOR["location"],
+            "visitor_name": run_tag(self.visitor["visitor_name"]),
+            "mobile": self.visitor["mobile"],
+            "email": self.visitor["email"],
+            "referral": self.visitor["referral"],
+            "organisation": self.visitor["organisation"],
+            "location": self.visitor["location"],
         }
 
-        self.client.post(
+        resp = self.client.post(
             "/api/method/visitor_management.custom_api.visitor.create_visitor_record",
             json={"data": data},
             name="visitor_entry",
         )
-        time.sleep(random.uniform(0.5, 1.5))
+        if resp.status_code == 200:
+            created("visitor_record", resp)
+        think(0.5, 1.5)
 
     # --------------------------------------------------------------------
     # 6️⃣ GET VISITOR LIST (FILTER)
@@ -109,7 +120,7 @@ class VisitorFlow(SequentialTaskSet):
             params=params,
             name="get_visitors",
         )
-        time.sleep(random.uniform(0.3, 1.2))
+        think(0.3, 1.2)
 
     # --------------------------------------------------------------------
     # 7️⃣ VISITOR EXIT
@@ -124,10 +135,10 @@ class VisitorFlow(SequentialTaskSet):
             json=payload,
             name="visitor_exit",
         )
-        time.sleep(random.uniform(0.3, 1.5))
+        think(0.3, 1.5)
 
 
-class VisitorUser(HttpUser):
+class VisitorUser(BaseHttpUser):
     tasks = [VisitorFlow]
-    wait_time = between(1, 3)
+    wait_time = user_wait_time(1, 3)
     host = HOST